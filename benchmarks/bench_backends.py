@@ -0,0 +1,80 @@
+"""
+Render throughput and timing benchmark on the headless backends.
+
+- throughput: frames per second from step() when every LED changes, on the
+  simulator and with every frame recorded to disk
+- timing: how late the render thread shows blink frames, from the
+  simulator's show timestamps
+- replay: how fast a memory-mapped recording can be scanned
+
+    python benchmarks/bench_backends.py
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from metar_map.led_backends import FrameRecorder, FrameReplay, SimulatorBackend
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+NUM_LEDS = 300
+FRAMES = 500
+BLINK_S = 0.05
+TIMING_RUN_S = 2.0
+
+
+def blink_table(blink_s: float) -> dict[int, list[LEDPattern]]:
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=1e9, blink=True, blink_speed_s=blink_s
+    )
+    return {i: [blink] for i in range(NUM_LEDS)}
+
+
+def frames_per_s(strip: Any) -> float:
+    controller = LEDController(num_leds=NUM_LEDS, strip=strip, autostart=False)
+    controller.update_patterns(blink_table(1.0))
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        controller.step(now=float(frame))
+    return FRAMES / (time.perf_counter() - start)
+
+
+def show_lateness_ms() -> list[float]:
+    strip = SimulatorBackend(NUM_LEDS, history=10_000)
+    controller = LEDController(num_leds=NUM_LEDS, strip=strip)
+    controller.update_patterns(blink_table(BLINK_S))
+    time.sleep(TIMING_RUN_S)
+    controller.stop()
+    # The first show is the table swap, the last one the blank frame from stop()
+    times = list(strip.show_times)[1:-1]
+    return [(b - a - BLINK_S) * 1000 for a, b in zip(times, times[1:])]
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "frames.bin")
+        simulated = frames_per_s(SimulatorBackend(NUM_LEDS))
+        recorder = FrameRecorder(path, NUM_LEDS, inner=SimulatorBackend(NUM_LEDS))
+        recorded = frames_per_s(recorder)
+        recorder.close()
+
+        print(f"{NUM_LEDS} LEDs, every LED changing each frame")
+        print(f"{'simulator':>20}: {simulated:8.0f} frames/s")
+        print(f"{'simulator + record':>20}: {recorded:8.0f} frames/s")
+
+        with FrameReplay(path) as replay:
+            start = time.perf_counter()
+            lit = 0
+            for _, _, pixels in replay:
+                lit += pixels[0]
+                del pixels
+            elapsed = time.perf_counter() - start
+            print(f"{'replay scan':>20}: {len(replay) / elapsed:8.0f} frames/s")
+
+    lateness = sorted(show_lateness_ms())
+    print(f"blink every {BLINK_S * 1000:.0f} ms for {TIMING_RUN_S:.0f} s:")
+    print(f"{'show lateness':>20}: median {statistics.median(lateness):.2f} ms")
+    print(f"{'':>20}  p99 {lateness[int(len(lateness) * 0.99) - 1]:.2f} ms")
@@ -0,0 +1,75 @@
+"""
+Fading renderer frame-rate benchmark on the simulator backend.
+
+Every LED blinks with a fade as long as its blink, so every LED is
+recomposed on every frame: the worst case for the fading renderer.
+
+- step cost: time per frame when frames are driven back to back
+- real time: frames per second from the render thread targeting 60 fps
+
+The target is 60 fps for 300 LEDs on a Pi 4, which is several times slower
+per core than a desktop; compare the step cost against the 16.7 ms budget.
+
+    python benchmarks/bench_fade.py
+"""
+
+import time
+
+from metar_map.led_backends import SimulatorBackend
+from metar_map.led_controller import LEDController
+from metar_map.led_fade import FadingLEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+NUM_LEDS = 300
+FPS = 60.0
+FRAMES = 600
+REAL_TIME_S = 3.0
+
+
+def fading_table() -> dict[int, list[LEDPattern]]:
+    blink = LEDPattern(
+        color=LEDColor.PINK,
+        total_duration_s=1e9,
+        blink=True,
+        blink_speed_s=0.5,
+        fade_s=0.5,
+    )
+    return {i: [blink] for i in range(NUM_LEDS)}
+
+
+def step_ms(controller: LEDController) -> float:
+    controller.update_patterns(fading_table())
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        controller.step(now=frame / FPS)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def real_time_fps() -> tuple[float, float]:
+    """Frames rendered and frames pushed to the strip per second."""
+    strip = SimulatorBackend(NUM_LEDS, history=10_000)
+    controller = FadingLEDController(num_leds=NUM_LEDS, strip=strip, fps=FPS)
+    controller.update_patterns(fading_table())
+    start = time.monotonic()
+    time.sleep(REAL_TIME_S)
+    controller.stop()
+    elapsed = time.monotonic() - start
+    # Frames where every fade turns around look like the one before and are
+    # not pushed, so fewer frames are shown than rendered
+    return controller.wakeups / elapsed, strip.shows / elapsed
+
+
+if __name__ == "__main__":
+    switching = LEDController(
+        num_leds=NUM_LEDS, strip=SimulatorBackend(NUM_LEDS), autostart=False
+    )
+    fading = FadingLEDController(
+        num_leds=NUM_LEDS, strip=SimulatorBackend(NUM_LEDS), autostart=False, fps=FPS
+    )
+    budget_ms = 1000 / FPS
+    print(f"{NUM_LEDS} LEDs, every LED fading, {budget_ms:.1f} ms frame budget")
+    print(f"{'switching step':>16}: {step_ms(switching):6.3f} ms/frame")
+    print(f"{'fading step':>16}: {step_ms(fading):6.3f} ms/frame")
+    rendered, shown = real_time_fps()
+    print(f"{'real time':>16}: {rendered:6.1f} fps rendered (target {FPS:.0f})")
+    print(f"{'':>16}  {shown:6.1f} fps pushed to the strip")
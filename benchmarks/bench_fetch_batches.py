@@ -0,0 +1,43 @@
+"""
+Batched METAR fetch benchmark against a local stub server.
+
+The stub charges a fixed latency per request plus a little per station, like
+the real API. Compares one request for every station, batches fetched one at
+a time, and batches fetched concurrently.
+
+    python benchmarks/bench_fetch_batches.py
+"""
+
+import time
+
+from metar_map.client import MetarClient
+from stub_server import StubServer
+
+STATIONS = 400
+BATCH_SIZE = 50
+
+
+def run(server: StubServer, ids: list[str], batch_size: int, workers: int) -> float:
+    config_path = server.write_config(
+        f"fetch:\n  batch_size: {batch_size}\n  max_workers: {workers}"
+    )
+    client = MetarClient(config_path=config_path)
+    start = time.perf_counter()
+    result = client.get_metar(ids)
+    elapsed = time.perf_counter() - start
+    assert len(result) == len(ids)
+    return elapsed
+
+
+if __name__ == "__main__":
+    with StubServer(latency_s=0.15, latency_per_station_s=0.001) as server:
+        ids = server.add_stations(STATIONS)
+        cases = [
+            ("single request", STATIONS, 1),
+            ("sequential batches", BATCH_SIZE, 1),
+            ("concurrent batches x4", BATCH_SIZE, 4),
+            ("concurrent batches x8", BATCH_SIZE, 8),
+        ]
+        for label, batch_size, workers in cases:
+            elapsed = run(server, ids, batch_size, workers)
+            print(f"{label:>22}: {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,76 @@
+"""
+Frame rendering benchmark for LEDController.
+
+Drives the render step against a counting fake strip over a simulated timeline
+and reports how many `show()` calls and bytes reach the strip per second.
+
+    python benchmarks/bench_frame_render.py
+"""
+
+import time
+
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+BYTES_PER_LED = 3
+FRAME_INTERVAL_S = 0.05
+SIMULATED_S = 60.0
+
+
+class CountingStrip:
+    def __init__(self, num_leds: int):
+        self.num_leds = num_leds
+        self.shows = 0
+        self.bytes_pushed = 0
+
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        pass
+
+    def show(self):
+        self.shows += 1
+        self.bytes_pushed += self.num_leds * BYTES_PER_LED
+
+
+def _patterns(led_index: int) -> list[LEDPattern]:
+    # Mostly solid stations with every tenth one cycling through a blink.
+    solid = LEDPattern(color=LEDColor.GREEN, total_duration_s=5)
+    if led_index % 10:
+        return [solid]
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=8, blink=True, blink_speed_s=0.8
+    )
+    return [solid, blink]
+
+
+def run(num_leds: int) -> dict[str, float]:
+    strip = CountingStrip(num_leds)
+    controller = LEDController(num_leds=num_leds, strip=strip, autostart=False)
+    controller.update_patterns({i: _patterns(i) for i in range(num_leds)})
+
+    frames = int(SIMULATED_S / FRAME_INTERVAL_S)
+    start = time.perf_counter()
+    for frame in range(frames):
+        controller.step(now=frame * FRAME_INTERVAL_S)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "leds": num_leds,
+        "frames": frames,
+        "shows_per_s": strip.shows / SIMULATED_S,
+        "bytes_per_s": strip.bytes_pushed / SIMULATED_S,
+        # What one show() per LED per tick would have pushed.
+        "per_led_bytes_per_s": num_leds * num_leds * BYTES_PER_LED / FRAME_INTERVAL_S,
+        "frame_ms": elapsed / frames * 1000,
+    }
+
+
+if __name__ == "__main__":
+    print(
+        f"{'LEDs':>6} {'shows/s':>9} {'bytes/s':>10} {'per-LED bytes/s':>16} {'frame ms':>9}"
+    )
+    for n in (50, 200, 500):
+        r = run(n)
+        print(
+            f"{r['leds']:>6} {r['shows_per_s']:>9.2f} {r['bytes_per_s']:>10.0f}"
+            f" {r['per_led_bytes_per_s']:>16.0f} {r['frame_ms']:>9.3f}"
+        )
@@ -0,0 +1,109 @@
+"""
+Frame-step microbenchmark: array-backed LEDController state versus the
+previous per-LED dict-of-strings state.
+
+Reports the time to advance and compose one frame, per LED, both for a
+steady map (few LEDs due) and for the worst case where every LED is due.
+
+    python benchmarks/bench_frame_step.py
+"""
+
+import time
+from typing import Any
+
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+FRAMES = 200
+
+
+class NullStrip:
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        pass
+
+    def show(self):
+        pass
+
+
+class DictStateRenderer:
+    """The render step as it was before state moved into arrays."""
+
+    def __init__(self, num_leds: int, patterns: dict[int, list[LEDPattern]]):
+        self.num_leds = num_leds
+        self._led_patterns = patterns
+        self._last_states: dict[int, dict[str, Any]] = {}
+        self._frame = [LEDColor.OFF.rgb] * num_leds
+
+    def render(self, now: float):
+        for led_index in range(self.num_leds):
+            patterns = self._led_patterns.get(led_index)
+            if not patterns:
+                self._frame[led_index] = LEDColor.OFF.rgb
+                continue
+            if led_index not in self._last_states:
+                self._last_states[led_index] = {
+                    "pattern_index": 0,
+                    "pattern_end": now + patterns[0].total_duration_s,
+                    "led_on": True,
+                    "next_blink": (
+                        now + patterns[0].blink_speed_s if patterns[0].blink else None
+                    ),
+                }
+            state = self._last_states[led_index]
+            pattern = patterns[int(state["pattern_index"])]
+            if pattern.blink and state["next_blink"] and now >= state["next_blink"]:
+                state["led_on"] = not state["led_on"]
+                state["next_blink"] = now + pattern.blink_speed_s
+            self._frame[led_index] = (
+                pattern.color.rgb if state["led_on"] else LEDColor.OFF.rgb
+            )
+            if now >= state["pattern_end"]:
+                state["pattern_index"] = (state["pattern_index"] + 1) % len(patterns)
+                next_pattern = patterns[int(state["pattern_index"])]
+                state["pattern_end"] = now + next_pattern.total_duration_s
+                state["led_on"] = True
+                state["next_blink"] = (
+                    now + next_pattern.blink_speed_s if next_pattern.blink else None
+                )
+
+
+def _table(num_leds: int, blink_speed_s: float) -> dict[int, list[LEDPattern]]:
+    solid = LEDPattern(color=LEDColor.GREEN, total_duration_s=5)
+    blink = LEDPattern(
+        color=LEDColor.WHITE,
+        total_duration_s=8,
+        blink=True,
+        blink_speed_s=blink_speed_s,
+    )
+    return {i: [solid, blink] if i % 10 == 0 else [solid] for i in range(num_leds)}
+
+
+def _time_per_led_us(render: Any, num_leds: int, frame_s: float) -> float:
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        render(frame * frame_s)
+    return (time.perf_counter() - start) / FRAMES / num_leds * 1e6
+
+
+def run(num_leds: int, all_due: bool) -> tuple[float, float]:
+    # With a frame interval far beyond every duration, every LED is due each frame
+    frame_s = 100.0 if all_due else 0.05
+    table = _table(num_leds, blink_speed_s=0.8)
+
+    legacy = DictStateRenderer(num_leds, table)
+    controller = LEDController(num_leds=num_leds, strip=NullStrip(), autostart=False)
+    controller.update_patterns(table)
+
+    return (
+        _time_per_led_us(legacy.render, num_leds, frame_s),
+        _time_per_led_us(controller._render_frame, num_leds, frame_s),
+    )
+
+
+if __name__ == "__main__":
+    print(f"{'LEDs':>6} {'case':>8} {'dict us/LED':>12} {'array us/LED':>13}")
+    for n in (100, 500, 1000):
+        for all_due in (False, True):
+            legacy_us, array_us = run(n, all_due)
+            case = "all due" if all_due else "steady"
+            print(f"{n:>6} {case:>8} {legacy_us:>12.3f} {array_us:>13.3f}")
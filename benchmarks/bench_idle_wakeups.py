@@ -0,0 +1,68 @@
+"""
+Idle cost benchmark for the LEDController render thread.
+
+Reports wakeups per minute for an all-solid map and for maps with some
+blinking stations, by stepping a controller through simulated time the way
+its render thread does: render, then sleep until the next LED state change.
+Each blinking station cycles through 5 s solid and 8 s blinking, so the
+measurement covers several whole cycles once every station has started.
+Stations either start together or spread over one cycle, as they do when
+refreshes change them at different times.
+The previous fixed 50 ms poll woke 1,200 times a minute regardless.
+
+    python benchmarks/bench_idle_wakeups.py
+"""
+
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+NUM_LEDS = 100
+SOLID = LEDPattern(color=LEDColor.GREEN, total_duration_s=5)
+BLINK = LEDPattern(
+    color=LEDColor.WHITE, total_duration_s=8, blink=True, blink_speed_s=0.8
+)
+CYCLE_S = SOLID.total_duration_s + BLINK.total_duration_s
+CYCLES = 10
+
+
+class NullStrip:
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        pass
+
+    def show(self):
+        pass
+
+
+def run(blinking: int, staggered: bool) -> float:
+    controller = LEDController(num_leds=NUM_LEDS, strip=NullStrip(), autostart=False)
+    controller.update_patterns({i: [SOLID] for i in range(NUM_LEDS)})
+    # (start time, LED) for every blinking station, latest first
+    starts = sorted(
+        ((i * CYCLE_S / blinking if staggered else 0.0), i) for i in range(blinking)
+    )[::-1]
+    measure_from = CYCLE_S
+    measure_to = measure_from + CYCLES * CYCLE_S
+    now = 0.0
+    wakeups = 0
+    while now < measure_to:
+        while starts and starts[-1][0] <= now:
+            controller.update_leds({starts.pop()[1]: [SOLID, BLINK]})
+        controller.step(now=now)
+        # The render thread sleeps until the next state change, or until an
+        # update wakes it
+        wake_at = min(
+            controller._next_deadline, starts[-1][0] if starts else measure_to
+        )
+        now = min(wake_at, measure_to)
+        if measure_from <= now < measure_to:
+            wakeups += 1
+    return wakeups * 60.0 / (measure_to - measure_from)
+
+
+if __name__ == "__main__":
+    for blinking in (0, 5, 50):
+        together, spread = run(blinking, False), run(blinking, True)
+        print(
+            f"{blinking:>3} blinking stations: {together:8.1f} wakeups/min together,"
+            f" {spread:8.1f} spread out"
+        )
@@ -0,0 +1,91 @@
+"""
+Refresh-loop logging benchmark.
+
+Times the per-station log lines of one refresh pass (`MetarMap._update_leds`)
+with debug output enabled and disabled, comparing the eager f-string calls
+the loop used to make with the lazy %-style calls it makes now, each with
+synchronous handlers and with the queued (`logger.queue`) pipeline.
+
+On a fast disk the queue costs the caller a little more per record (the
+message is formatted before it is enqueued); its benefit is that the caller
+never waits on a slow SD card write or a file rotation.
+
+    python benchmarks/bench_logging.py
+"""
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from metar_map.client import MetarData, _parse_metar
+from metar_map.logger import Logger
+from metar_map.pattern_builder import LEDPatternBuilder
+from stub_server import synthetic_station
+
+STATIONS = 500
+ROUNDS = 5
+
+
+def eager_pass(logger: Logger, stations: list[MetarData], patterns: Any):
+    """The loop body's logging as it was: formatted whether or not emitted."""
+    for led_index, data in enumerate(stations):
+        logger.debug("----------------------------------------")
+        logger.debug(f"LED Index: {led_index} ICAO: {data.icao}")
+        logger.debug(f"ICAO: {data.icao}")
+        logger.debug(f"Flight Category: {data.flight_category}")
+        for pattern in patterns:
+            logger.debug(str(pattern))
+    logger.debug(f"Payload: {stations}")
+
+
+def lazy_pass(logger: Logger, stations: list[MetarData], patterns: Any):
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for led_index, data in enumerate(stations):
+        if debug:
+            logger.debug("----------------------------------------")
+            logger.debug("LED Index: %d ICAO: %s", led_index, data.icao)
+            logger.debug("ICAO: %s", data.icao)
+            logger.debug("Flight Category: %s", data.flight_category)
+            for pattern in patterns:
+                logger.debug("%s", pattern)
+    logger.debug("Payload: %s", stations)
+
+
+def make_logger(directory: Path, debug: bool, queue: bool) -> Logger:
+    # The console stays at INFO so only the file sees debug output
+    config_path = directory / f"config_{debug}_{queue}.yaml"
+    config_path.write_text(f"""
+logger:
+  log_file: "{directory / 'bench.log'}"
+  console_level: "INFO"
+  file_level: "{'DEBUG' if debug else 'INFO'}"
+  queue: {str(queue).lower()}
+""")
+    return Logger(config_path=str(config_path))
+
+
+def per_pass_ms(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+if __name__ == "__main__":
+    stations = [_parse_metar(synthetic_station(i)) for i in range(STATIONS)]
+    patterns = LEDPatternBuilder().build_led_patterns(
+        flight_category="VFR", lightning=True, snow=False, gusts=False
+    )
+    print(f"{STATIONS} stations, ms per refresh pass (time on the calling thread)")
+    print(f"{'debug':>6} {'handlers':>9} {'eager':>9} {'lazy':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for debug in (False, True):
+            for queue in (False, True):
+                logger = make_logger(Path(tmp), debug, queue)
+                eager = per_pass_ms(lambda: eager_pass(logger, stations, patterns))
+                lazy = per_pass_ms(lambda: lazy_pass(logger, stations, patterns))
+                logger.close()
+                mode = "queue" if queue else "sync"
+                print(f"{str(debug):>6} {mode:>9} {eager:>9.2f} {lazy:>9.2f}")
@@ -0,0 +1,121 @@
+"""
+MetarData memory and lookup benchmark.
+
+Compares the previous mutable dataclass (per-instance __dict__, lightning
+recomputed from `raw` on every access), the slotted frozen MetarData and the
+columnar MetarBatch for a large station set.
+
+    python benchmarks/bench_metar_data.py
+"""
+
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from metar_map.client import MetarBatch, MetarData, _parse_metar
+from stub_server import synthetic_station
+
+STATIONS = 5000
+ROUNDS = 20
+
+
+@dataclass
+class LegacyMetarData:
+    icao: Optional[str]
+    name: Optional[str]
+    metar_type: Optional[str]
+    flight_category: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    wind_gust: Optional[int]
+    raw: Optional[str]
+    snow: Optional[float]
+    observation_time: Optional[int] = None
+
+    @property
+    def lightning(self) -> bool:
+        return self.raw is not None and "LTG" in self.raw.upper()
+
+
+def build_legacy(items: list[dict[str, Any]]) -> list[LegacyMetarData]:
+    return [LegacyMetarData(**_fields(_parse_metar(item))) for item in items]
+
+
+def build_slotted(items: list[dict[str, Any]]) -> list[MetarData]:
+    return [_parse_metar(item) for item in items]
+
+
+def _fields(data: MetarData) -> dict[str, Any]:
+    return {
+        "icao": data.icao,
+        "name": data.name,
+        "metar_type": data.metar_type,
+        "flight_category": data.flight_category,
+        "latitude": data.latitude,
+        "longitude": data.longitude,
+        "wind_gust": data.wind_gust,
+        "raw": data.raw,
+        "snow": data.snow,
+        "observation_time": data.observation_time,
+    }
+
+
+def records_footprint(build: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def lookup_records(records: list[Any], icaos: list[str]) -> int:
+    """What the main loop does each refresh: build the lookup, read the flags."""
+    lookup = {d.icao: d for d in records if d.icao}
+    lit = 0
+    for icao in icaos:
+        data = lookup[icao]
+        lit += bool(data.flight_category) + data.lightning + bool(data.snow)
+    return lit
+
+
+def lookup_batch(batch: MetarBatch, icaos: list[str]) -> int:
+    rows = batch.rows
+    flight_category = batch.flight_category
+    lightning = batch.lightning
+    snowing = batch.snowing
+    lit = 0
+    for icao in icaos:
+        row = rows[icao]
+        lit += bool(flight_category[row]) + lightning[row] + snowing[row]
+    return lit
+
+
+def per_round_ms(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+if __name__ == "__main__":
+    items = [synthetic_station(i) for i in range(STATIONS)]
+    icaos = [item["icaoId"] for item in items]
+    slotted = build_slotted(items)
+    legacy = build_legacy(items)
+    batch = MetarBatch.from_records(slotted)
+
+    print(f"{STATIONS} stations (record objects only, strings shared)")
+    print(
+        f"{'legacy dataclass':>18}: {records_footprint(lambda: build_legacy(items)) / 1e6:6.2f} MB"
+        f"  lookup {per_round_ms(lambda: lookup_records(legacy, icaos)):6.2f} ms"
+    )
+    print(
+        f"{'slotted frozen':>18}: {records_footprint(lambda: build_slotted(items)) / 1e6:6.2f} MB"
+        f"  lookup {per_round_ms(lambda: lookup_records(slotted, icaos)):6.2f} ms"
+    )
+    print(
+        f"{'MetarBatch':>18}: {records_footprint(lambda: MetarBatch.from_records(slotted)) / 1e6:6.2f} MB"
+        f"  lookup {per_round_ms(lambda: lookup_batch(batch, icaos)):6.2f} ms"
+    )
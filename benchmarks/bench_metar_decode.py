@@ -0,0 +1,79 @@
+"""
+Local METAR decoding throughput over a corpus of synthetic raw METARs with
+a realistic mix of winds, visibilities, cloud layers, weather and remarks.
+
+- decode: decode_metar() on reports it hasn't seen
+- repeat: decode_metar() on the reports of the last refresh, which are
+  served from its cache
+- record: building MetarData from a parsed API record, which decodes `raw`,
+  against the same record without `rawOb`
+
+    python benchmarks/bench_metar_decode.py
+"""
+
+import random
+import time
+from typing import Callable
+
+from metar_map.client import _parse_metar
+from metar_map.metar_decode import decode_metar
+from stub_server import synthetic_station
+
+CORPUS_SIZE = 5000
+ROUNDS = 5
+SEED = 1
+
+VISIBILITIES = ("10SM", "P6SM", "7SM", "3SM", "1 1/2SM", "1/2SM", "M1/4SM", "9999")
+WEATHER = ("", "", "", "-RA", "BR", "-TSRA", "+TSRA BR", "-SN", "SN FZFG", "HZ")
+LAYERS = ("CLR", "FEW040", "SCT025", "BKN012", "OVC008", "VV002", "BKN030CB")
+REMARKS = ("RMK AO2", "RMK AO2 SLP132", "RMK AO2 LTG DSNT SE", "RMK AO2 TSB32")
+
+
+def synthetic_metar(rng: random.Random, index: int) -> str:
+    gust = f"G{rng.randint(18, 40)}" if rng.random() < 0.2 else ""
+    groups = [
+        rng.choice(("METAR", "SPECI", "")),
+        f"K{index:04d}",
+        "121651Z",
+        f"{rng.randrange(0, 360, 10):03d}{rng.randint(0, 25):02d}{gust}KT",
+        rng.choice(VISIBILITIES),
+        rng.choice(WEATHER),
+        *rng.sample(LAYERS, rng.randint(1, 3)),
+        f"{rng.randint(-10, 30):02d}/{rng.randint(-15, 20):02d}".replace("-", "M"),
+        f"A{rng.randint(2900, 3100)}",
+        rng.choice(REMARKS),
+    ]
+    return " ".join(group for group in groups if group)
+
+
+def per_second(fn: Callable[[], None], cold: bool = True) -> float:
+    elapsed = 0.0
+    for _ in range(ROUNDS):
+        if cold:
+            decode_metar.cache_clear()
+        start = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - start
+    return CORPUS_SIZE * ROUNDS / elapsed
+
+
+if __name__ == "__main__":
+    rng = random.Random(SEED)
+    corpus = [synthetic_metar(rng, i) for i in range(CORPUS_SIZE)]
+    records = [
+        dict(synthetic_station(i), rawOb=raw, fltCat=None)
+        for i, raw in enumerate(corpus)
+    ]
+    bare = [dict(record, rawOb=None) for record in records]
+    categories = [_parse_metar(record).flight_category for record in records]
+    derived = sum(category is not None for category in categories)
+
+    print(f"{CORPUS_SIZE} METARs, flight category derived for {derived}")
+    decode = per_second(lambda: [decode_metar(raw) for raw in corpus])
+    repeat = per_second(lambda: [decode_metar(raw) for raw in corpus], cold=False)
+    print(f"{'decode':>14}: {decode:10,.0f} METARs/s  {1e6 / decode:6.2f} us each")
+    print(f"{'repeat':>14}: {repeat:10,.0f} METARs/s  {1e6 / repeat:6.2f} us each")
+    with_raw = per_second(lambda: [_parse_metar(record) for record in records])
+    without_raw = per_second(lambda: [_parse_metar(record) for record in bare])
+    print(f"{'record':>14}: {with_raw:10,.0f} records/s")
+    print(f"{'without raw':>14}: {without_raw:10,.0f} records/s")
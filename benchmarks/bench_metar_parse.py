@@ -0,0 +1,94 @@
+"""
+METAR response parsing benchmark: whole-document `json.loads` versus the
+streaming parser, on a synthetic payload shaped like the aviationweather.gov
+API response.
+
+Reports parse time and peak traced memory for building the station lookup
+the main loop uses.
+
+    python benchmarks/bench_metar_parse.py
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from metar_map.client import MetarData, _parse_metar
+from metar_map.json_stream import iter_json_array
+from stub_server import synthetic_station
+
+STATIONS = 5000
+CHUNK_BYTES = 64 * 1024
+
+
+def full_record(index: int) -> dict[str, Any]:
+    # The API returns many more fields than MetarData keeps
+    record = synthetic_station(index)
+    record.update(
+        {
+            "metar_id": 900_000_000 + index,
+            "receiptTime": "2024-01-12 16:54:00",
+            "reportTime": "2024-01-12 17:00:00",
+            "temp": 20.0,
+            "dewp": 10.0,
+            "wdir": 180,
+            "wspd": 10,
+            "visib": "10+",
+            "altim": 1016.0,
+            "slp": 1015.8,
+            "qcField": 4,
+            "wxString": "-TSRA",
+            "presTend": None,
+            "maxT": None,
+            "minT": None,
+            "precip": None,
+            "pcp3hr": None,
+            "pcp6hr": None,
+            "pcp24hr": None,
+            "vertVis": None,
+            "elev": 134,
+            "prior": 5,
+            "clouds": [{"cover": "BKN", "base": 3000}, {"cover": "OVC", "base": 8000}],
+        }
+    )
+    return record
+
+
+def whole_document(chunks: list[bytes]) -> dict[str, MetarData]:
+    payload = [_parse_metar(item) for item in json.loads(b"".join(chunks))]
+    return {d.icao: d for d in payload if d.icao}
+
+
+def streaming(chunks: list[bytes]) -> dict[str, MetarData]:
+    return {
+        d.icao: d
+        for d in (_parse_metar(item) for item in iter_json_array(chunks))
+        if d.icao
+    }
+
+
+def measure(
+    parse: Callable[[list[bytes]], dict[str, MetarData]], chunks: list[bytes]
+) -> tuple[float, float]:
+    start = time.perf_counter()
+    for _ in range(5):
+        result = parse(chunks)
+    elapsed = (time.perf_counter() - start) / 5
+    assert len(result) == STATIONS
+    del result
+
+    tracemalloc.start()
+    result = parse(chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    body = json.dumps([full_record(i) for i in range(STATIONS)]).encode()
+    chunks = [body[i : i + CHUNK_BYTES] for i in range(0, len(body), CHUNK_BYTES)]
+    print(f"{STATIONS} stations, {len(body) / 1e6:.1f} MB payload")
+    for label, parse in (("json.loads", whole_document), ("streaming", streaming)):
+        elapsed, peak = measure(parse, chunks)
+        print(f"{label:>12}: {elapsed * 1000:8.1f} ms  peak {peak / 1e6:6.1f} MB")
@@ -0,0 +1,57 @@
+"""
+Multi-channel frame time benchmark.
+
+Drives an LEDController whose LEDs are split across 1, 2, 4 and 8 channels
+of fake strips. Each channel's show() sleeps for the WS2812 wire time of its
+own LEDs, so the benchmark runs on any machine without GPIO.
+
+    python benchmarks/bench_multi_channel.py
+"""
+
+import time
+
+from metar_map.led_channels import MultiStrip
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+NUM_LEDS = 1200
+# 30 us per LED is the WS2812 wire time
+LED_WIRE_S = 30e-6
+FRAMES = 50
+
+
+class WireTimeStrip:
+    def __init__(self, num_leds: int):
+        self.num_leds = num_leds
+        self.brightness = 1.0
+
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        pass
+
+    def show(self):
+        time.sleep(self.num_leds * LED_WIRE_S)
+
+
+def frame_ms(channels: int) -> float:
+    counts = [NUM_LEDS // channels] * channels
+    strip = MultiStrip([WireTimeStrip(c) for c in counts], counts)
+    controller = LEDController(num_leds=NUM_LEDS, strip=strip, autostart=False)
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=1e9, blink=True, blink_speed_s=1.0
+    )
+    controller.update_patterns({i: [blink] for i in range(NUM_LEDS)})
+    # Every frame toggles every LED, so every channel is shown
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        controller.step(now=float(frame))
+    elapsed = time.perf_counter() - start
+    strip.close()
+    return elapsed / FRAMES * 1000
+
+
+if __name__ == "__main__":
+    print(f"{NUM_LEDS} LEDs, every LED changing each frame")
+    print(f"{'channels':>9} {'ms/frame':>9} {'max fps':>8}")
+    for channels in (1, 2, 4, 8):
+        ms = frame_ms(channels)
+        print(f"{channels:>9} {ms:>9.2f} {1000 / ms:>8.1f}")
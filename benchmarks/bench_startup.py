@@ -0,0 +1,74 @@
+"""
+Startup benchmark: interpreter start, imports, config load and component
+construction up to the first frame pushed to a (fake) strip.
+
+Each sample runs in a fresh interpreter inside a scratch directory, so the
+relative log and cache paths from the packaged config do not touch the repo.
+
+    python benchmarks/bench_startup.py
+"""
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SAMPLES = 5
+
+CHILD = """
+import time
+started = time.perf_counter()
+
+from metar_map.client import MetarClient
+from metar_map.config import get_config
+from metar_map.led_controller import LEDController
+from metar_map.logger import Logger
+from metar_map.pattern_builder import LEDPatternBuilder
+imported = time.perf_counter()
+
+
+class NullStrip:
+    def __setitem__(self, index, color):
+        pass
+
+    def show(self):
+        pass
+
+
+config = get_config()
+logger = Logger(config=config)
+client = MetarClient(config=config)
+builder = LEDPatternBuilder(config=config)
+controller = LEDController(
+    num_leds=len(config.icao_codes), strip=NullStrip(), autostart=False
+)
+patterns = builder.build_led_patterns("VFR", False, False, False)
+controller.update_patterns({i: patterns for i in range(len(config.icao_codes))})
+controller.step()
+first_frame = time.perf_counter()
+print(f"{imported - started} {first_frame - started}")
+"""
+
+
+def sample() -> tuple[float, float, float]:
+    """Seconds for (whole process to first frame, imports, imports + first frame)."""
+    with tempfile.TemporaryDirectory() as cwd:
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            cwd=cwd,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        total = time.perf_counter() - start
+    imported, first_frame = (float(v) for v in output.split()[-2:])
+    return total, imported, first_frame
+
+
+if __name__ == "__main__":
+    samples = [sample() for _ in range(SAMPLES)]
+    for label, index in (("process", 0), ("imports", 1), ("first frame", 2)):
+        median = statistics.median(s[index] for s in samples)
+        print(f"{label:>12}: {median * 1000:8.1f} ms")
@@ -0,0 +1,119 @@
+"""
+Pattern update stress benchmark for LEDController.
+
+Several threads publish pattern tables as fast as they can while the render
+thread drives a fake strip whose show() takes as long as a long WS2812 chain.
+Reports how long update_patterns blocks its caller, how long a published
+table takes to reach the strip, and how late blink frames are rendered.
+
+    python benchmarks/bench_update_stress.py
+"""
+
+import statistics
+import threading
+import time
+
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+NUM_LEDS = 300
+# 30 us per LED is the WS2812 wire time
+SHOW_S = NUM_LEDS * 30e-6
+BLINK_S = 0.05
+UPDATER_THREADS = 4
+UPDATES_PER_THREAD = 200
+
+
+class TimedStrip:
+    def __init__(self, controller_ref: list[LEDController]):
+        self._controller_ref = controller_ref
+        self._first_pixel: tuple[int, int, int] = (0, 0, 0)
+        self.shows: list[tuple[float, int, tuple[int, int, int]]] = []
+
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        if index == 0:
+            self._first_pixel = color
+
+    def show(self):
+        time.sleep(SHOW_S)
+        table_id = id(self._controller_ref[0]._table)
+        self.shows.append((time.perf_counter(), table_id, self._first_pixel))
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run() -> dict[str, float]:
+    controller_ref: list[LEDController] = []
+    strip = TimedStrip(controller_ref)
+    controller = LEDController(num_leds=NUM_LEDS, strip=strip, autostart=False)
+    controller_ref.append(controller)
+
+    # LED 0 blinks on a fixed cadence and never changes; the rest are rewritten
+    reference = [LEDPattern(color=LEDColor.WHITE, blink=True, blink_speed_s=BLINK_S)]
+    colors = [LEDColor.GREEN, LEDColor.BLUE, LEDColor.RED, LEDColor.PINK]
+    published: dict[int, float] = {}
+    call_latencies: list[float] = []
+    tables = []
+
+    def updater(offset: int):
+        for n in range(UPDATES_PER_THREAD):
+            color = colors[(n + offset) % len(colors)]
+            table = {0: reference}
+            table.update({i: [LEDPattern(color=color)] for i in range(1, NUM_LEDS)})
+            start = time.perf_counter()
+            controller.update_patterns(table)
+            end = time.perf_counter()
+            call_latencies.append(end - start)
+            # Keep the published tuple alive so its id stays unique
+            tables.append(controller._published_table)
+            published[id(controller._published_table)] = start
+            time.sleep(0.001)
+
+    controller.update_patterns({0: reference})
+    controller.start()
+    time.sleep(0.5)
+    threads = [
+        threading.Thread(target=updater, args=(i,)) for i in range(UPDATER_THREADS)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(0.5)
+    controller.stop()
+
+    pickup: list[float] = []
+    seen: set[int] = set()
+    for shown_at, table_id, _ in strip.shows:
+        if table_id in published and table_id not in seen:
+            seen.add(table_id)
+            pickup.append(shown_at - published[table_id])
+
+    toggles = [
+        shown_at
+        for (shown_at, _, pixel), (_, _, previous) in zip(strip.shows[1:], strip.shows)
+        if pixel != previous
+    ]
+    lateness = [
+        (later - earlier) - BLINK_S for earlier, later in zip(toggles, toggles[1:])
+    ]
+
+    return {
+        "updates": len(call_latencies),
+        "tables_rendered": len(pickup),
+        "update_call_p50_ms": statistics.median(call_latencies) * 1000,
+        "update_call_p99_ms": _percentile(call_latencies, 0.99) * 1000,
+        "update_call_max_ms": max(call_latencies) * 1000,
+        "pickup_p50_ms": statistics.median(pickup) * 1000,
+        "pickup_p99_ms": _percentile(pickup, 0.99) * 1000,
+        "blink_jitter_p50_ms": statistics.median(lateness) * 1000,
+        "blink_jitter_p99_ms": _percentile(lateness, 0.99) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    for key, value in run().items():
+        print(f"{key:>22}: {value:.3f}")
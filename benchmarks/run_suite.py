@@ -0,0 +1,350 @@
+"""
+Benchmark suite for the refresh-to-frame pipeline, without network or GPIO.
+
+- parse: streaming-parse a recorded API response into MetarData, at 10,
+  100, 1,000 and 5,000 stations, with the raw-METAR decoder cache cleared
+- patterns: build the pattern sequence for every station
+- update: MetarMap.apply_stations() diffing a refresh into the controller,
+  with nothing changed and with a tenth of the stations changed
+- render: one LEDController.step() into a fake strip at several LED counts,
+  plain and with smooth fading
+- pipeline: parse, apply and render one frame, as one refresh does
+
+Results are written as JSON, in seconds per call; pass an earlier run to
+--compare to see the change in each benchmark's fastest round. It exits 1
+if any slowed by more than --tolerance.
+
+    python benchmarks/run_suite.py -o results.json
+    python benchmarks/run_suite.py -k render --compare results.json
+    python benchmarks/run_suite.py --record  # rewrite the fixture
+"""
+
+import argparse
+import gzip
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+import yaml
+
+from metar_map.app import MetarMap
+from metar_map.client import MetarData, _parse_metar
+from metar_map.config import get_config, load_config
+from metar_map.json_stream import iter_json_array
+from metar_map.led_controller import LEDController
+from metar_map.led_fade import FadingLEDController
+from metar_map.metar_decode import decode_metar
+from metar_map.pattern_builder import LEDPatternBuilder
+
+FIXTURE = Path(__file__).parent / "fixtures" / "metars.json.gz"
+FIXTURE_STATIONS = 5000
+SEED = 1
+STATION_COUNTS = (10, 100, 1000, 5000)
+LED_COUNTS = (50, 300, 1000, 5000)
+CHUNK_BYTES = 64 * 1024
+FRAME_INTERVAL_S = 1 / 30
+# Every round runs its benchmark for at least this long
+MIN_ROUND_S = 0.05
+
+
+class NullStrip:
+    """A strip that keeps the last frame, like a NeoPixel buffer."""
+
+    def __init__(self, num_leds: int):
+        self.pixels = [(0, 0, 0)] * num_leds
+        self.shows = 0
+
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        self.pixels[index] = color
+
+    def show(self):
+        self.shows += 1
+
+
+def record_fixture():
+    # The generators of the parse and decode benchmarks
+    from bench_metar_decode import synthetic_metar
+    from bench_metar_parse import full_record
+
+    rng = random.Random(SEED)
+    records = []
+    for index in range(FIXTURE_STATIONS):
+        record = full_record(index)
+        record["rawOb"] = synthetic_metar(rng, index).replace(
+            f"K{index:04d}", record["icaoId"], 1
+        )
+        # Some stations leave the category to be derived from the raw text
+        if rng.random() < 0.05:
+            record["fltCat"] = None
+        records.append(record)
+    FIXTURE.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the file identical between recordings
+    with gzip.GzipFile(FIXTURE, "wb", mtime=0) as f:
+        f.write(json.dumps(records, indent=1).encode())
+
+
+def with_changes(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """`records` with the flight category of every tenth station changed."""
+    categories = ("VFR", "MVFR", "IFR", "LIFR", None)
+    return [
+        (
+            dict(record, fltCat=categories[categories.index(record["fltCat"]) - 1])
+            if index % 10 == 0
+            else record
+        )
+        for index, record in enumerate(records)
+    ]
+
+
+def load_payloads() -> dict[int, tuple[bytes, bytes]]:
+    """
+    Response bodies with the fixture's first `count` stations, per count:
+    as recorded, and the next refresh with a tenth of them changed.
+    """
+    records = json.loads(gzip.decompress(FIXTURE.read_bytes()))
+    return {
+        count: (
+            json.dumps(records[:count]).encode(),
+            json.dumps(with_changes(records[:count])).encode(),
+        )
+        for count in STATION_COUNTS
+    }
+
+
+def chunked(body: bytes) -> list[bytes]:
+    return [body[i : i + CHUNK_BYTES] for i in range(0, len(body), CHUNK_BYTES)]
+
+
+def parse(chunks: list[bytes]) -> list[MetarData]:
+    # What MetarClient does with each streamed response
+    return [data for data in map(_parse_metar, iter_json_array(chunks)) if data.icao]
+
+
+def make_app(directory: str, stations: list[MetarData], **overrides: Any) -> MetarMap:
+    config_path = Path(directory) / f"config-{len(stations)}.yaml"
+    document = dict(load_config())
+    document.update(
+        {
+            "icao_codes": [data.icao for data in stations],
+            "cache": {},
+            # The fixture's observations are years old; keep the stale check
+            # running without every station failing it
+            "stale_after": 10**9,
+            "logger": {
+                "log_file": str(Path(directory) / "metar_map.log"),
+                "console_level": "CRITICAL",
+                "file_level": "INFO",
+            },
+            **overrides,
+        }
+    )
+    config_path.write_text(yaml.safe_dump(document))
+    app = MetarMap(
+        get_config(config_path=str(config_path)), strip=NullStrip(len(stations))
+    )
+    app.controller.stop()
+    return app
+
+
+def count_up() -> Iterator[int]:
+    return iter(range(sys.maxsize))
+
+
+def time_rounds(op: Callable[[], Any], rounds: int) -> tuple[int, list[float]]:
+    """Seconds per call of `op` in each round, after a warm-up call."""
+    start = time.perf_counter()
+    op()
+    first = time.perf_counter() - start
+    iterations = max(1, int(MIN_ROUND_S / max(first, 1e-9)))
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        times.append((time.perf_counter() - start) / iterations)
+    return iterations, times
+
+
+def benchmarks(directory: str) -> Iterator[tuple[str, dict[str, Any], Callable]]:
+    """(name, params, op) for every benchmark in the suite."""
+    payloads = load_payloads()
+    stations = {count: parse(chunked(body)) for count, (body, _) in payloads.items()}
+
+    for count, (body, _) in payloads.items():
+        chunks = chunked(body)
+
+        def parse_cold(chunks: list[bytes] = chunks):
+            # Each refresh brings new raw METARs
+            decode_metar.cache_clear()
+            parse(chunks)
+
+        yield f"parse[{count}]", {"stations": count, "bytes": len(body)}, parse_cold
+
+    builder = LEDPatternBuilder(config=get_config())
+    for count, data in stations.items():
+
+        def build(data: list[MetarData] = data):
+            build_led_patterns = builder.build_led_patterns
+            for d in data:
+                build_led_patterns(d.flight_category, d.lightning, d.snowing, d.gusty)
+
+        yield f"patterns[{count}]", {"stations": count}, build
+
+    for count, (_, changed_body) in payloads.items():
+        data = stations[count]
+        app = make_app(directory, data)
+        app.apply_stations(data)
+
+        def update_unchanged(app: MetarMap = app, data: list[MetarData] = data):
+            app.apply_stations(data)
+
+        yield f"update_unchanged[{count}]", {"stations": count}, update_unchanged
+
+        app = make_app(directory, data)
+        refreshes = (data, parse(chunked(changed_body)))
+        app.apply_stations(data)
+
+        def update_changed(app: MetarMap = app, refreshes=refreshes, calls=count_up()):
+            # Alternating changes a tenth of the stations on every call
+            app.apply_stations(refreshes[next(calls) % 2])
+
+        yield f"update_changed[{count}]", {"stations": count}, update_changed
+
+    all_patterns = [
+        builder.build_led_patterns(d.flight_category, d.lightning, d.snowing, d.gusty)
+        for d in stations[max(STATION_COUNTS)]
+    ]
+    for name, controller_class in (
+        ("render", LEDController),
+        ("render_smooth", FadingLEDController),
+    ):
+        for num_leds in LED_COUNTS:
+            controller = controller_class(
+                num_leds=num_leds, strip=NullStrip(num_leds), autostart=False
+            )
+            controller.update_patterns(
+                {i: all_patterns[i % len(all_patterns)] for i in range(num_leds)}
+            )
+
+            def render(controller: LEDController = controller, frames=count_up()):
+                controller.step(now=next(frames) * FRAME_INTERVAL_S)
+
+            yield f"{name}[{num_leds}]", {"leds": num_leds}, render
+
+    for count, bodies in payloads.items():
+        app = make_app(directory, stations[count])
+        refreshes = (chunked(bodies[0]), chunked(bodies[1]))
+
+        def refresh(app: MetarMap = app, refreshes=refreshes, calls=count_up()):
+            call = next(calls)
+            decode_metar.cache_clear()
+            app.apply_stations(parse(refreshes[call % 2]))
+            app.controller.step(now=call * FRAME_INTERVAL_S)
+
+        yield f"pipeline[{count}]", {"stations": count}, refresh
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern: str, rounds: int) -> dict[str, Any]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, params, op in benchmarks(directory):
+            if pattern not in name:
+                continue
+            iterations, times = time_rounds(op, rounds)
+            result = {
+                "name": name,
+                "group": name.split("[")[0],
+                "params": params,
+                "rounds": rounds,
+                "iterations": iterations,
+                "min": min(times),
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+                "stddev": statistics.stdev(times) if rounds > 1 else 0.0,
+            }
+            results.append(result)
+            print(f"{name:>24}: {result['min'] * 1e3:10.3f} ms", file=sys.stderr)
+    return {
+        "commit": git_commit(),
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        # Seconds per call
+        "benchmarks": results,
+    }
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> int:
+    """Print each best round against the baseline; returns how many regressed."""
+    # The fastest round is the least disturbed by the rest of the machine
+    before = {b["name"]: b["min"] for b in baseline["benchmarks"]}
+    regressed = 0
+    print(f"against {baseline.get('commit') or 'baseline'}:", file=sys.stderr)
+    for result in report["benchmarks"]:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        change = result["min"] / old - 1
+        flag = ""
+        if change > tolerance:
+            regressed += 1
+            flag = "  REGRESSED"
+        print(f"{result['name']:>24}: {change:+8.1%}{flag}", file=sys.stderr)
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("-k", default="", help="only benchmarks named like this")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--compare", help="an earlier JSON report")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="slowdown that counts as a regression (default 0.15)",
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="regenerate the fixture and exit"
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture()
+        print(f"Wrote {FIXTURE}", file=sys.stderr)
+        sys.exit(0)
+    report = run(args.k, args.rounds)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        sys.exit(1 if compare(report, baseline, args.tolerance) else 0)
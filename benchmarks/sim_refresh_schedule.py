@@ -0,0 +1,201 @@
+"""
+Refresh schedule simulation: adaptive RefreshScheduler versus the fixed
+`refresh_time` baseline, on synthetic observation streams.
+
+Every station issues a routine METAR once an hour at its own minute, which
+the server publishes a few minutes later. A quarter of the stations have
+weather episodes of a few hours during which they are IFR and gusty and
+issue SPECIs every 10-30 minutes.
+
+Staleness is the time from an observation being published to the map first
+fetching it (or a newer one); it is reported as percentiles over every
+observation published during the run, separately for volatile episodes.
+The first SPECI of an episode at a station that looked stable waits for
+that station's routine check, which shows up in the volatile tail.
+
+    python benchmarks/sim_refresh_schedule.py
+"""
+
+import math
+import random
+import statistics
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from metar_map.client import MetarData, _parse_metar
+from metar_map.config import ScheduleConfig
+from metar_map.scheduler import RefreshScheduler
+
+NUM_STATIONS = 100
+BATCH_SIZE = 50
+REFRESH_TIME_S = 1800
+HOURS = 24
+STEP_S = 10.0
+SEED = 1
+WALL = 1_700_000_000
+
+
+@dataclass
+class Observation:
+    observed: float
+    published: float
+    speci: bool
+    volatile: bool
+
+
+@dataclass
+class Station:
+    icao: str
+    observations: list[Observation] = field(default_factory=list)
+    published: list[float] = field(default_factory=list)
+    # Index of the first observation the map hasn't fetched yet
+    unseen: int = 0
+
+    def latest(self, now: float) -> Optional[Observation]:
+        i = bisect_right(self.published, now)
+        return self.observations[i - 1] if i else None
+
+
+def make_stations(rng: random.Random) -> list[Station]:
+    duration = HOURS * 3600
+    stations = []
+    for index in range(NUM_STATIONS):
+        episodes: list[tuple[float, float]] = []
+        if index % 4 == 0:
+            start = rng.uniform(0, duration - 4 * 3600)
+            episodes.append((start, start + rng.uniform(2, 4) * 3600))
+        minute = rng.uniform(0, 3600)
+        observed = [(hour * 3600 + minute, False) for hour in range(-1, HOURS)]
+        for start, end in episodes:
+            t = start + rng.uniform(600, 1800)
+            while t < end:
+                observed.append((t, True))
+                t += rng.uniform(600, 1800)
+        observed.sort()
+
+        def in_episode(t: float) -> bool:
+            return any(start <= t < end for start, end in episodes)
+
+        station = Station(f"K{index:03d}")
+        for t, speci in observed:
+            published = t + rng.uniform(120, 480)
+            station.observations.append(
+                Observation(t, published, speci, speci or in_episode(t))
+            )
+        station.observations.sort(key=lambda o: o.published)
+        station.published = [o.published for o in station.observations]
+        stations.append(station)
+    return stations
+
+
+def to_metar(icao: str, observation: Observation) -> MetarData:
+    volatile = observation.volatile
+    raw: dict[str, Any] = {
+        "icaoId": icao,
+        "metarType": "SPECI" if observation.speci else "METAR",
+        "fltCat": "IFR" if volatile else "VFR",
+        "wgst": 30 if volatile else None,
+        "rawOb": f"{icao} 121651Z 18010KT 10SM 20/10 A3000",
+        "obsTime": int(WALL + observation.observed),
+    }
+    return _parse_metar(raw)
+
+
+def fetch(
+    stations: dict[str, Station], codes: list[str], now: float, delays: list[tuple]
+) -> list[MetarData]:
+    """Serve the latest published report and note how long each waited."""
+    results = []
+    for icao in codes:
+        station = stations[icao]
+        while (
+            station.unseen < len(station.observations)
+            and station.observations[station.unseen].published <= now
+        ):
+            observation = station.observations[station.unseen]
+            if observation.published >= 0:
+                delays.append((now - observation.published, observation.volatile))
+            station.unseen += 1
+        latest = station.latest(now)
+        if latest is not None:
+            results.append(to_metar(icao, latest))
+    return results
+
+
+def run(make_policy: Callable[[list[str]], Any]) -> tuple[int, list[tuple]]:
+    stations = {s.icao: s for s in make_stations(random.Random(SEED))}
+    delays: list[tuple] = []
+    requests, now = make_policy(list(stations))(stations, delays)
+    # Observations never fetched count as stale until the end of the run
+    for station in stations.values():
+        for observation in station.observations[station.unseen :]:
+            if 0 <= observation.published <= now:
+                delays.append((now - observation.published, observation.volatile))
+    return requests, delays
+
+
+def fixed(interval_s: float):
+    def make(codes: list[str]):
+        def simulate(stations: dict[str, Station], delays: list[tuple]):
+            requests = 0
+            now = 0.0
+            while now < HOURS * 3600:
+                fetch(stations, codes, now, delays)
+                requests += math.ceil(len(codes) / BATCH_SIZE)
+                now += interval_s
+            return requests, float(HOURS * 3600)
+
+        return simulate
+
+    return make
+
+
+def adaptive(settings: ScheduleConfig):
+    def make(codes: list[str]):
+        def simulate(stations: dict[str, Station], delays: list[tuple]):
+            scheduler = RefreshScheduler(
+                settings, REFRESH_TIME_S, BATCH_SIZE, stations=codes
+            )
+            now = 0.0
+            while now < HOURS * 3600:
+                due = scheduler.due(now)
+                if due:
+                    results = fetch(stations, due, now, delays)
+                    scheduler.record(due, results, now, WALL + now)
+                now = max(now + STEP_S, scheduler.next_due(now))
+            return scheduler.requests, float(HOURS * 3600)
+
+        return simulate
+
+    return make
+
+
+def percentiles(values: list[float]) -> str:
+    if len(values) < 2:
+        return "n/a"
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return (
+        f"p50 {q[49] / 60:5.1f}  p90 {q[89] / 60:5.1f}  "
+        f"p99 {q[98] / 60:5.1f}  max {max(values) / 60:5.1f} min"
+    )
+
+
+if __name__ == "__main__":
+    print(
+        f"{NUM_STATIONS} stations, {BATCH_SIZE} per request, "
+        f"refresh_time {REFRESH_TIME_S}s, {HOURS}h simulated"
+    )
+    policies = {
+        f"fixed {REFRESH_TIME_S}s": fixed(REFRESH_TIME_S),
+        "fixed 300s": fixed(300),
+        "adaptive 60/h": adaptive(ScheduleConfig(adaptive=True)),
+        "adaptive 6/h": adaptive(ScheduleConfig(adaptive=True, requests_per_hour=6)),
+    }
+    for name, policy in policies.items():
+        requests, delays = run(policy)
+        every = [d for d, _ in delays]
+        volatile = [d for d, v in delays if v]
+        print(f"{name:>14}: {requests:5d} requests ({requests / HOURS:5.1f}/h)")
+        print(f"{'all':>18}  {percentiles(every)}")
+        print(f"{'volatile':>18}  {percentiles(volatile)}")
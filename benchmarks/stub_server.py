@@ -0,0 +1,92 @@
+"""
+Local stand-in for the aviationweather.gov METAR endpoint used by the
+network benchmarks. Serves synthetic stations with injected latency.
+"""
+
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+
+def synthetic_station(index: int) -> dict[str, Any]:
+    icao = f"K{index:03d}" if index < 1000 else f"X{index:04d}"
+    return {
+        "icaoId": icao,
+        "name": f"{icao} Regional",
+        "metarType": "SPECI" if index % 7 == 0 else "METAR",
+        "fltCat": ("VFR", "MVFR", "IFR", "LIFR")[index % 4],
+        "lat": 30.0 + index % 20,
+        "lon": -120.0 + index % 50,
+        "wgst": 25 if index % 5 == 0 else None,
+        "rawOb": f"{icao} 121651Z 18010G25KT 10SM -TSRA BKN030 20/10 A3000 RMK LTG DSNT",
+        "snow": None,
+        "obsTime": 1_700_000_000 + index,
+    }
+
+
+class StubServer:
+    def __init__(self, latency_s: float = 0.0, latency_per_station_s: float = 0.0):
+        self.latency_s = latency_s
+        self.latency_per_station_s = latency_per_station_s
+        self.stations: dict[str, dict[str, Any]] = {}
+        self.request_count = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                ids = parse_qs(urlparse(self.path).query).get("ids", [""])[0]
+                ids = ids.split(",")
+                stub.request_count += 1
+                time.sleep(stub.latency_s + stub.latency_per_station_s * len(ids))
+                body = json.dumps(
+                    [stub.stations[i] for i in ids if i in stub.stations]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def add_stations(self, count: int) -> list[str]:
+        stations = [synthetic_station(i) for i in range(count)]
+        self.stations = {s["icaoId"]: s for s in stations}
+        return list(self.stations)
+
+    def write_config(self, extra: str = "") -> str:
+        path = Path(self._tmpdir.name) / "config.yaml"
+        path.write_text(f"""
+base_url: "{self.base_url}"
+endpoints:
+  metar: "/api/data/metar"
+logger:
+  log_file: "{Path(self._tmpdir.name) / 'metar_map.log'}"
+  console_level: "CRITICAL"
+{extra}
+""")
+        return str(path)
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any):
+        self._server.shutdown()
+        self._server.server_close()
+        self._tmpdir.cleanup()
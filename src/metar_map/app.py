@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import time
+from typing import Any, Iterable, Optional, Sequence
+
+import yaml
+
+from metar_map import tracing
+from metar_map.client import MetarClient, MetarData
+from metar_map.config import Config, get_config
+from metar_map.led_backends import BACKENDS, FrameRecorder
+from metar_map.led_channels import create_strip
+from metar_map.led_controller import LEDController
+from metar_map.led_fade import FadingLEDController
+from metar_map.logger import Logger
+from metar_map.metrics import MetricsServer, MetricsWriter
+from metar_map.pattern_builder import LEDPattern, LEDPatternBuilder
+from metar_map.runtime import Runtime
+from metar_map.station_diff import DiffCounts, StationDiff
+from metar_map.station_store import StationStore
+
+# Settings that take effect without a restart
+RELOADABLE_SETTINGS = (
+    "brightness",
+    "led_patterns",
+    "icao_codes",
+    "refresh_time",
+    "stale_after",
+)
+
+
+# Placeholder for LEDs without a station
+UNUSED_LED = "-"
+
+
+def _led_map(icao_codes: Sequence[str]) -> dict[int, str]:
+    return {
+        i: code.strip()
+        for i, code in enumerate(icao_codes)
+        if code.strip() not in ("", UNUSED_LED)
+    }
+
+
+class MetarMap:
+    """
+    Keeps the LED controller's pattern table in step with the METAR data
+    for the configured stations, and applies config changes in place.
+    Runtime drives the refreshes and reloads.
+    """
+
+    def __init__(self, config: Config, strip: Optional[Any] = None):
+        self.config = config
+        self.logger = Logger(config=config, name="app")
+        self.client = MetarClient(config=config)
+        self.builder = LEDPatternBuilder(config=config)
+        num_leds = len(config.icao_codes)
+        if strip is None:
+            strip = create_strip(
+                config.strip,
+                num_leds,
+                config.brightness,
+                BACKENDS[config.strip.backend],
+            )
+            if config.strip.record_file:
+                strip = FrameRecorder(
+                    config.strip.record_file,
+                    num_leds,
+                    strip,
+                    max_bytes=config.strip.record_max_bytes,
+                    backup_count=config.strip.record_backup_count,
+                )
+        if config.strip.smooth:
+            self.controller: LEDController = FadingLEDController(
+                num_leds=num_leds,
+                brightness=config.brightness,
+                strip=strip,
+                gamma=config.strip.gamma,
+                fps=config.strip.fps,
+            )
+        else:
+            self.controller = LEDController(
+                num_leds=num_leds, brightness=config.brightness, strip=strip
+            )
+        self._led_map = _led_map(config.icao_codes)
+        # Latest data per station; stations missing from a refresh keep theirs
+        # until it is `stale_after` old
+        self._stations = StationStore()
+        self._stale: set[str] = set()
+        self._led_patterns: dict[int, Sequence[LEDPattern]] = {}
+        self._diff = StationDiff()
+        self.last_refresh: Optional[float] = None
+        self.last_diff = DiffCounts()
+
+    def station_codes(self) -> list[str]:
+        """Every mapped station, once each."""
+        return list(dict.fromkeys(self._led_map.values()))
+
+    def fetch(self, codes: Optional[Sequence[str]] = None) -> list[MetarData]:
+        """Fetch `codes` (every mapped station by default). Blocks on the network."""
+        if codes is None:
+            codes = self.station_codes()
+        return [d for d in self.client.iter_metar(list(codes)) if d.icao]
+
+    def apply_stations(
+        self,
+        stations: Iterable[MetarData],
+        requested: Optional[Iterable[str]] = None,
+    ) -> DiffCounts:
+        """
+        Record the stations fetched for `requested` (every mapped station by
+        default) and publish new patterns for the LEDs whose display changed,
+        including stations that have gone stale.
+        """
+        counts = self._apply(stations, requested, fetched_at=time.time())
+        self.last_refresh = time.monotonic()
+        self.logger.info(
+            "Stations changed: %d unchanged: %d missing: %d stale: %d",
+            counts.changed,
+            counts.unchanged,
+            counts.missing,
+            len(self._stale),
+        )
+        return counts
+
+    def warm_start(self) -> int:
+        """
+        Show the stations saved in the METAR cache by the last run, so the map
+        lights up before the first fetch completes. Returns how many there were.
+        """
+        cached = [
+            data
+            for data in map(self.client.cache.get, self.station_codes())
+            if data is not None
+        ]
+        if cached:
+            self._apply(cached, requested=(), fetched_at=None)
+            self.logger.info("Showing %d stations from the cache", len(cached))
+        return len(cached)
+
+    def _apply(
+        self,
+        stations: Iterable[MetarData],
+        requested: Optional[Iterable[str]],
+        fetched_at: Optional[float],
+    ) -> DiffCounts:
+        stations = list(stations)
+        changed, counts = self._diff.update(
+            stations, self.station_codes() if requested is None else requested
+        )
+        self._stations.update(stations, fetched_at)
+        self.last_diff = counts
+        leds = {i for i, icao in self._led_map.items() if icao in changed}
+        self._publish(leds | self._check_stale())
+        return counts
+
+    def _check_stale(self) -> set[int]:
+        """Update which stations are stale; returns the LEDs of those that flipped."""
+        stale: set[str] = set()
+        if self.config.stale_after_s:
+            stale = self._stations.stale(
+                self._led_map.values(), self.config.stale_after_s
+            )
+        if stale - self._stale:
+            self.logger.warning(
+                "No data newer than %ds for %s",
+                self.config.stale_after_s,
+                ", ".join(sorted(stale - self._stale)),
+            )
+        flipped = stale ^ self._stale
+        self._stale = stale
+        return {i for i, icao in self._led_map.items() if icao in flipped}
+
+    def _publish(self, leds: set[int]):
+        if leds:
+            self._update_leds(sorted(leds))
+            self.controller.update_leds(
+                {i: self._led_patterns.get(i, ()) for i in leds}
+            )
+
+    def refresh(self):
+        """Fetch every mapped station and publish the resulting pattern table."""
+        self.apply_stations(self.fetch())
+
+    def health(self) -> dict[str, Any]:
+        """A snapshot of counters for the periodic health report."""
+        now = time.monotonic()
+        return {
+            "stations": len(self._stations),
+            "last_refresh_s": (
+                None if self.last_refresh is None else round(now - self.last_refresh, 1)
+            ),
+            "requests": self.client.request_count,
+            "retries": self.client.retry_count,
+            "render_wakeups": self.controller.wakeups,
+            "changed": self.last_diff.changed,
+            "unchanged": self.last_diff.unchanged,
+            "missing": self.last_diff.missing,
+            "stale": len(self._stale),
+        }
+
+    def metrics_text(self) -> str:
+        """Render and fetch counters in the Prometheus text format."""
+        client, cache, controller = self.client, self.client.cache, self.controller
+        metrics = MetricsWriter()
+        metrics.histogram(
+            "frame_seconds", "Render thread frame step time", controller.frame_times
+        )
+        metrics.counter(
+            "render_wakeups_total", "Render thread wakeups", controller.wakeups
+        )
+        metrics.counter(
+            "strip_shows_total", "Frames pushed to the strip", controller.shows
+        )
+        metrics.histogram("fetch_seconds", "Time to fetch METARs", client.fetch_times)
+        metrics.counter("fetch_requests_total", "HTTP requests", client.request_count)
+        metrics.counter("fetch_retries_total", "HTTP retries", client.retry_count)
+        metrics.counter("fetch_errors_total", "Failed batches", client.error_count)
+        metrics.counter(
+            "fetch_bytes_total", "Response body bytes", client.bytes_received
+        )
+        metrics.counter(
+            "fetch_stations_total", "Station records received", client.stations_received
+        )
+        metrics.counter("cache_hits_total", "Unchanged station records", cache.hits)
+        metrics.counter("cache_misses_total", "New station records", cache.misses)
+        metrics.counter(
+            "cache_bytes_saved_total",
+            "Bytes not resent thanks to ETags",
+            cache.bytes_saved,
+        )
+        metrics.gauge("stations", "Stations with data", len(self._stations))
+        metrics.gauge("stations_stale", "Stations showing STALE", len(self._stale))
+        for state in ("changed", "unchanged", "missing"):
+            metrics.gauge(
+                "refresh_stations",
+                "Stations in the last refresh by display change",
+                getattr(self.last_diff, state),
+                {"state": state},
+            )
+        metrics.gauge(
+            "last_refresh_age_seconds",
+            "Seconds since the last refresh",
+            None if self.last_refresh is None else time.monotonic() - self.last_refresh,
+        )
+        return metrics.text()
+
+    def _update_leds(self, led_indices: Iterable[int]):
+        # Checked once per pass; the per-LED debug lines are the bulk of a refresh
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        for led_index in led_indices:
+            icao = self._led_map[led_index]
+            data = self._stations.get(icao)
+            if debug:
+                self.logger.debug("----------------------------------------")
+                self.logger.debug("LED Index: %d ICAO: %s", led_index, icao)
+            if not data:
+                self.logger.warning("No METAR data for `%s`. Skipping...", icao)
+                continue
+            stale_patterns = (
+                self.builder.build_stale_patterns() if icao in self._stale else None
+            )
+            if stale_patterns is not None:
+                patterns = stale_patterns
+            elif data.flight_category is None:
+                self.logger.warning(
+                    "Flight category for `%s` was None. Skipping...", data.icao
+                )
+                continue
+            else:
+                patterns = self.builder.build_led_patterns(
+                    flight_category=data.flight_category,
+                    lightning=data.lightning,
+                    snow=data.snowing,
+                    gusts=data.gusty,
+                )
+            self._led_patterns[led_index] = patterns
+            if debug:
+                self.logger.debug("ICAO: %s", data.icao)
+                self.logger.debug("Flight Category: %s", data.flight_category)
+                for pattern in patterns:
+                    self.logger.debug("%s", pattern)
+
+    def reload_config(self):
+        """Re-read the config file and apply it, keeping the old one if invalid."""
+        try:
+            config = get_config(config_path=self.config.path)
+            self.apply_config(config)
+        except (ValueError, yaml.YAMLError, OSError) as e:
+            # Also a file caught mid-save by an editor, or briefly missing
+            self.logger.error("Ignoring invalid config `%s`: %s", self.config.path, e)
+
+    def apply_config(self, config: Config):
+        """
+        Apply only what changed between the running config and `config`.
+        Raises ValueError, changing nothing, if its LED patterns are invalid.
+        """
+        builder = self.builder
+        if config.led_patterns != self.config.led_patterns:
+            builder = LEDPatternBuilder(config=config)
+        old, self.config = self.config, config
+        if config.brightness != old.brightness:
+            self.logger.info("Brightness changed to %s", config.brightness)
+            self.controller.set_brightness(config.brightness)
+
+        changed_leds: set[int] = set()
+        if config.led_patterns != old.led_patterns:
+            self.logger.info("LED patterns changed; recompiling")
+            self.builder = builder
+            changed_leds.update(self._led_map)
+
+        if config.icao_codes != old.icao_codes:
+            if len(config.icao_codes) != len(old.icao_codes):
+                self.logger.warning(
+                    "The number of LEDs changed; restart to resize the strip"
+                )
+            led_map = {
+                i: code
+                for i, code in _led_map(config.icao_codes).items()
+                if i < self.controller.num_leds
+            }
+            remapped = {
+                i
+                for i in set(led_map) | set(self._led_map)
+                if led_map.get(i) != self._led_map.get(i)
+            }
+            self.logger.info("Station list changed for LEDs %s", sorted(remapped))
+            self._led_map = led_map
+            for led_index in remapped:
+                self._led_patterns.pop(led_index, None)
+            new_codes = [
+                code
+                for code in dict.fromkeys(led_map[i] for i in remapped if i in led_map)
+                if code not in self._stations
+            ]
+            if new_codes:
+                fetched = list(self.client.iter_metar(new_codes))
+                self._diff.update(fetched, new_codes)
+                self._stations.update(fetched, time.time())
+            changed_leds.update(i for i in remapped if i in led_map)
+
+        changed_leds.update(self._check_stale())
+
+        if changed_leds:
+            self._update_leds(sorted(changed_leds))
+        if changed_leds or config.icao_codes != old.icao_codes:
+            self.controller.update_patterns(self._led_patterns)
+
+        restart_needed = [
+            key
+            for key in set(config.raw) | set(old.raw)
+            if key not in RELOADABLE_SETTINGS
+            and config.raw.get(key) != old.raw.get(key)
+        ]
+        if restart_needed:
+            self.logger.warning(
+                "Restart to apply changes to: %s", ", ".join(sorted(restart_needed))
+            )
+
+
+def main():
+    app = MetarMap(get_config())
+    app.logger.info(
+        "Metar Map started up with the following settings:\n%s", app.config.raw
+    )
+    metrics = app.config.metrics
+    server = None
+    if metrics.enabled:
+        server = MetricsServer(app.metrics_text, metrics.host, metrics.port)
+        server.start()
+        app.logger.info("Serving metrics on %s:%d", metrics.host, server.port)
+    if tracing.start(app.config.tracing) is not None:
+        app.logger.info("Writing trace spans to %s", app.config.tracing.file)
+    app.warm_start()
+    try:
+        asyncio.run(Runtime(app).run())
+    finally:
+        tracing.stop()
+        if server is not None:
+            server.stop()
@@ -1,12 +1,27 @@
-from dataclasses import dataclass
-from typing import Optional
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from math import isnan
+from typing import Any, Iterable, Iterator, Mapping, Optional
+import json
+import os
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 
+from metar_map import tracing
 from metar_map.logger import Logger
-from metar_map.config import load_config
+from metar_map.config import Config, get_config
+from metar_map.json_stream import iter_json_array
+from metar_map.metar_decode import DecodedMetar, decode_metar
+from metar_map.metrics import FETCH_BUCKETS_S, Histogram
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MetarData:
     icao: Optional[str]
     name: Optional[str]
@@ -17,50 +32,501 @@ class MetarData:
     wind_gust: Optional[int]
     raw: Optional[str]
     snow: Optional[float]
+    observation_time: Optional[int] = None
+    # Decoded from `raw` and display flags, derived once when the record is
+    # created
+    decoded: Optional[DecodedMetar] = field(init=False, compare=False, repr=False)
+    lightning: bool = field(init=False, compare=False)
+    snowing: bool = field(init=False, compare=False)
+    gusty: bool = field(init=False, compare=False)
 
-    @property
-    def lightning(self) -> bool:
-        return self.raw is not None and "LTG" in self.raw.upper()
+    def __post_init__(self):
+        decoded = decode_metar(self.raw) if self.raw else None
+        object.__setattr__(self, "decoded", decoded)
+        if decoded is None:
+            object.__setattr__(self, "lightning", False)
+            object.__setattr__(self, "snowing", bool(self.snow))
+            object.__setattr__(self, "gusty", bool(self.wind_gust))
+            return
+        if self.flight_category is None:
+            # The server leaves fltCat out for some stations
+            object.__setattr__(self, "flight_category", decoded.flight_category)
+        object.__setattr__(self, "lightning", decoded.lightning)
+        object.__setattr__(self, "snowing", bool(self.snow) or decoded.snow)
+        object.__setattr__(
+            self, "gusty", bool(self.wind_gust) or bool(decoded.wind_gust_kt)
+        )
+
+
+# Constructor fields of MetarData, in order; the derived flags are excluded
+METAR_FIELDS = tuple(f.name for f in fields(MetarData) if f.init)
+
+NAN = float("nan")
+
+
+def _whole(value: float) -> Optional[float]:
+    """A numeric column value as it was given: None for NaN, whole numbers as int."""
+    if isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class MetarBatch:
+    """
+    Columnar store for many stations: one sequence per field plus an ICAO to
+    row index. Numeric columns are float arrays with NaN standing in for None
+    (JSON numbers may be ints or floats, and 0 is a valid value).
+    """
+
+    def __init__(self):
+        self.rows: dict[str, int] = {}
+        self.icao: list[str] = []
+        self.name: list[Optional[str]] = []
+        self.metar_type: list[Optional[str]] = []
+        self.flight_category: list[Optional[str]] = []
+        self.raw: list[Optional[str]] = []
+        self.latitude = array("d")
+        self.longitude = array("d")
+        self.snow = array("d")
+        self.wind_gust = array("d")
+        # Epoch seconds are exact in a double
+        self.observation_time = array("d")
+        self.lightning = bytearray()
+        self.snowing = bytearray()
+        self.gusty = bytearray()
+
+    @classmethod
+    def from_records(cls, records: Iterable[MetarData]) -> "MetarBatch":
+        batch = cls()
+        for data in records:
+            batch.append(data)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.icao)
+
+    def __contains__(self, icao: object) -> bool:
+        return icao in self.rows
+
+    def append(self, data: MetarData):
+        """Add a station, replacing any earlier row for the same ICAO."""
+        if not data.icao:
+            return
+        row = self.rows.get(data.icao)
+        if row is not None:
+            self._set_row(row, data)
+            return
+        self.rows[data.icao] = len(self.icao)
+        self.icao.append(data.icao)
+        self.name.append(data.name)
+        self.metar_type.append(data.metar_type)
+        self.flight_category.append(data.flight_category)
+        self.raw.append(data.raw)
+        self.latitude.append(NAN if data.latitude is None else data.latitude)
+        self.longitude.append(NAN if data.longitude is None else data.longitude)
+        self.snow.append(NAN if data.snow is None else data.snow)
+        self.wind_gust.append(NAN if data.wind_gust is None else data.wind_gust)
+        self.observation_time.append(
+            NAN if data.observation_time is None else data.observation_time
+        )
+        self.lightning.append(data.lightning)
+        self.snowing.append(data.snowing)
+        self.gusty.append(data.gusty)
+
+    def _set_row(self, row: int, data: MetarData):
+        self.name[row] = data.name
+        self.metar_type[row] = data.metar_type
+        self.flight_category[row] = data.flight_category
+        self.raw[row] = data.raw
+        self.latitude[row] = NAN if data.latitude is None else data.latitude
+        self.longitude[row] = NAN if data.longitude is None else data.longitude
+        self.snow[row] = NAN if data.snow is None else data.snow
+        self.wind_gust[row] = NAN if data.wind_gust is None else data.wind_gust
+        self.observation_time[row] = (
+            NAN if data.observation_time is None else data.observation_time
+        )
+        self.lightning[row] = data.lightning
+        self.snowing[row] = data.snowing
+        self.gusty[row] = data.gusty
+
+    def get(self, icao: str) -> Optional[MetarData]:
+        """Rebuild the MetarData record for `icao`, if present."""
+        row = self.rows.get(icao)
+        if row is None:
+            return None
+        snow = self.snow[row]
+        return MetarData(
+            icao=self.icao[row],
+            name=self.name[row],
+            metar_type=self.metar_type[row],
+            flight_category=self.flight_category[row],
+            latitude=None if isnan(self.latitude[row]) else self.latitude[row],
+            longitude=None if isnan(self.longitude[row]) else self.longitude[row],
+            wind_gust=_whole(self.wind_gust[row]),  # type: ignore[arg-type]
+            raw=self.raw[row],
+            snow=None if isnan(snow) else snow,
+            observation_time=_whole(  # type: ignore[arg-type]
+                self.observation_time[row]
+            ),
+        )
+
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _retry_after_s(response: requests.Response) -> Optional[float]:
+    """Seconds requested by a `Retry-After` header, if any."""
+    value = response.headers.get("Retry-After")
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _close_response(future: "Future[requests.Response]"):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _parse_metar(item: dict[str, Any]) -> MetarData:
+    return MetarData(
+        icao=item.get("icaoId"),
+        name=item.get("name"),
+        metar_type=item.get("metarType"),
+        flight_category=item.get("fltCat"),
+        latitude=item.get("lat"),
+        longitude=item.get("lon"),
+        wind_gust=item.get("wgst"),
+        raw=item.get("rawOb"),
+        snow=item.get("snow"),
+        observation_time=item.get("obsTime"),
+    )
+
+
+class MetarCache:
+    """
+    Remembers the HTTP validators of the last response for each query and the
+    last observation for each station, optionally persisted to a JSON file so
+    a restart does not start cold. Validators for a query that hasn't been
+    asked for in `query_ttl_s` are dropped; with adaptive scheduling most
+    station lists are never requested twice.
+    """
+
+    def __init__(self, path: Optional[str] = None, query_ttl_s: float = 3600.0):
+        self.path = Path(path) if path else None
+        self.query_ttl_s = query_ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        # query -> {"etag", "last_modified", "size", "icaos", "used"}
+        self._queries: dict[str, dict[str, Any]] = {}
+        self._stations: dict[str, MetarData] = {}
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.is_file():
+            return
+        try:
+            snapshot = json.loads(self.path.read_text(encoding="utf-8"))
+            self._queries = snapshot.get("queries", {})
+            self._stations = {
+                icao: MetarData(**fields)
+                for icao, fields in snapshot.get("stations", {}).items()
+            }
+        except (ValueError, TypeError, AttributeError):
+            # A corrupt cache only costs one full fetch
+            self._queries = {}
+            self._stations = {}
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        snapshot = {
+            "queries": self._queries,
+            "stations": {
+                icao: {name: getattr(data, name) for name in METAR_FIELDS}
+                for icao, data in self._stations.items()
+            },
+        }
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def get(self, icao: str) -> Optional[MetarData]:
+        return self._stations.get(icao)
+
+    def conditional_headers(self, query: str) -> dict[str, str]:
+        entry = self._queries.get(query)
+        if entry is None:
+            return {}
+        entry["used"] = time.time()
+        headers: dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, query: str) -> list[MetarData]:
+        """Serve a 304 response for `query` from the cache."""
+        entry = self._queries.get(query, {})
+        payload = [
+            self._stations[icao]
+            for icao in entry.get("icaos", [])
+            if icao in self._stations
+        ]
+        self.hits += len(payload)
+        self.bytes_saved += entry.get("size", 0)
+        return payload
+
+    def record(self, data: MetarData) -> MetarData:
+        """
+        Record one freshly parsed station. If its observation is unchanged the
+        cached object is returned instead.
+        """
+        cached = self._stations.get(data.icao) if data.icao else None
+        if (
+            cached is not None
+            and cached.observation_time == data.observation_time
+            and cached.raw == data.raw
+        ):
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if data.icao:
+            self._stations[data.icao] = data
+        return data
+
+    def store_query(
+        self, query: str, headers: Mapping[str, Any], size: int, icaos: list[str]
+    ):
+        """Remember the validators of a complete response to `query`."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        now = time.time()
+        self._queries[query] = {
+            "etag": etag if isinstance(etag, str) else None,
+            "last_modified": last_modified if isinstance(last_modified, str) else None,
+            "size": size,
+            "icaos": icaos,
+            "used": now,
+        }
+        self._prune_queries(now)
+
+    def _prune_queries(self, now: float):
+        oldest = now - self.query_ttl_s
+        for query, entry in list(self._queries.items()):
+            # Entries saved before `used` was kept get one more ttl
+            if entry.setdefault("used", now) < oldest:
+                del self._queries[query]
 
 
 class MetarClient:
     """Client for gathering weather data from a METAR station."""
 
-    def __init__(self, config_path: Optional[str] = None):
-        config = load_config(config_path=config_path)
-        self.base_url: str = config.get("base_url", "")
-        self.metar_endpoint: str = config.get("endpoints", {}).get("metar", "")
-        self._logger = Logger()
+    def __init__(
+        self, config_path: Optional[str] = None, config: Optional[Config] = None
+    ):
+        if config is None:
+            config = get_config(config_path=config_path)
+        self.base_url: str = config.base_url
+        self.metar_endpoint: str = config.metar_endpoint
+        self.batch_size: int = config.fetch.batch_size
+        self.max_workers: int = config.fetch.max_workers
+        self.timeout_s: float = config.fetch.timeout_s
+        self.retries: int = config.fetch.retries
+        self.backoff_s: float = config.fetch.backoff_s
+        self.max_backoff_s: float = config.fetch.max_backoff_s
+        # Retries stop once a fetch has run this long, and never outlast a refresh
+        self.retry_budget_s: float = min(
+            config.fetch.retry_budget_s, float(config.refresh_time)
+        )
+        # Twice the longest a station waits, so a late full refresh still hits
+        self.cache = MetarCache(
+            path=config.cache_file, query_ttl_s=2.0 * config.refresh_time
+        )
 
-    def get_metar(self, ids: list[str]) -> list[MetarData]:
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, self.max_workers))
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._adapter = adapter
+
+        self._stats_lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+        # Batches that failed, response body bytes, stations parsed, and the
+        # duration of each iter_metar call
+        self.error_count = 0
+        self.bytes_received = 0
+        self.stations_received = 0
+        self.fetch_times = Histogram(FETCH_BUCKETS_S)
+        self._logger = Logger(config=config, name="client")
+
+    def connection_stats(self) -> dict[str, int]:
+        """Connections opened versus requests sent through the session's pools."""
+        connections = requests_sent = 0
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+        return {
+            "connections": connections,
+            "requests": requests_sent,
+            "reused": requests_sent - connections,
+        }
+
+    def _backoff_s(self, attempt: int) -> float:
+        # Full jitter: anywhere up to the exponential ceiling
+        return random.uniform(0, min(self.max_backoff_s, self.backoff_s * (2**attempt)))
+
+    def _request(self, ids_param: str, deadline: float) -> requests.Response:
         """
-        Fetch METAR data for the given station IDs.
+        GET one batch, retrying throttled/5xx responses, timeouts and
+        connection errors with jittered exponential backoff (or the server's
+        `Retry-After`) until `retries` or the `deadline` runs out.
         """
-        try:
-            ids_param = ",".join(ids)
-            url = f"{self.base_url}{self.metar_endpoint}?ids={ids_param}&format=json"
-            self._logger.debug(f"Making request for metar data with url `{url}`")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            payload = [
-                MetarData(
-                    icao=item.get("icaoId"),
-                    name=item.get("name"),
-                    metar_type=item.get("metarType"),
-                    flight_category=item.get("fltCat"),
-                    latitude=item.get("lat"),
-                    longitude=item.get("lon"),
-                    wind_gust=item.get("wgst"),
-                    raw=item.get("rawOb"),
-                    snow=item.get("snow"),
+        url = f"{self.base_url}{self.metar_endpoint}?ids={ids_param}&format=json"
+        attempt = 0
+        while True:
+            self._logger.debug("Making request for metar data with url `%s`", url)
+            with self._stats_lock:
+                self.request_count += 1
+            try:
+                with tracing.span("request"):
+                    response = self._session.get(
+                        url,
+                        headers=self.cache.conditional_headers(ids_param),
+                        timeout=self.timeout_s,
+                        stream=True,
+                    )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retries:
+                    raise
+                delay = self._backoff_s(attempt)
+                if time.monotonic() + delay > deadline:
+                    raise
+                self._logger.warning("Retrying `%s` in %.1fs: %s", ids_param, delay, e)
+            else:
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt >= self.retries
+                ):
+                    return response
+                delay = _retry_after_s(response)
+                if delay is None:
+                    delay = self._backoff_s(attempt)
+                if time.monotonic() + delay > deadline:
+                    return response
+                response.close()
+                self._logger.warning(
+                    "Retrying `%s` in %.1fs: HTTP %s",
+                    ids_param,
+                    delay,
+                    response.status_code,
                 )
-                for item in response.json()
+            attempt += 1
+            with self._stats_lock:
+                self.retry_count += 1
+            time.sleep(delay)
+
+    def _iter_response(
+        self, ids_param: str, response: requests.Response
+    ) -> Iterator[MetarData]:
+        if response.status_code == 304:
+            self._logger.debug("METAR data unchanged for `%s`", ids_param)
+            yield from self.cache.not_modified(ids_param)
+            return
+        response.raise_for_status()
+
+        size = 0
+        icaos: list[str] = []
+
+        def chunks() -> Iterator[bytes]:
+            nonlocal size
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                size += len(chunk)
+                yield chunk
+
+        for item in iter_json_array(chunks()):
+            data = self.cache.record(_parse_metar(item))
+            if data.icao:
+                icaos.append(data.icao)
+            yield data
+        self.bytes_received += size
+        self.cache.store_query(ids_param, response.headers, size, icaos)
+
+    def iter_metar(self, ids: list[str]) -> Iterator[MetarData]:
+        """
+        Fetch METAR data for the given station IDs, yielding each station as
+        soon as it is parsed from the response stream.
+
+        IDs are requested in batches of `batch_size`, up to `max_workers` at a
+        time, with retries bounded by `retry_budget_s`. A batch that still
+        fails is logged and left out of the result.
+        """
+        queries = [
+            ",".join(ids[i : i + self.batch_size])
+            for i in range(0, len(ids), max(1, self.batch_size))
+        ]
+        start = time.monotonic()
+        deadline = start + self.retry_budget_s
+        count = 0
+        with (
+            tracing.span("fetch"),
+            ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(queries)))
+            ) as executor,
+        ):
+            futures = [
+                executor.submit(self._request, query, deadline) for query in queries
             ]
-            self._logger.debug(f"Payload: {payload}")
-            return payload
-        except Exception as e:
-            self._logger.error(f"An error occurred querying for metar data: {e}")
-            return []
+            try:
+                # Responses are parsed on this thread, in request order
+                for query, future in zip(queries, futures):
+                    try:
+                        response = future.result()
+                        # Streams the body as it parses
+                        with tracing.span("parse"):
+                            for data in self._iter_response(query, response):
+                                count += 1
+                                yield data
+                    except Exception as e:
+                        self.error_count += 1
+                        self._logger.error(
+                            "An error occurred querying for metar data `%s`: %s",
+                            query,
+                            e,
+                        )
+            finally:
+                for future in futures:
+                    future.add_done_callback(_close_response)
+                try:
+                    self.cache.save()
+                except OSError as e:
+                    self._logger.error("Unable to save METAR cache: %s", e)
+                self.stations_received += count
+                self.fetch_times.observe(time.monotonic() - start)
+        self._logger.debug("Received %d METAR records", count)
+
+    def get_metar(self, ids: list[str]) -> list[MetarData]:
+        """
+        Fetch METAR data for the given station IDs.
+        """
+        payload = list(self.iter_metar(ids))
+        # The repr of every station is only built if debug output is enabled
+        self._logger.debug("Payload: %s", payload)
+        return payload
 
 
 if __name__ == "__main__":
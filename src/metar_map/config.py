@@ -1,14 +1,368 @@
+from dataclasses import dataclass, field
 from importlib import resources
-from typing import Any, Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 import os
+import threading
 
 import yaml
 
+from metar_map.led_backends import BACKENDS
 
-def load_config(config_path: Optional[str] = None) -> dict[str, Any]:
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader  # type: ignore
+
+
+@dataclass(frozen=True)
+class RotationConfig:
+    type: str = "timed"
+    when: str = "midnight"
+    interval: int = 1
+    # Defaults to 7 for timed rotation and 5 for size rotation
+    backup_count: Optional[int] = None
+    max_bytes: int = 1_000_000
+
+
+@dataclass(frozen=True)
+class LoggerConfig:
+    log_file: str = "logs/metar_map.log"
+    console_level: str = "INFO"
+    file_level: str = "DEBUG"
+    # Hand records to a background thread for console/file output
+    queue: bool = False
+    rotation: RotationConfig = field(default_factory=RotationConfig)
+
+
+@dataclass(frozen=True)
+class FetchConfig:
+    batch_size: int = 100
+    max_workers: int = 4
+    timeout_s: float = 10.0
+    retries: int = 3
+    backoff_s: float = 1.0
+    max_backoff_s: float = 30.0
+    retry_budget_s: float = 120.0
+
+
+@dataclass(frozen=True)
+class ScheduleConfig:
+    # Refetch stations as their data goes stale instead of all of them
+    # every refresh_time
+    adaptive: bool = False
+    requests_per_hour: int = 60
+    # Between checks of SPECI, thunderstorm, gusty or marginal stations
+    volatile_interval_s: float = 300.0
+    # How long after the hourly METAR is expected to look for it
+    publish_delay_s: float = 120.0
+
+
+@dataclass(frozen=True)
+class ChannelConfig:
+    """One LED data line: a GPIO pin (a `board` attribute) and its LED count."""
+
+    pin: str = "D18"
+    count: int = 0
+
+
+@dataclass(frozen=True)
+class StripConfig:
+    # Empty means a single channel on D18 sized to icao_codes
+    channels: tuple[ChannelConfig, ...] = ()
+    # Physical LED (counted across channels in order) for each icao_codes
+    # entry; empty means LED i is physical LED i
+    index_map: tuple[int, ...] = ()
+    # "neopixel" or "simulator" (in memory, for running without LEDs)
+    backend: str = "neopixel"
+    # Where to record every shown frame, if anywhere, starting a new file
+    # (keeping `record_backup_count` old ones) on startup and every
+    # `record_max_bytes`
+    record_file: Optional[str] = None
+    record_max_bytes: int = 50_000_000
+    record_backup_count: int = 3
+    # Fade blinks and pattern changes (see led_patterns `fade`), rendering at
+    # `fps` while fading, with gamma-corrected output
+    smooth: bool = False
+    gamma: float = 2.2
+    fps: float = 60.0
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    """An HTTP endpoint serving performance counters in Prometheus format."""
+
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9110
+
+
+@dataclass(frozen=True)
+class TracingConfig:
+    """Chrome trace-event spans around the refresh and render hot paths."""
+
+    enabled: bool = False
+    file: str = "logs/trace.json"
+    max_bytes: int = 10_000_000
+    backup_count: int = 3
+    # Trace one render frame in every `frame_sample`
+    frame_sample: int = 60
+    # SIGUSR1 saves a profile of this many seconds to `profile_dir`
+    profile_s: float = 30.0
+    profile_dir: str = "logs"
+
+
+@dataclass(frozen=True)
+class Config:
+    """Validated, read-only view of config.yaml."""
+
+    path: str
+    base_url: str = ""
+    endpoints: Mapping[str, str] = field(default_factory=dict)
+    logger: LoggerConfig = field(default_factory=LoggerConfig)
+    fetch: FetchConfig = field(default_factory=FetchConfig)
+    schedule: ScheduleConfig = field(default_factory=ScheduleConfig)
+    strip: StripConfig = field(default_factory=StripConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    cache_file: Optional[str] = None
+    icao_codes: tuple[str, ...] = ()
+    refresh_time: int = 1800
+    # Stations with older data show the STALE pattern; 0 turns this off
+    stale_after_s: int = 7200
+    brightness: float = 0.15
+    led_patterns: Mapping[str, Any] = field(default_factory=dict)
+    # The document as loaded, for settings without a typed field
+    raw: Mapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def metar_endpoint(self) -> str:
+        return self.endpoints.get("metar", "")
+
+
+def _section(raw: Mapping[str, Any], key: str) -> Mapping[str, Any]:
+    value = raw.get(key)
+    if value is None:
+        return {}
+    if not isinstance(value, Mapping):
+        raise ValueError(f"Config `{key}` must be a mapping")
+    return value
+
+
+def _number(
+    section: Mapping[str, Any],
+    key: str,
+    default: Any,
+    kind: type = float,
+    minimum: Optional[float] = None,
+    maximum: Optional[float] = None,
+) -> Any:
+    value = section.get(key, default)
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Config `{key}` must be a number, got `{value}`") from None
+    if (minimum is not None and value < minimum) or (
+        maximum is not None and value > maximum
+    ):
+        raise ValueError(f"Config `{key}` is out of range: {value}")
+    return value
+
+
+def _parse_strip(raw: Mapping[str, Any], num_leds: int) -> StripConfig:
+    strip = _section(raw, "strip")
+    channels = []
+    for channel in strip.get("channels") or ():
+        if not isinstance(channel, Mapping):
+            raise ValueError("Config `strip.channels` entries must be mappings")
+        channels.append(
+            ChannelConfig(
+                pin=str(channel.get("pin", ChannelConfig.pin)),
+                count=_number(channel, "count", 0, int, minimum=1),
+            )
+        )
+    total = sum(c.count for c in channels) if channels else num_leds
+    index_map = tuple(
+        _number({"index_map": i}, "index_map", 0, int, 0, total - 1)
+        for i in strip.get("index_map") or ()
+    )
+    if index_map and len(index_map) != num_leds:
+        raise ValueError(
+            f"Config `strip.index_map` has {len(index_map)} entries "
+            f"for {num_leds} icao_codes"
+        )
+    if len(set(index_map)) != len(index_map):
+        raise ValueError("Config `strip.index_map` maps two LEDs to one pixel")
+    if not index_map and total < num_leds:
+        raise ValueError(
+            f"Config `strip.channels` have {total} LEDs for {num_leds} icao_codes"
+        )
+    backend = str(strip.get("backend", StripConfig.backend)).lower()
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Config `strip.backend` must be one of {', '.join(BACKENDS)}, "
+            f"got `{backend}`"
+        )
+    if backend == "neopixel" and len(channels) > 1:
+        # Blinka drives the Pi's LEDs through one module-global ws2811 instance
+        raise ValueError(
+            "Config `strip.channels` can only have one channel with the neopixel "
+            "backend; Raspberry Pi NeoPixel support is for one strip only"
+        )
+    return StripConfig(
+        channels=tuple(channels),
+        index_map=index_map,
+        backend=backend,
+        record_file=strip.get("record_file"),
+        record_max_bytes=_number(
+            strip, "record_max_bytes", StripConfig.record_max_bytes, int, minimum=0
+        ),
+        record_backup_count=_number(
+            strip,
+            "record_backup_count",
+            StripConfig.record_backup_count,
+            int,
+            minimum=0,
+        ),
+        smooth=bool(strip.get("smooth", StripConfig.smooth)),
+        gamma=_number(strip, "gamma", StripConfig.gamma, minimum=0.1, maximum=5),
+        fps=_number(strip, "fps", StripConfig.fps, minimum=1, maximum=240),
+    )
+
+
+def _parse_config(raw: Any, path: str) -> Config:
+    if not isinstance(raw, Mapping):
+        raise ValueError(f"Config file must contain a mapping: {path}")
+    logger = _section(raw, "logger")
+    rotation = _section(logger, "rotation")
+    fetch = _section(raw, "fetch")
+    schedule = _section(raw, "schedule")
+    metrics = _section(raw, "metrics")
+    tracing = _section(raw, "tracing")
+    defaults = FetchConfig()
+    backup_count = rotation.get("backup_count")
+    icao_codes = tuple(str(code or "") for code in raw.get("icao_codes") or ())
+    return Config(
+        path=path,
+        base_url=str(raw.get("base_url") or ""),
+        endpoints=MappingProxyType(dict(_section(raw, "endpoints"))),
+        logger=LoggerConfig(
+            log_file=str(logger.get("log_file", LoggerConfig.log_file)),
+            console_level=str(logger.get("console_level", LoggerConfig.console_level)),
+            file_level=str(logger.get("file_level", LoggerConfig.file_level)),
+            queue=bool(logger.get("queue", LoggerConfig.queue)),
+            rotation=RotationConfig(
+                type=str(rotation.get("type", RotationConfig.type)).lower(),
+                when=str(rotation.get("when", RotationConfig.when)),
+                interval=_number(rotation, "interval", 1, int, minimum=1),
+                backup_count=(
+                    None
+                    if backup_count is None
+                    else _number(rotation, "backup_count", 0, int, minimum=0)
+                ),
+                max_bytes=_number(rotation, "max_bytes", 1_000_000, int, minimum=0),
+            ),
+        ),
+        fetch=FetchConfig(
+            batch_size=_number(fetch, "batch_size", defaults.batch_size, int, 1),
+            max_workers=_number(fetch, "max_workers", defaults.max_workers, int, 1),
+            timeout_s=_number(fetch, "timeout_s", defaults.timeout_s, minimum=0),
+            retries=_number(fetch, "retries", defaults.retries, int, 0),
+            backoff_s=_number(fetch, "backoff_s", defaults.backoff_s, minimum=0),
+            max_backoff_s=_number(
+                fetch, "max_backoff_s", defaults.max_backoff_s, minimum=0
+            ),
+            retry_budget_s=_number(
+                fetch, "retry_budget_s", defaults.retry_budget_s, minimum=0
+            ),
+        ),
+        schedule=ScheduleConfig(
+            adaptive=bool(schedule.get("adaptive", ScheduleConfig.adaptive)),
+            requests_per_hour=_number(
+                schedule, "requests_per_hour", 60, int, minimum=1
+            ),
+            volatile_interval_s=_number(
+                schedule, "volatile_interval", 300.0, minimum=10
+            ),
+            publish_delay_s=_number(schedule, "publish_delay", 120.0, minimum=0),
+        ),
+        strip=_parse_strip(raw, len(icao_codes)),
+        metrics=MetricsConfig(
+            enabled=bool(metrics.get("enabled", MetricsConfig.enabled)),
+            host=str(metrics.get("host", MetricsConfig.host)),
+            port=_number(metrics, "port", MetricsConfig.port, int, 0, 65535),
+        ),
+        tracing=TracingConfig(
+            enabled=bool(tracing.get("enabled", TracingConfig.enabled)),
+            file=str(tracing.get("file", TracingConfig.file)),
+            max_bytes=_number(
+                tracing, "max_bytes", TracingConfig.max_bytes, int, minimum=1024
+            ),
+            backup_count=_number(
+                tracing, "backup_count", TracingConfig.backup_count, int, minimum=0
+            ),
+            frame_sample=_number(
+                tracing, "frame_sample", TracingConfig.frame_sample, int, minimum=1
+            ),
+            profile_s=_number(
+                tracing, "profile_seconds", TracingConfig.profile_s, minimum=1
+            ),
+            profile_dir=str(tracing.get("profile_dir", TracingConfig.profile_dir)),
+        ),
+        cache_file=_section(raw, "cache").get("file"),
+        icao_codes=icao_codes,
+        refresh_time=_number(raw, "refresh_time", 1800, int, minimum=1),
+        stale_after_s=_number(raw, "stale_after", 7200, int, minimum=0),
+        brightness=_number(raw, "brightness", 0.15, minimum=0, maximum=1),
+        led_patterns=MappingProxyType(dict(_section(raw, "led_patterns"))),
+        raw=MappingProxyType(dict(raw)),
+    )
+
+
+def _default_config_path() -> str:
+    return str(resources.files("metar_map.static").joinpath("config.yaml"))
+
+
+# path -> ((mtime_ns, size), raw document, parsed Config or None)
+_cache: dict[str, tuple[tuple[int, int], dict[str, Any], Optional[Config]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _load(
+    config_path: Optional[str], parse: bool
+) -> tuple[dict[str, Any], Optional[Config]]:
     if config_path is None:
-        config_path = str(resources.files("metar_map.static").joinpath("config.yaml"))
+        config_path = _default_config_path()
     if not os.path.isfile(config_path):
         raise FileNotFoundError(f"Config file not found: {config_path}")
-    with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    stat = os.stat(config_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        cached = _cache.get(config_path)
+        if cached is not None and cached[0] == version:
+            raw, config = cached[1], cached[2]
+        else:
+            with open(config_path, "r", encoding="utf-8") as f:
+                raw = yaml.load(f, Loader=SafeLoader) or {}
+            config = None
+        if parse and config is None:
+            config = _parse_config(raw, config_path)
+        _cache[config_path] = (version, raw, config)
+    return raw, config
+
+
+def load_config(config_path: Optional[str] = None) -> dict[str, Any]:
+    """
+    Return the YAML document at `config_path` (the packaged config.yaml by
+    default). The parse is memoized by path and modification time, so the
+    returned dict is shared and must not be modified.
+    """
+    return _load(config_path, parse=False)[0]
+
+
+def get_config(config_path: Optional[str] = None) -> Config:
+    """Return the validated Config for `config_path`, memoized like load_config."""
+    config = _load(config_path, parse=True)[1]
+    assert config is not None
+    return config
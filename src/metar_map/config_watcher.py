@@ -0,0 +1,50 @@
+import os
+import threading
+from typing import Callable, Optional
+
+
+class ConfigWatcher:
+    """
+    Calls `on_change` from a background thread whenever the config file's
+    modification time or size changes. Polling keeps this portable; a SIGHUP
+    handler can trigger the same callback for an immediate reload.
+    """
+
+    def __init__(
+        self, path: str, on_change: Callable[[], None], poll_interval_s: float = 2.0
+    ):
+        self.path = path
+        self.poll_interval_s = poll_interval_s
+        self._on_change = on_change
+        self._version = self._stat()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _stat(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self) -> bool:
+        """Poll once; returns True (after calling `on_change`) if the file changed."""
+        version = self._stat()
+        # A missing file is usually an editor mid-save; wait for it to return
+        if version is None or version == self._version:
+            return False
+        self._version = version
+        self._on_change()
+        return True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval_s):
+            self.check()
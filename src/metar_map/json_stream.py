@@ -0,0 +1,69 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time as `chunks`
+    arrive, so the whole document is never held in memory at once.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunk_iter = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        while not exhausted:
+            chunk = next(chunk_iter, None)
+            if chunk is None:
+                exhausted = True
+                text = text_decoder.decode(b"", final=True)
+            else:
+                text = text_decoder.decode(chunk)
+            if text:
+                buffer = buffer[pos:] + text
+                pos = 0
+                return True
+        return False
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()  # type: ignore
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                raise ValueError("Unexpected end of JSON array")
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                # A value touching the end of the buffer may be cut short
+                if end < len(buffer) or exhausted:
+                    break
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            fill()
+        pos = end
+        yield element
+        separator = next_char()
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Unexpected `{separator}` in JSON array")
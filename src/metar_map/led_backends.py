@@ -0,0 +1,244 @@
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Protocol
+
+Color = tuple[int, int, int]
+
+# Recording layout: a header, then fixed-size frames so frame `i` sits at a
+# known offset and the file can be memory-mapped for replay.
+RECORDING_MAGIC = b"MMFR"
+RECORDING_VERSION = 1
+# magic, version, LEDs per frame
+_HEADER = struct.Struct("<4sHI")
+# wall-clock timestamp, brightness; followed by 3 bytes per LED
+_FRAME = struct.Struct("<df")
+
+
+class LEDBackend(Protocol):
+    """
+    What LEDController needs from a strip. `neopixel.NeoPixel` satisfies it
+    as is; colors are passed through in the order the controller writes them.
+    """
+
+    brightness: float
+
+    def __setitem__(self, index: int, color: Color) -> None: ...
+
+    def show(self) -> None: ...
+
+
+def create_neopixel_strip(num_leds: int, gpio_pin: Any, brightness: float) -> Any:
+    import neopixel  # type: ignore
+    import board  # type: ignore
+
+    if gpio_pin is None:
+        gpio_pin = board.D18  # type: ignore
+    elif isinstance(gpio_pin, str):
+        # Pins from config.yaml are named like the `board` attributes ("D18")
+        gpio_pin = getattr(board, gpio_pin)
+    return neopixel.NeoPixel(
+        pin=gpio_pin,
+        n=num_leds,
+        brightness=brightness,
+        auto_write=False,
+    )
+
+
+class SimulatorBackend:
+    """
+    An in-memory strip for running the map without LEDs. Keeps the pixels
+    as last written, a count of show() calls and the times of the most
+    recent `history` shows, for checking frame timing.
+    """
+
+    def __init__(
+        self,
+        num_leds: int,
+        brightness: float = 1.0,
+        history: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pixels: list[Color] = [(0, 0, 0)] * num_leds
+        self.brightness = brightness
+        self.shows = 0
+        self.show_times: deque[float] = deque(maxlen=history)
+        # The pixels as of the last show(), i.e. what a real strip displays
+        self.shown: tuple[Color, ...] = tuple(self.pixels)
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self.pixels)
+
+    def __setitem__(self, index: int, color: Color):
+        self.pixels[index] = color
+
+    def __getitem__(self, index: int) -> Color:
+        return self.pixels[index]
+
+    def show(self):
+        self.shows += 1
+        self.show_times.append(self._clock())
+        self.shown = tuple(self.pixels)
+
+    def close(self):
+        pass
+
+
+def create_simulator_strip(
+    num_leds: int, gpio_pin: Any, brightness: float
+) -> SimulatorBackend:
+    return SimulatorBackend(num_leds, brightness)
+
+
+BACKENDS: dict[str, Callable[[int, Any, float], Any]] = {
+    "neopixel": create_neopixel_strip,
+    "simulator": create_simulator_strip,
+}
+
+
+class FrameRecorder:
+    """
+    Appends every shown frame, with its wall-clock time and brightness, to a
+    binary recording, optionally passing the writes on to another backend so
+    a running map can be recorded. Read recordings back with FrameReplay.
+
+    A recording left by an earlier run, or one that reaches `max_bytes`
+    (0: no limit), is moved to `path.1`, and so on up to `backup_count`
+    files, before a new one is started.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        num_leds: int,
+        inner: Optional[Any] = None,
+        brightness: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+    ):
+        self.num_leds = num_leds
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._inner = inner
+        self._brightness = getattr(inner, "brightness", brightness)
+        self._clock = clock
+        self._pixels = bytearray(3 * num_leds)
+        self._frame_size = _FRAME.size + len(self._pixels)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: BinaryIO = self._open()
+        self.frames = 0
+
+    def _open(self) -> BinaryIO:
+        if self.path.exists():
+            self._rotate()
+        f = open(self.path, "wb")
+        f.write(_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.num_leds))
+        self._size = _HEADER.size
+        return f
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            self.path.unlink()
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def __len__(self) -> int:
+        return self.num_leds
+
+    def __setitem__(self, index: int, color: Color):
+        self._pixels[3 * index : 3 * index + 3] = bytes(color)
+        if self._inner is not None:
+            self._inner[index] = color
+
+    @property
+    def brightness(self) -> float:
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness: float):
+        self._brightness = brightness
+        if self._inner is not None:
+            self._inner.brightness = brightness
+
+    def show(self):
+        if self._inner is not None:
+            self._inner.show()
+        if self.max_bytes and self._size + self._frame_size > self.max_bytes:
+            self._file.close()
+            self._file = self._open()
+        self._file.write(_FRAME.pack(self._clock(), self._brightness))
+        self._file.write(self._pixels)
+        self._size += self._frame_size
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        close = getattr(self._inner, "close", None)
+        if close is not None:
+            close()
+
+
+class FrameReplay:
+    """
+    A memory-mapped recording written by FrameRecorder. Frames are read in
+    place: indexing returns `(timestamp, brightness, pixels)` where `pixels`
+    is a memoryview of 3 bytes per LED.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_leds = _HEADER.unpack_from(self._map)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a frame recording: {path}")
+        self.num_leds = num_leds
+        self._frame_size = _FRAME.size + 3 * num_leds
+        self._view = memoryview(self._map)
+        # A frame cut short by a crash mid-write is ignored
+        self._count = (len(self._map) - _HEADER.size) // self._frame_size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> tuple[float, float, memoryview]:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("frame index out of range")
+        offset = _HEADER.size + index * self._frame_size
+        timestamp, brightness = _FRAME.unpack_from(self._map, offset)
+        start = offset + _FRAME.size
+        return timestamp, brightness, self._view[start : start + 3 * self.num_leds]
+
+    def __iter__(self) -> Iterator[tuple[float, float, memoryview]]:
+        for index in range(self._count):
+            yield self[index]
+
+    def color(self, index: int, led: int) -> Color:
+        """The color of `led` in frame `index`, in the order it was written."""
+        pixels = self[index][2]
+        r, g, b = pixels[3 * led : 3 * led + 3]
+        return (r, g, b)
+
+    def close(self):
+        # Views returned by indexing must be released (or dropped) first
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "FrameReplay":
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+
+from metar_map.config import ChannelConfig, StripConfig
+
+Color = tuple[int, int, int]
+# (num_leds, pin, brightness) -> an object with NeoPixel's strip interface
+StripFactory = Callable[[int, Any, float], Any]
+
+
+class MultiStrip:
+    """
+    Several LED channels presented to LEDController as one strip.
+
+    Logical LED `i` is written to the physical LED `index_map[i]`, counted
+    across the channels in order. `show()` pushes every channel written
+    since the last show, each on its own worker thread, so frame time is
+    set by the longest channel rather than the total LED count. The channels
+    must be independent strips: Blinka's Raspberry Pi NeoPixel driver only
+    supports one, which is why config parsing rejects several with it.
+    """
+
+    def __init__(
+        self,
+        strips: Sequence[Any],
+        counts: Sequence[int],
+        index_map: Optional[Sequence[int]] = None,
+    ):
+        if len(strips) != len(counts):
+            raise ValueError("Every channel needs an LED count")
+        self.strips = list(strips)
+        # Physical index -> (channel, index on that channel)
+        physical = [
+            (channel, led)
+            for channel, count in enumerate(counts)
+            for led in range(count)
+        ]
+        if index_map is None:
+            index_map = range(len(physical))
+        self._targets = [physical[i] for i in index_map]
+        self._dirty = bytearray(len(self.strips))
+        self._brightness = getattr(self.strips[0], "brightness", 1.0)
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=len(self.strips), thread_name_prefix="led-channel"
+            )
+            if len(self.strips) > 1
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def __setitem__(self, index: int, color: Color):
+        channel, led = self._targets[index]
+        self.strips[channel][led] = color
+        self._dirty[channel] = 1
+
+    def __getitem__(self, index: int) -> Color:
+        channel, led = self._targets[index]
+        return self.strips[channel][led]
+
+    @property
+    def brightness(self) -> float:
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness: float):
+        self._brightness = brightness
+        for strip in self.strips:
+            strip.brightness = brightness
+        # Brightness is applied on show(), so every channel needs one
+        self._dirty = bytearray(b"\x01") * len(self.strips)
+
+    def show(self):
+        dirty = [s for s, d in zip(self.strips, self._dirty) if d]
+        self._dirty = bytearray(len(self.strips))
+        if self._executor is None or len(dirty) < 2:
+            for strip in dirty:
+                strip.show()
+            return
+        # result() re-raises a channel's failure on the render thread
+        for future in [self._executor.submit(strip.show) for strip in dirty]:
+            future.result()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+def create_strip(
+    strip_config: StripConfig,
+    num_leds: int,
+    brightness: float,
+    factory: StripFactory,
+) -> Any:
+    """
+    Build the strip described by `strip_config` for `num_leds` logical LEDs,
+    creating each channel with `factory`. A single unmapped channel is
+    returned as is.
+    """
+    channels = strip_config.channels or (ChannelConfig(count=num_leds),)
+    strips = [factory(c.count, c.pin, brightness) for c in channels]
+    if len(strips) == 1 and not strip_config.index_map:
+        return strips[0]
+    return MultiStrip(
+        strips,
+        [c.count for c in channels],
+        strip_config.index_map or range(num_leds),
+    )
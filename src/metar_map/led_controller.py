@@ -1,116 +1,284 @@
 import threading
 import time
-from typing import Any
-
-import neopixel  # type: ignore
-import board  # type: ignore
+from array import array
+from typing import Any, Mapping, Optional, Sequence
 
+from metar_map import tracing
+from metar_map.led_backends import LEDBackend, create_neopixel_strip
+from metar_map.logger import Logger
+from metar_map.metrics import FRAME_BUCKETS_S, Histogram
 from metar_map.pattern_builder import LEDPattern, LEDColor
 
+Color = tuple[int, int, int]
+# Immutable per-LED pattern lists, indexed by LED
+PatternTable = tuple[tuple[LEDPattern, ...], ...]
+
+INFINITY = float("inf")
+WAKEUP_REPORT_INTERVAL_S = 60.0
+
 
 class LEDController:
-    def __init__(self, num_leds: int, gpio_pin=board.D18, brightness: float = 0.25):  # type: ignore
+    def __init__(
+        self,
+        num_leds: int,
+        gpio_pin: Any = None,
+        brightness: float = 0.25,
+        strip: Optional[LEDBackend] = None,
+        autostart: bool = True,
+        report_wakeups: bool = False,
+    ):
         self.num_leds = num_leds
-        self._led_patterns: dict[int, list[LEDPattern]] = {}
-        self._lock = threading.Lock()
+        # The table being rendered (owned by the render thread) and the latest
+        # table published by update_patterns. The render thread swaps to the
+        # published table at the start of a frame; no lock is shared between them.
+        self._table: PatternTable = ((),) * num_leds
+        self._published_table: PatternTable = self._table
+        # Per-LED render state, held in parallel arrays indexed by LED.
+        # A negative pattern index restarts the LED at its first pattern.
+        self._pattern_index = array("i", [-1]) * num_leds
+        self._pattern_end = array("d", [INFINITY]) * num_leds
+        self._next_blink = array("d", [INFINITY]) * num_leds
+        self._led_on = bytearray(num_leds)
+        # min(pattern_end, next_blink): LEDs are only revisited once this passes
+        self._deadline = array("d", [INFINITY]) * num_leds
         self._stop_event = threading.Event()
+        # Set by update_patterns/stop to wake the render thread before its deadline
+        self._wake_event = threading.Event()
+        # Earliest time any LED changes state; inf when the frame is static
+        self._next_deadline = INFINITY
+        self.wakeups = 0
+        # Frames pushed to the strip, and render thread step times
+        self.shows = 0
+        self.frame_times = Histogram(FRAME_BUCKETS_S)
+        self._report_wakeups = report_wakeups
 
-        self.strip = neopixel.NeoPixel(
-            pin=gpio_pin,  # type: ignore
-            n=num_leds,
-            brightness=brightness,
-            auto_write=False,
+        # NeoPixel unless another backend (simulator, recorder, channels) is given
+        self.strip: LEDBackend = (
+            strip
+            if strip is not None
+            else create_neopixel_strip(num_leds, gpio_pin, brightness)
         )
 
+        # The frame being composed and the frame last pushed to the strip.
+        # `None` means the strip contents are unknown, so the next push is forced.
+        self._frame: list[Color] = [LEDColor.OFF.rgb] * num_leds
+        self._shown_frame: Optional[Sequence[Any]] = None
+        # Applied to the strip by the render thread, like the pattern table
+        self._brightness = brightness
+        self._published_brightness = brightness
+
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        if autostart:
+            self._thread.start()
+
+    def start(self):
         self._thread.start()
 
-    def _set_led(self, led_index: int, color: tuple[int, int, int]):
-        r, g, b = color
-        self.strip[led_index] = (g, r, b)
+    def _push_frame(self, frame: list[Color], force: bool = False) -> bool:
+        """
+        Write `frame` to the strip with a single `show()`.
+        Returns False without touching the strip if nothing changed.
+        """
+        shown = self._shown_frame
+        if not force and shown is not None and frame == shown:
+            return False
+        for led_index, color in enumerate(frame):
+            if force or shown is None or shown[led_index] != color:
+                r, g, b = color
+                self.strip[led_index] = (g, r, b)
         self.strip.show()
+        self._shown_frame = frame.copy()
+        return True
+
+    def update_patterns(self, patterns: Mapping[int, Sequence[LEDPattern]]):
+        """
+        Publish a complete pattern table, keyed by LED index. LEDs missing from
+        `patterns` are turned off. The render thread picks the table up at its
+        next frame; LEDs whose patterns are unchanged keep their blink cycle.
+        """
+        with tracing.span("update_patterns"):
+            self._published_table = tuple(
+                tuple(patterns.get(led_index, ())) for led_index in range(self.num_leds)
+            )
+        self._wake_event.set()
 
-    def update_patterns(self, led_index: int, patterns: list[LEDPattern]):
-        with self._lock:
-            self._led_patterns[led_index] = patterns.copy()
-            # Reset last_states for this LED so pattern_index is always valid
-            if hasattr(self, "_last_states"):
-                self._last_states.pop(led_index, None)
+    def update_leds(self, patterns: Mapping[int, Sequence[LEDPattern]]):
+        """
+        Publish new patterns for only the LEDs in `patterns`, in one update;
+        every other LED keeps its published patterns. Callers must not
+        publish from several threads at once, or one update may be lost.
+        """
+        if not patterns:
+            return
+        with tracing.span("update_leds"):
+            table = list(self._published_table)
+            for led_index, led_patterns in patterns.items():
+                table[led_index] = tuple(led_patterns)
+            self._published_table = tuple(table)
+        self._wake_event.set()
+
+    def set_brightness(self, brightness: float):
+        """Change the strip brightness at the next frame."""
+        self._published_brightness = brightness
+        self._wake_event.set()
 
     def stop(self):
         self._stop_event.set()
-        self._thread.join()
+        self._wake_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
         self.clear_all()
+        close = getattr(self.strip, "close", None)
+        if close is not None:
+            close()
 
     def clear_all(self):
-        for i in range(self.num_leds):
-            self._set_led(i, LEDColor.OFF.rgb)
-        self.strip.show()
+        """
+        Turn every LED off. While the render thread is running this publishes
+        an empty table; otherwise the blank frame is pushed directly.
+        """
+        if self._thread.is_alive():
+            self.update_patterns({})
+            return
+        self._push_frame(self._blank_frame(), force=True)
 
-    def _run_loop(self):
-        self._last_states: dict[int, dict[str, Any]] = {}
-        while not self._stop_event.is_set():
+    def _blank_frame(self) -> list[Color]:
+        self._frame = [LEDColor.OFF.rgb] * self.num_leds
+        return self._frame
+
+    def _swap_table(self):
+        """Adopt the latest published table, restarting only LEDs that changed."""
+        table = self._published_table
+        if table is self._table:
+            return
+        for led_index, (old, new) in enumerate(zip(self._table, table)):
+            # Builder patterns are shared tuples, so identity settles most LEDs
+            if old is not new and old != new:
+                self._pattern_index[led_index] = -1
+                self._deadline[led_index] = -INFINITY
+        self._table = table
+
+    def _render_frame(self, now: float) -> list[Color]:
+        """
+        Advance every due LED's pattern state to `now` and compose the frame.
+        Also records the earliest upcoming state change in `_next_deadline`.
+        """
+        frame = self._frame
+        led_patterns = self._table
+        pattern_index = self._pattern_index
+        next_blink = self._next_blink
+        led_on = self._led_on
+        deadline = self._deadline
+        off = LEDColor.OFF.rgb
+        for led_index in range(self.num_leds):
+            if deadline[led_index] > now:
+                continue
+            patterns = led_patterns[led_index]
+            if not patterns:
+                frame[led_index] = off
+                deadline[led_index] = INFINITY
+                continue
+
+            index = pattern_index[led_index]
+            if index < 0:
+                index = self._start_pattern(led_index, patterns, 0, now)
+            elif now >= self._pattern_end[led_index]:
+                index = self._start_pattern(
+                    led_index, patterns, (index + 1) % len(patterns), now
+                )
+
+            pattern = patterns[index]
+            if now >= next_blink[led_index]:
+                led_on[led_index] ^= 1
+                next_blink[led_index] = now + pattern.blink_speed_s
+
+            frame[led_index] = pattern.color.rgb if led_on[led_index] else off
+            deadline[led_index] = min(
+                self._pattern_end[led_index], next_blink[led_index]
+            )
+
+        self._next_deadline = min(deadline, default=INFINITY)
+        return frame
+
+    def _start_pattern(
+        self,
+        led_index: int,
+        patterns: Sequence[LEDPattern],
+        index: int,
+        now: float,
+    ) -> int:
+        pattern = patterns[index]
+        self._pattern_index[led_index] = index
+        # A lone solid pattern never changes, so there is nothing to wake for
+        self._pattern_end[led_index] = (
+            now + pattern.total_duration_s
+            if len(patterns) > 1 or pattern.blink
+            else INFINITY
+        )
+        self._led_on[led_index] = 1
+        self._next_blink[led_index] = (
+            now + pattern.blink_speed_s if pattern.blink else INFINITY
+        )
+        return index
+
+    def step(self, now: Optional[float] = None) -> bool:
+        """
+        Render one frame and push it if it differs from the last one shown.
+        Returns True if the strip was written. Only the render thread (or a
+        caller driving a controller created with autostart=False) may call this.
+        """
+        if now is None:
             now = time.monotonic()
-            with self._lock:
-                for led_index in range(self.num_leds):
-                    patterns = self._led_patterns.get(led_index)
-                    if not patterns:
-                        self._set_led(led_index, LEDColor.OFF.rgb)
-                        continue
-
-                    if led_index not in self._last_states:
-                        self._last_states[led_index] = {
-                            "pattern_index": 0,
-                            "pattern_end": now + patterns[0].total_duration_s,
-                            "led_on": True,
-                            "next_blink": (
-                                now + patterns[0].blink_speed_s
-                                if patterns[0].blink
-                                else None
-                            ),
-                        }
-
-                    state = self._last_states[led_index]
-                    # Ensure pattern_index is always valid
-                    if state["pattern_index"] >= len(patterns):
-                        state["pattern_index"] = 0
-                        state["pattern_end"] = now + patterns[0].total_duration_s
-                        state["led_on"] = True
-                        state["next_blink"] = (
-                            now + patterns[0].blink_speed_s
-                            if patterns[0].blink
-                            else None
-                        )
-
-                    pattern = patterns[int(state["pattern_index"])]
-
-                    if (
-                        pattern.blink
-                        and state["next_blink"]
-                        and now >= state["next_blink"]
-                    ):
-                        state["led_on"] = not state["led_on"]
-                        state["next_blink"] = now + pattern.blink_speed_s
-
-                    self._set_led(
-                        led_index,
-                        pattern.color.rgb if state["led_on"] else LEDColor.OFF.rgb,
-                    )
+        self._swap_table()
+        brightness = self._published_brightness
+        if brightness != self._brightness:
+            self._brightness = brightness
+            self.strip.brightness = brightness
+            # The strip applies brightness on show(), so push the frame again
+            self._shown_frame = None
+        with tracing.frame_span("render"):
+            frame = self._render_frame(now)
+        with tracing.frame_span("show"):
+            pushed = self._push_frame(frame)
+        if not pushed:
+            return False
+        self.shows += 1
+        return True
 
-                    if now >= state["pattern_end"]:
-                        state["pattern_index"] = (state["pattern_index"] + 1) % len(
-                            patterns
-                        )
-                        next_pattern = patterns[int(state["pattern_index"])]
-                        state["pattern_end"] = now + next_pattern.total_duration_s
-                        state["led_on"] = True
-                        state["next_blink"] = (
-                            now + next_pattern.blink_speed_s
-                            if next_pattern.blink
-                            else None
-                        )
+    def wakeups_per_minute(self, elapsed_s: float) -> float:
+        return self.wakeups * 60.0 / elapsed_s if elapsed_s > 0 else 0.0
 
-            time.sleep(0.05)
+    def _run_loop(self):
+        """
+        Render a frame, then sleep until the next LED state change or until
+        woken early by update_patterns/stop.
+        """
+        started = last_report = time.monotonic()
+        logger = Logger(name="led_controller") if self._report_wakeups else None
+        frame_times = self.frame_times
+        perf_counter = time.perf_counter
+        while not self._stop_event.is_set():
+            tracing.next_frame()
+            start = perf_counter()
+            with tracing.frame_span("frame"):
+                self.step()
+            frame_times.observe(perf_counter() - start)
+            timeout: Optional[float] = None
+            if self._next_deadline != INFINITY:
+                timeout = max(0.0, self._next_deadline - time.monotonic())
+            if logger is not None:
+                now = time.monotonic()
+                if now - last_report >= WAKEUP_REPORT_INTERVAL_S:
+                    logger.info(
+                        "LED render wakeups per minute: %.2f",
+                        self.wakeups_per_minute(now - started),
+                    )
+                    last_report = now
+                report_in = last_report + WAKEUP_REPORT_INTERVAL_S - now
+                timeout = report_in if timeout is None else min(timeout, report_in)
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+            self.wakeups += 1
 
 
 if __name__ == "__main__":
@@ -132,11 +300,9 @@ if __name__ == "__main__":
 
     try:
         while True:
-            for i in range(NUM_LEDS):
-                controller.update_patterns(i, patterns1)
+            controller.update_patterns({i: patterns1 for i in range(NUM_LEDS)})
             time.sleep(60)
-            for i in range(NUM_LEDS):
-                controller.update_patterns(i, patterns2)
+            controller.update_patterns({i: patterns2 for i in range(NUM_LEDS)})
             time.sleep(60)
     except KeyboardInterrupt:
         print("\nStopping LED controller...")
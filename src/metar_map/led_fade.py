@@ -0,0 +1,184 @@
+from array import array
+from typing import Any, Mapping, Optional
+
+from metar_map.led_backends import LEDBackend
+from metar_map.led_controller import Color, LEDController
+from metar_map.pattern_builder import LEDColor
+
+
+def gamma_table(gamma: float) -> bytes:
+    """Maps a perceived 0-255 level to the PWM level that displays it."""
+    return bytes(round(255 * (level / 255) ** gamma) for level in range(256))
+
+
+class FadingLEDController(LEDController):
+    """
+    An LEDController that fades instead of switching. Every change of an
+    LED's target color (a blink, the next pattern in its cycle or a new
+    table) becomes a fade from the color currently shown, over the
+    `fade_s` of the LED's pattern. Colors are mixed in perceived levels,
+    scaled by a per-LED brightness and gamma corrected through a lookup
+    table into a flat byte frame in strip order.
+
+    Frames are rendered at `fps` only while some LED is fading; a static map
+    is as idle as with LEDController.
+    """
+
+    def __init__(
+        self,
+        num_leds: int,
+        gpio_pin: Any = None,
+        brightness: float = 0.25,
+        strip: Optional[LEDBackend] = None,
+        autostart: bool = True,
+        report_wakeups: bool = False,
+        gamma: float = 2.2,
+        fps: float = 60.0,
+    ):
+        self._gamma = gamma_table(gamma)
+        self._frame_interval_s = 1.0 / fps
+        off = LEDColor.OFF.rgb
+        # The targets the pattern state last asked for, to spot changes
+        self._targets: list[Color] = [off] * num_leds
+        # Fade endpoints and the mix last computed, as R, G, B per LED
+        self._fade_from = array("f", [0.0]) * (3 * num_leds)
+        self._fade_to = array("f", [0.0]) * (3 * num_leds)
+        self._mix = array("f", [0.0]) * (3 * num_leds)
+        self._fade_start = array("d", [0.0]) * num_leds
+        self._fade_end = array("d", [0.0]) * num_leds
+        # LEDs whose output must be recomposed next frame
+        self._fading: set[int] = set()
+        self._led_brightness = array("f", [1.0]) * num_leds
+        self._published_led_brightness: Optional[tuple[float, ...]] = None
+        # Gamma-corrected output in strip (G, R, B) order, and the LEDs
+        # written since the last push
+        self._out = bytearray(3 * num_leds)
+        self._dirty: list[int] = []
+        super().__init__(
+            num_leds,
+            gpio_pin=gpio_pin,
+            brightness=brightness,
+            strip=strip,
+            autostart=autostart,
+            report_wakeups=report_wakeups,
+        )
+
+    def set_led_brightness(self, levels: Mapping[int, float]):
+        """
+        Publish a brightness (0.0-1.0) per LED, applied on top of the strip
+        brightness from the next frame. LEDs missing from `levels` get 1.0.
+        """
+        self._published_led_brightness = tuple(
+            min(1.0, max(0.0, float(levels.get(led_index, 1.0))))
+            for led_index in range(self.num_leds)
+        )
+        self._wake_event.set()
+
+    def _swap_led_brightness(self):
+        levels = self._published_led_brightness
+        if levels is None:
+            return
+        self._published_led_brightness = None
+        current = self._led_brightness
+        for led_index, level in enumerate(levels):
+            if current[led_index] != level:
+                current[led_index] = level
+                self._fading.add(led_index)
+
+    def _render_frame(self, now: float) -> bytearray:  # type: ignore[override]
+        targets = super()._render_frame(now)
+        self._swap_led_brightness()
+        if targets != self._targets:
+            self._retarget(targets, now)
+        if self._fading:
+            self._compose(now)
+            # Keep rendering at the frame rate until every fade is done. Frames
+            # are due on a fixed grid so wakeup latency doesn't lower the rate;
+            # rounding keeps a slightly early wakeup from adding a frame.
+            if self._fading:
+                interval = self._frame_interval_s
+                next_frame = ((now + interval / 2) // interval + 1) * interval
+                self._next_deadline = min(self._next_deadline, next_frame)
+        return self._out
+
+    def _retarget(self, targets: list[Color], now: float):
+        """Start a fade for every LED whose target color changed."""
+        previous = self._targets
+        table = self._table
+        pattern_index = self._pattern_index
+        fade_from = self._fade_from
+        fade_to = self._fade_to
+        mix = self._mix
+        for led_index, color in enumerate(targets):
+            if color == previous[led_index]:
+                continue
+            patterns = table[led_index]
+            fade_s = patterns[pattern_index[led_index]].fade_s if patterns else 0.0
+            i = 3 * led_index
+            fade_from[i : i + 3] = mix[i : i + 3]
+            fade_to[i], fade_to[i + 1], fade_to[i + 2] = color
+            self._fade_start[led_index] = now
+            self._fade_end[led_index] = now + fade_s
+            self._fading.add(led_index)
+        self._targets = targets.copy()
+
+    def _compose(self, now: float):
+        """Advance every fading LED to `now` and write its gamma-corrected bytes."""
+        fade_from = self._fade_from
+        fade_to = self._fade_to
+        mix = self._mix
+        fade_start = self._fade_start
+        fade_end = self._fade_end
+        led_brightness = self._led_brightness
+        gamma = self._gamma
+        out = self._out
+        done = []
+        for led_index in self._fading:
+            end = fade_end[led_index]
+            if now >= end:
+                t = 1.0
+                done.append(led_index)
+            else:
+                start = fade_start[led_index]
+                t = (now - start) / (end - start)
+            i = 3 * led_index
+            r0, g0, b0 = fade_from[i], fade_from[i + 1], fade_from[i + 2]
+            r = r0 + (fade_to[i] - r0) * t
+            g = g0 + (fade_to[i + 1] - g0) * t
+            b = b0 + (fade_to[i + 2] - b0) * t
+            mix[i], mix[i + 1], mix[i + 2] = r, g, b
+            level = led_brightness[led_index]
+            out[i] = gamma[int(g * level + 0.5)]
+            out[i + 1] = gamma[int(r * level + 0.5)]
+            out[i + 2] = gamma[int(b * level + 0.5)]
+        self._dirty.extend(self._fading)
+        self._fading.difference_update(done)
+
+    def _push_frame(self, frame: bytearray, force: bool = False) -> bool:  # type: ignore[override]
+        dirty, self._dirty = self._dirty, []
+        shown = self._shown_frame
+        strip = self.strip
+        if force or shown is None:
+            leds: Any = range(self.num_leds)
+        else:
+            if not dirty:
+                return False
+            leds = dirty
+        written = False
+        for led_index in leds:
+            i = 3 * led_index
+            if force or shown is None or frame[i : i + 3] != shown[i : i + 3]:
+                strip[led_index] = (frame[i], frame[i + 1], frame[i + 2])
+                written = True
+        if not written:
+            return False
+        self.strip.show()
+        self._shown_frame = bytes(frame)
+        return True
+
+    def _blank_frame(self) -> bytearray:  # type: ignore[override]
+        self._out = bytearray(3 * self.num_leds)
+        self._mix = array("f", [0.0]) * (3 * self.num_leds)
+        self._targets = [LEDColor.OFF.rgb] * self.num_leds
+        self._fading.clear()
+        return self._out
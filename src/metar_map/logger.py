@@ -1,31 +1,36 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 from typing import Any, Optional
-from metar_map.config import load_config
+from metar_map.config import Config, LoggerConfig, get_config
 
+# Parent of every component logger; the shared handlers are attached here
+ROOT_LOGGER_NAME = "metar_map"
 
-class Logger:
-    def __init__(self, config_path: Optional[str] = None):
-        logger_config: dict[str, Any] = load_config(config_path=config_path).get(
-            "logger", {}
-        )
-        log_file = Path(logger_config.get("log_file", "logs/metar_map.log"))
+
+class _HandlerSet:
+    """The console/file handlers installed for one LoggerConfig."""
+
+    def __init__(self, logger_config: LoggerConfig):
+        self.config = logger_config
+        log_file = Path(logger_config.log_file)
         log_file.parent.mkdir(parents=True, exist_ok=True)
 
         console_level = getattr(
-            logging, logger_config.get("console_level", "INFO").upper(), logging.INFO
+            logging, logger_config.console_level.upper(), logging.INFO
         )
-        file_level = getattr(
-            logging, logger_config.get("file_level", "DEBUG").upper(), logging.DEBUG
-        )
-
-        self.logger = logging.getLogger(f"MetarMap_{id(self)}")
-        self.logger.setLevel(logging.DEBUG)
-
-        # Remove any existing handlers to avoid duplicate logs
-        self.logger.handlers.clear()
+        file_level = getattr(logging, logger_config.file_level.upper(), logging.DEBUG)
+        # Records below every handler's level are dropped before formatting
+        self.level = min(console_level, file_level)
 
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(console_level)
@@ -36,35 +41,143 @@ class Logger:
             )
         )
 
-        rotation_cfg = logger_config.get("rotation", {})
-        rotation_type = rotation_cfg.get("type", "timed").lower()
+        rotation = logger_config.rotation
 
-        if rotation_type == "timed":
+        if rotation.type == "timed":
             file_handler = TimedRotatingFileHandler(
                 log_file,
-                when=rotation_cfg.get("when", "midnight"),
-                interval=rotation_cfg.get("interval", 1),
-                backupCount=rotation_cfg.get("backup_count", 7),
+                when=rotation.when,
+                interval=rotation.interval,
+                backupCount=(
+                    7 if rotation.backup_count is None else rotation.backup_count
+                ),
                 encoding="utf-8",
             )
         else:
             file_handler = RotatingFileHandler(
                 log_file,
-                maxBytes=rotation_cfg.get("max_bytes", 1_000_000),
-                backupCount=rotation_cfg.get("backup_count", 5),
+                maxBytes=rotation.max_bytes,
+                backupCount=(
+                    5 if rotation.backup_count is None else rotation.backup_count
+                ),
                 encoding="utf-8",
             )
 
         file_handler.setLevel(file_level)
         file_handler.setFormatter(
             logging.Formatter(
-                "%(asctime)s - %(levelname)s - %(threadName)s - %(message)s",
+                "%(asctime)s - %(levelname)s - %(threadName)s - %(name)s - %(message)s",
                 datefmt="%Y-%m-%d %H:%M:%S",
             )
         )
 
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
+        self.output: list[logging.Handler] = [console_handler, file_handler]
+        self.listener: Optional[QueueListener] = None
+        self.handlers = self.output
+        if logger_config.queue:
+            # Console and file I/O happen on the listener's thread
+            log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+            self.listener = QueueListener(
+                log_queue, *self.output, respect_handler_level=True
+            )
+            self.listener.start()
+            self.handlers = [QueueHandler(log_queue)]
+
+    def close(self) -> None:
+        """Flush queued records and release the handlers."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers + self.output:
+            handler.close()
+
+
+# The handlers shared by every Logger in the process
+_installed: Optional[_HandlerSet] = None
+_install_lock = threading.Lock()
+
+
+def _install(logger_config: Optional[LoggerConfig]) -> _HandlerSet:
+    """
+    Attach handlers for `logger_config` to the root logger, replacing the
+    installed set only if the config differs. With no config, whatever is
+    installed is reused.
+    """
+    global _installed
+    with _install_lock:
+        installed = _installed
+        if installed is not None and (
+            logger_config is None or logger_config == installed.config
+        ):
+            return installed
+        if logger_config is None:
+            logger_config = get_config().logger
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        if installed is not None:
+            for handler in installed.handlers:
+                root.removeHandler(handler)
+            installed.close()
+        installed = _HandlerSet(logger_config)
+        for handler in installed.handlers:
+            root.addHandler(handler)
+        root.setLevel(installed.level)
+        _installed = installed
+        return installed
+
+
+def shutdown() -> None:
+    """Flush and remove the shared handlers; the next Logger reinstalls them."""
+    global _installed
+    with _install_lock:
+        installed, _installed = _installed, None
+        if installed is None:
+            return
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in installed.handlers:
+            root.removeHandler(handler)
+        installed.close()
+
+
+atexit.register(shutdown)
+
+
+class Logger:
+    """
+    A component's view of the process-wide logging setup.
+
+    Every Logger writes through one shared set of console/file handlers,
+    installed from the first config given. Constructing a Logger with a
+    different logger config replaces that set; one without a config joins
+    whatever is installed. `name` picks the child logger
+    (`metar_map.<name>`) records are attributed to.
+    """
+
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        config: Optional[Config] = None,
+        name: Optional[str] = None,
+    ):
+        if config is None and config_path is not None:
+            config = get_config(config_path=config_path)
+        _install(config.logger if config is not None else None)
+        self.logger = logging.getLogger(
+            ROOT_LOGGER_NAME if name is None else f"{ROOT_LOGGER_NAME}.{name}"
+        )
+
+    @property
+    def handlers(self) -> list[logging.Handler]:
+        """The shared console and file handlers, whether queued or not."""
+        installed = _installed
+        return list(installed.output) if installed is not None else []
+
+    def isEnabledFor(self, level: int) -> bool:
+        """Guard for log calls whose arguments are expensive to build."""
+        return self.logger.isEnabledFor(level)
+
+    def close(self) -> None:
+        """Flush queued records and release the shared handlers."""
+        shutdown()
 
     def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
         self.logger.debug(msg, *args, **kwargs)
@@ -0,0 +1,126 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# Statute miles per metre, for visibilities reported in metres
+SM_PER_M = 1 / 1609.344
+KT_PER_MPS = 1.943844
+
+_PHENOMENA = "DZ|RA|SN|SG|IC|PL|GR|GS|UP|BR|FG|FU|VA|DU|SA|HZ|PY|PO|SQ|FC|SS|DS"
+# One alternative per group the display needs, each a whole token after a
+# space; a single finditer over the report finds them all and skips the rest
+_GROUPS = re.compile(
+    rf"""\x20(?:
+        (?P<wind>(?P<direction>\d{{3}}|VRB)(?P<speed>\d{{2,3}})
+            (?:G(?P<gust>\d{{2,3}}))?(?P<unit>KT|MPS))
+      | [MP]?(?:(?P<miles>\d{{1,2}})
+            |(?:(?P<whole>\d)\x20)?(?P<numerator>\d)/(?P<denominator>\d{{1,2}}))SM
+      | (?P<metres>\d{{4}})(?:NDV)?
+      | (?P<cavok>CAVOK)
+      | (?:BKN|OVC|VV)(?P<height>\d{{3}})(?:CB|TCU)?
+      | (?P<weather>[-+]?(?:VC)?
+            (?:(?:MI|PR|BC|DR|BL|SH|TS|FZ)(?:{_PHENOMENA})*|(?:{_PHENOMENA})+))
+    )(?!\S)""",
+    re.VERBOSE,
+)
+_TIME = re.compile(r"\d{6}Z(?!\S)")
+# Groups that end the observation proper
+_END = re.compile(r"\s(?:RMK|TEMPO|BECMG|NOSIG)(?!\S)")
+
+
+@dataclass(slots=True, frozen=True)
+class DecodedMetar:
+    """What the map needs from a raw METAR. None where it wasn't reported."""
+
+    wind_direction: Optional[int] = None  # None for variable winds
+    wind_speed_kt: Optional[int] = None
+    wind_gust_kt: Optional[int] = None
+    visibility_sm: Optional[float] = None
+    # Lowest broken or overcast layer, or vertical visibility, in feet
+    ceiling_ft: Optional[int] = None
+    # Present weather groups, e.g. ("-TSRA", "BR")
+    weather: tuple[str, ...] = ()
+    lightning: bool = False
+    snow: bool = False
+
+    @property
+    def flight_category(self) -> Optional[str]:
+        return flight_category(self.visibility_sm, self.ceiling_ft)
+
+
+def flight_category(
+    visibility_sm: Optional[float], ceiling_ft: Optional[int]
+) -> Optional[str]:
+    """
+    The FAA flight category for a visibility and ceiling; a missing ceiling
+    counts as unlimited. None if neither was reported.
+    """
+    if visibility_sm is None and ceiling_ft is None:
+        return None
+    visibility = float("inf") if visibility_sm is None else visibility_sm
+    ceiling = float("inf") if ceiling_ft is None else ceiling_ft
+    if ceiling < 500 or visibility < 1:
+        return "LIFR"
+    if ceiling < 1000 or visibility < 3:
+        return "IFR"
+    if ceiling <= 3000 or visibility <= 5:
+        return "MVFR"
+    return "VFR"
+
+
+# Most refreshes return the same report as the last one for most stations
+@lru_cache(maxsize=8192)
+def decode_metar(raw: str) -> DecodedMetar:
+    """
+    Decode the groups of `raw` that decide the display, in one pass over the
+    observation. Groups it doesn't recognise are skipped.
+    """
+    text = raw.upper()
+    # Start after the report time, or the station if there is none
+    time_group = _TIME.search(text)
+    start = time_group.end() if time_group else max(text.find(" "), 0)
+    end_group = _END.search(text, start)
+    end = end_group.start() if end_group else len(text)
+    wind_direction = wind_speed = wind_gust = ceiling = None
+    visibility: Optional[float] = None
+    weather: list[str] = []
+    for match in _GROUPS.finditer(text, start, end):
+        group = match.lastgroup
+        if group == "weather":
+            weather.append(match["weather"])
+        elif group == "wind":
+            scale = KT_PER_MPS if match["unit"] == "MPS" else 1
+            direction = match["direction"]
+            gust = match["gust"]
+            wind_direction = None if direction == "VRB" else int(direction)
+            wind_speed = round(int(match["speed"]) * scale)
+            wind_gust = round(int(gust) * scale) if gust else None
+        elif group == "height":
+            base = int(match["height"]) * 100
+            if ceiling is None or base < ceiling:
+                ceiling = base
+        elif group == "miles":
+            visibility = float(match["miles"])
+        elif group == "denominator":
+            denominator = int(match["denominator"])
+            if denominator:
+                visibility = int(match["numerator"]) / denominator
+                visibility += int(match["whole"] or 0)
+        elif group == "metres":
+            if visibility is None:
+                # 9999 means 10 km or more
+                metres = int(match["metres"])
+                visibility = 10.0 if metres == 9999 else metres * SM_PER_M
+        elif group == "cavok":
+            visibility = 10.0
+    return DecodedMetar(
+        wind_direction=wind_direction,
+        wind_speed_kt=wind_speed,
+        wind_gust_kt=wind_gust,
+        visibility_sm=visibility,
+        ceiling_ft=ceiling,
+        weather=tuple(weather),
+        lightning="LTG" in text or any("TS" in w for w in weather),
+        snow=any("SN" in w or "SG" in w for w in weather),
+    )
@@ -0,0 +1,138 @@
+import threading
+from array import array
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds in seconds
+FRAME_BUCKETS_S = (0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066, 0.1)
+FETCH_BUCKETS_S = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() only increments preallocated arrays,
+    so it is cheap enough for the render loop. It is written by one thread;
+    a scrape from another may see a count and sum one observation apart.
+    """
+
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # One count per bucket, plus +Inf
+        self.counts = array("q", [0]) * (len(self.bounds) + 1)
+        self.total = array("d", [0.0])
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total[0] += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+def _labels(labels: Optional[Mapping[str, Any]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """Builds a scrape in the Prometheus text exposition format."""
+
+    def __init__(self, prefix: str = "metar_map_"):
+        self.prefix = prefix
+        self._lines: list[str] = []
+        self._declared: set[str] = set()
+
+    def _declare(self, name: str, kind: str, help_text: str) -> str:
+        name = self.prefix + name
+        if name not in self._declared:
+            self._declared.add(name)
+            self._lines.append(f"# HELP {name} {help_text}")
+            self._lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def counter(
+        self,
+        name: str,
+        help_text: str,
+        value: float,
+        labels: Optional[Mapping[str, Any]] = None,
+    ):
+        name = self._declare(name, "counter", help_text)
+        self._lines.append(f"{name}{_labels(labels)} {value}")
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        value: Optional[float],
+        labels: Optional[Mapping[str, Any]] = None,
+    ):
+        name = self._declare(name, "gauge", help_text)
+        self._lines.append(
+            f"{name}{_labels(labels)} {'NaN' if value is None else value}"
+        )
+
+    def histogram(self, name: str, help_text: str, histogram: Histogram):
+        name = self._declare(name, "histogram", help_text)
+        counts = list(histogram.counts)
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, counts):
+            cumulative += count
+            self._lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        self._lines.append(f'{name}_bucket{{le="+Inf"}} {cumulative}')
+        self._lines.append(f"{name}_sum {histogram.total[0]}")
+        self._lines.append(f"{name}_count {cumulative}")
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves `collect()` at /metrics from a background thread. The counters it
+    reports are kept by their owners all the time; a scrape only reads them.
+    """
+
+    def __init__(
+        self, collect: Callable[[], str], host: str = "127.0.0.1", port: int = 9110
+    ):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = collect().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics", daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
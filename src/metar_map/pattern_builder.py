@@ -1,8 +1,11 @@
+import math
 from enum import Enum
 from dataclasses import dataclass
-from typing import Any, Optional
+from itertools import product
+from typing import Any, Mapping, Optional
 
-from metar_map.config import load_config
+from metar_map import tracing
+from metar_map.config import Config, get_config
 
 
 class LEDColor(Enum):
@@ -21,41 +24,115 @@ class LEDColor(Enum):
         return self.value
 
 
-@dataclass
+@dataclass(frozen=True)
 class LEDPattern:
     color: LEDColor
     total_duration_s: float = 10.0
     blink: bool = False
     blink_speed_s: float = 0.5
+    # Seconds to fade into this pattern and between its blink states; only
+    # used by the fading renderer
+    fade_s: float = 0.0
 
 
-def _map_to_led_pattern(config: Any) -> LEDPattern:
+# Patterns layered on top of the flight category pattern, in display order
+CONDITION_PATTERNS = ("LIGHTNING", "SNOW", "GUSTS")
+
+# Shown in place of a station's weather once its data is too old
+STALE_PATTERN = "STALE"
+
+PatternKey = tuple[Optional[str], bool, bool, bool]
+
+
+def _seconds(
+    name: str, config: Mapping[str, Any], key: str, default: float, positive: bool
+) -> float:
+    """`config[key]` as seconds, or `default` when it is left out."""
+    value = config.get(key)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"LED pattern `{name}` `{key}` must be a number, got `{value}`"
+        ) from None
+    if not math.isfinite(seconds) or seconds < 0 or (positive and seconds == 0):
+        raise ValueError(f"LED pattern `{name}` `{key}` is out of range: {value}")
+    return seconds
+
+
+def _map_to_led_pattern(name: str, config: Any) -> LEDPattern:
+    if not isinstance(config, Mapping):
+        raise ValueError(f"LED pattern `{name}` is missing or not a mapping")
+    color = str(config.get("color", "")).upper()
+    if color not in LEDColor.__members__:
+        raise ValueError(f"LED pattern `{name}` has unknown color `{color}`")
+    blink = config.get("blink", LEDPattern.blink)
+    if not isinstance(blink, bool):
+        raise ValueError(f"LED pattern `{name}` `blink` must be true or false")
+    # Left-out settings take the LEDPattern defaults
     return LEDPattern(
-        color=LEDColor[config.get("color").upper()],
-        total_duration_s=config.get("duration"),
-        blink=config.get("blink"),
-        blink_speed_s=config.get("blink_speed"),
+        color=LEDColor[color],
+        total_duration_s=_seconds(
+            name, config, "duration", LEDPattern.total_duration_s, positive=True
+        ),
+        blink=blink,
+        blink_speed_s=_seconds(
+            name, config, "blink_speed", LEDPattern.blink_speed_s, positive=True
+        ),
+        fade_s=_seconds(name, config, "fade", LEDPattern.fade_s, positive=False),
     )
 
 
 class LEDPatternBuilder:
-    def __init__(self, config_path: Optional[str] = None):
-        self._config = load_config(config_path=config_path)
+    """
+    Builds the LED pattern sequence for a station. Every combination of
+    flight category and weather condition is compiled once from the config,
+    so each lookup returns the same shared tuple.
+    """
+
+    def __init__(
+        self, config_path: Optional[str] = None, config: Optional[Config] = None
+    ):
+        if config is None:
+            config = get_config(config_path=config_path)
+        self._table = self._compile(config.led_patterns)
+
+    @staticmethod
+    def _compile(
+        led_patterns: dict[str, Any],
+    ) -> dict[PatternKey, tuple[LEDPattern, ...]]:
+        conditions = [
+            _map_to_led_pattern(name, led_patterns.get(name))
+            for name in CONDITION_PATTERNS
+        ]
+        categories: dict[Optional[str], tuple[LEDPattern, ...]] = {None: ()}
+        for name, category_config in led_patterns.items():
+            if name not in CONDITION_PATTERNS:
+                categories[name] = (_map_to_led_pattern(name, category_config),)
+
+        table: dict[PatternKey, tuple[LEDPattern, ...]] = {}
+        for category, base in categories.items():
+            for flags in product((False, True), repeat=len(CONDITION_PATTERNS)):
+                table[(category, *flags)] = base + tuple(
+                    pattern for pattern, on in zip(conditions, flags) if on
+                )
+        return table
 
     def build_led_patterns(
         self, flight_category: str, lightning: bool, snow: bool, gusts: bool
-    ) -> list[LEDPattern]:
-        patterns: list[LEDPattern] = []
-        led_patterns = self._config.get("led_patterns", {})
-        category_config = led_patterns.get(flight_category)
-
-        if category_config:
-            patterns.append(_map_to_led_pattern(category_config))
-        if lightning:
-            patterns.append(_map_to_led_pattern(led_patterns.get("LIGHTNING")))
-        if snow:
-            patterns.append(_map_to_led_pattern(led_patterns.get("SNOW")))
-        if gusts:
-            patterns.append(_map_to_led_pattern(led_patterns.get("GUSTS")))
-
-        return patterns
+    ) -> tuple[LEDPattern, ...]:
+        with tracing.span("build_led_patterns"):
+            key = (flight_category, bool(lightning), bool(snow), bool(gusts))
+            patterns = self._table.get(key)
+            if patterns is None:
+                # Unknown categories only show their weather conditions
+                patterns = self._table[(None, *key[1:])]
+            return patterns
+
+    def build_stale_patterns(self) -> Optional[tuple[LEDPattern, ...]]:
+        """The STALE pattern, or None if the config doesn't define one."""
+        return self._table.get((STALE_PATTERN, False, False, False))
@@ -0,0 +1,97 @@
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+FunctionKey = tuple[str, int, str]
+
+
+def _key(frame: FrameType) -> FunctionKey:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at `interval_s` and saves them in
+    cProfile's format, so `python -m pstats` or snakeviz can read them.
+    Unlike cProfile it sees all threads and costs nothing until it runs;
+    call counts are sample counts and times are estimates.
+    """
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self.samples = 0
+        self._self: Counter[FunctionKey] = Counter()
+        self._total: Counter[FunctionKey] = Counter()
+        # (caller, callee) -> samples with the callee called from the caller
+        self._edges: Counter[tuple[FunctionKey, FunctionKey]] = Counter()
+
+    def sample(self, skip: Optional[int] = None):
+        """Take one sample of every thread except `skip` (a thread ident)."""
+        self.samples += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            seen: set[FunctionKey] = set()
+            callee: Optional[FunctionKey] = None
+            current: Optional[FrameType] = frame
+            while current is not None:
+                key = _key(current)
+                if callee is None:
+                    self._self[key] += 1
+                else:
+                    self._edges[(key, callee)] += 1
+                if key not in seen:
+                    seen.add(key)
+                    self._total[key] += 1
+                callee = key
+                current = current.f_back
+
+    def run(self, duration_s: float):
+        """Sample for `duration_s` on the calling thread."""
+        me = threading.get_ident()
+        deadline = time.monotonic() + duration_s
+        while time.monotonic() < deadline:
+            self.sample(skip=me)
+            time.sleep(self.interval_s)
+
+    def stats(self) -> dict:
+        """The samples as a pstats table: (cc, nc, tt, ct, callers) per function."""
+        interval = self.interval_s
+        callers: dict[FunctionKey, dict] = {}
+        for (caller, callee), count in self._edges.items():
+            callers.setdefault(callee, {})[caller] = (
+                count,
+                count,
+                0.0,
+                count * interval,
+            )
+        return {
+            key: (
+                total,
+                total,
+                self._self[key] * interval,
+                total * interval,
+                callers.get(key, {}),
+            )
+            for key, total in self._total.items()
+        }
+
+    def dump(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            marshal.dump(self.stats(), f)
+
+
+def profile_to_file(directory: str, duration_s: float) -> str:
+    """Profile every thread for `duration_s` and save it; returns the path."""
+    profiler = SamplingProfiler()
+    profiler.run(duration_s)
+    path = str(Path(directory) / time.strftime("profile-%Y%m%d-%H%M%S.prof"))
+    profiler.dump(path)
+    return path
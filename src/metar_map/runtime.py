@@ -0,0 +1,301 @@
+import asyncio
+import math
+import queue
+import signal
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from metar_map.config_watcher import ConfigWatcher
+from metar_map.logger import Logger
+from metar_map.profiler import profile_to_file
+from metar_map.scheduler import RefreshScheduler
+
+T = TypeVar("T")
+
+
+class Clock:
+    """Monotonic time and sleeps for the runtime; tests substitute a fake."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+def _settle(future: "asyncio.Future[Any]", result: Any, error: Any):
+    if not future.done():
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class NetworkWorker:
+    """
+    Runs blocking calls one at a time on a daemon thread. Fetches and reloads
+    share the client's session and METAR cache, so they must not overlap; as
+    a daemon, a request still in flight doesn't hold up the process exiting.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._jobs: queue.SimpleQueue[Optional[tuple[Callable[[], Any], Any]]] = (
+            queue.SimpleQueue()
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="metar-map-network", daemon=True
+        )
+        self._thread.start()
+
+    async def run(self, fn: Callable[[], T]) -> T:
+        future: asyncio.Future[T] = self._loop.create_future()
+        self._jobs.put((fn, future))
+        return await future
+
+    def shutdown(self):
+        """Drop queued calls; one in progress finishes in the background."""
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            fn, future = job
+            result = error = None
+            try:
+                result = fn()
+            except Exception as e:
+                error = e
+            try:
+                self._loop.call_soon_threadsafe(_settle, future, result, error)
+            except RuntimeError:
+                # The runtime stopped and closed its loop while this ran
+                return
+
+
+def next_tick(anchor: float, interval: float, now: float) -> float:
+    """The first time on the grid `anchor + k * interval` after `now`."""
+    return anchor + (math.floor((now - anchor) / interval) + 1) * interval
+
+
+class Runtime:
+    """
+    Runs a MetarMap on an asyncio event loop as separate tasks:
+
+    - refresh: fetches every mapped station on a drift-free `refresh_time`
+      grid, or with `schedule.adaptive` only the stations RefreshScheduler
+      says are due, on the network thread
+    - leds: applies each fetch to the pattern table
+    - reload: applies config changes, found by the watch task or SIGHUP
+    - watch: polls the config file
+    - health: logs a status line every `health_interval_s`
+
+    Sleeps are cancelled on stop(), SIGTERM or SIGINT, so shutdown doesn't
+    wait out a refresh interval. A request still in flight is abandoned on
+    the network thread, a daemon, so the process can exit without waiting
+    for it. SIGHUP reloads the config and SIGUSR1 profiles every thread for
+    `tracing.profile_seconds`.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        clock: Optional[Clock] = None,
+        watch_interval_s: float = 2.0,
+        health_interval_s: float = 300.0,
+    ):
+        self.app = app
+        self.clock = clock if clock is not None else Clock()
+        self.watch_interval_s = watch_interval_s
+        self.health_interval_s = health_interval_s
+        self.logger = Logger(name="runtime")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._reload_event: Optional[asyncio.Event] = None
+        self._profile_thread: Optional[threading.Thread] = None
+
+    def stop(self):
+        """Ask the runtime to shut down; safe to call from any thread."""
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stop_event.set)
+
+    def reload(self):
+        """Ask the runtime to re-read the config file."""
+        loop, reload_event = self._loop, self._reload_event
+        if loop is not None and reload_event is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(reload_event.set)
+
+    def profile(self) -> bool:
+        """
+        Profile every thread in the background and save the result to the
+        configured directory. Returns False if a profile is already running.
+        """
+        if self._profile_thread is not None and self._profile_thread.is_alive():
+            self.logger.warning("A profile is already running")
+            return False
+        settings = self.app.config.tracing
+
+        def run():
+            self.logger.info("Profiling for %gs", settings.profile_s)
+            try:
+                path = profile_to_file(settings.profile_dir, settings.profile_s)
+            except OSError as e:
+                self.logger.error("Profile failed: %s", e)
+                return
+            self.logger.info("Saved profile to %s", path)
+
+        self._profile_thread = threading.Thread(
+            target=run, name="profiler", daemon=True
+        )
+        self._profile_thread.start()
+        return True
+
+    async def run(self):
+        """Run until stopped, then stop the LED controller."""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._reload_event = asyncio.Event()
+        # Fetched stations, and the codes requested (None for every station)
+        self._updates: asyncio.Queue[tuple[list[Any], Optional[list[str]]]] = (
+            asyncio.Queue()
+        )
+        # Serializes changes to the app's stations, patterns and config
+        self._state_lock = asyncio.Lock()
+        # Fetches and reloads take turns on one thread
+        self._network = NetworkWorker(self._loop)
+        signals = self._install_signal_handlers()
+        tasks = [
+            asyncio.create_task(coro, name=name)
+            for name, coro in (
+                ("refresh", self._refresh_loop()),
+                ("leds", self._led_loop()),
+                ("reload", self._reload_loop()),
+                ("watch", self._watch_loop()),
+                ("health", self._health_loop()),
+            )
+        ]
+        stopped = asyncio.create_task(self._stop_event.wait())
+        try:
+            done, _ = await asyncio.wait(
+                [stopped, *tasks], return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task is not stopped:
+                    # The loops only end by raising; stop everything and report it
+                    task.result()
+        finally:
+            for task in (stopped, *tasks):
+                task.cancel()
+            await asyncio.gather(stopped, *tasks, return_exceptions=True)
+            for sig in signals:
+                self._loop.remove_signal_handler(sig)
+            self._network.shutdown()
+            self.app.controller.stop()
+            self.logger.info("Stopped")
+
+    def _install_signal_handlers(self) -> list[int]:
+        if threading.current_thread() is not threading.main_thread():
+            return []
+        assert self._loop is not None
+        assert self._stop_event is not None and self._reload_event is not None
+        handlers: dict[int, Callable[[], None]] = {
+            signal.SIGTERM: self._stop_event.set,
+            signal.SIGINT: self._stop_event.set,
+            signal.SIGHUP: self._reload_event.set,
+            signal.SIGUSR1: self.profile,
+        }
+        for sig, handler in handlers.items():
+            self._loop.add_signal_handler(sig, handler)
+        return list(handlers)
+
+    async def _in_thread(self, fn: Callable[[], T]) -> T:
+        return await self._network.run(fn)
+
+    async def _refresh_loop(self):
+        if self.app.config.schedule.adaptive:
+            await self._scheduled_refresh_loop()
+            return
+        anchor = self.clock.monotonic()
+        while True:
+            try:
+                stations = await self._in_thread(self.app.fetch)
+            except Exception as e:
+                self.logger.error("Refresh failed: %s", e)
+            else:
+                await self._updates.put((stations, None))
+            interval = self.app.config.refresh_time
+            now = self.clock.monotonic()
+            tick = next_tick(anchor, interval, now)
+            if tick - anchor > interval:
+                self.logger.warning(
+                    "Refresh took %.0fs; skipping to the next interval", now - anchor
+                )
+            anchor = tick
+            await self.clock.sleep(tick - now)
+
+    async def _scheduled_refresh_loop(self):
+        """Fetch only the stations the RefreshScheduler says are due."""
+        config = self.app.config
+        scheduler = RefreshScheduler(
+            config.schedule,
+            max_interval_s=config.refresh_time,
+            batch_size=config.fetch.batch_size,
+            stations=self.app.station_codes(),
+            now=self.clock.monotonic(),
+        )
+        while True:
+            now = self.clock.monotonic()
+            # Picks up stations and limits changed by a reload
+            config = self.app.config
+            scheduler.max_interval_s = config.refresh_time
+            scheduler.batch_size = config.fetch.batch_size
+            scheduler.set_stations(self.app.station_codes(), now)
+            codes = scheduler.due(now)
+            if codes:
+                try:
+                    stations = await self._in_thread(lambda: self.app.fetch(codes))
+                except Exception as e:
+                    self.logger.error("Refresh failed: %s", e)
+                else:
+                    scheduler.record(codes, stations, self.clock.monotonic())
+                    await self._updates.put((stations, codes))
+            now = self.clock.monotonic()
+            await self.clock.sleep(max(1.0, scheduler.next_due(now) - now))
+
+    async def _led_loop(self):
+        while True:
+            stations, codes = await self._updates.get()
+            async with self._state_lock:
+                self.app.apply_stations(stations, codes)
+
+    async def _reload_loop(self):
+        assert self._reload_event is not None
+        while True:
+            await self._reload_event.wait()
+            self._reload_event.clear()
+            async with self._state_lock:
+                try:
+                    # Newly mapped stations are fetched, so keep this off the loop
+                    await self._in_thread(self.app.reload_config)
+                except Exception as e:
+                    self.logger.error("Reload failed: %s", e)
+
+    async def _watch_loop(self):
+        assert self._reload_event is not None
+        watcher = ConfigWatcher(self.app.config.path, self._reload_event.set)
+        while True:
+            await self.clock.sleep(self.watch_interval_s)
+            watcher.check()
+
+    async def _health_loop(self):
+        while True:
+            await self.clock.sleep(self.health_interval_s)
+            health = self.app.health()
+            self.logger.info(
+                "Health: %s",
+                " ".join(f"{key}={value}" for key, value in health.items()),
+            )
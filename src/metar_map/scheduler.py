@@ -0,0 +1,167 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence
+
+from metar_map.client import MetarData
+from metar_map.config import ScheduleConfig
+
+# Routine METARs are issued hourly
+ROUTINE_INTERVAL_S = 3600.0
+VOLATILE_CATEGORIES = ("MVFR", "IFR", "LIFR")
+
+
+def is_volatile(data: MetarData) -> bool:
+    """Whether a station's weather is likely to change before the next METAR."""
+    return (
+        data.metar_type == "SPECI"
+        or data.lightning
+        or data.gusty
+        or data.flight_category in VOLATILE_CATEGORIES
+    )
+
+
+@dataclass(slots=True)
+class _Station:
+    next_due: float = 0.0
+    volatile: bool = False
+    observation_time: Optional[int] = None
+
+
+class RefreshScheduler:
+    """
+    Decides which stations to fetch and when.
+
+    Each station is due when its next routine METAR should have been
+    published (its last observation time plus an hour plus
+    `publish_delay_s`), and every `volatile_interval_s` while it is volatile
+    (see is_volatile) or its next report is overdue, but never less often
+    than every `max_interval_s`. Due stations go out in as few requests of
+    `batch_size` as possible, topped up with the stations due next, and
+    requests are drawn from a budget of `requests_per_hour`.
+
+    Times are in the caller's monotonic clock; observation times are epoch
+    seconds and are converted with the wall clock passed to record().
+    """
+
+    def __init__(
+        self,
+        settings: ScheduleConfig,
+        max_interval_s: float,
+        batch_size: int,
+        stations: Sequence[str] = (),
+        now: float = 0.0,
+    ):
+        self.settings = settings
+        self.max_interval_s = max_interval_s
+        self.batch_size = max(1, batch_size)
+        rate = settings.requests_per_hour / ROUTINE_INTERVAL_S
+        self._rate = rate
+        # Up to five minutes of requests can be spent at once
+        self._capacity = max(1.0, settings.requests_per_hour / 12)
+        self._tokens = self._capacity
+        self._refilled_at = now
+        self._stations: dict[str, _Station] = {}
+        self.requests = 0
+        self.set_stations(stations, now)
+
+    def set_stations(self, stations: Iterable[str], now: float):
+        """Track exactly `stations`; new ones are due at once."""
+        wanted = dict.fromkeys(stations)
+        for icao in list(self._stations):
+            if icao not in wanted:
+                del self._stations[icao]
+        for icao in wanted:
+            if icao not in self._stations:
+                self._stations[icao] = _Station(next_due=now)
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._refilled_at) * self._rate
+        )
+        self._refilled_at = now
+
+    def due(self, now: float) -> list[str]:
+        """
+        Stations to fetch now, most urgent first, and spend the requests
+        they take. Empty if nothing is due or the budget is spent.
+        """
+        self._refill(now)
+        stations = self._stations
+        due = [icao for icao, s in stations.items() if s.next_due <= now]
+        if not due or self._tokens < 1:
+            return []
+        due.sort(
+            key=lambda icao: (not stations[icao].volatile, stations[icao].next_due)
+        )
+        requests = min(math.ceil(len(due) / self.batch_size), int(self._tokens))
+        capacity = requests * self.batch_size
+        picked = due[:capacity]
+        if len(picked) < capacity:
+            # The last request has room; fill it with the stations due soonest
+            horizon = now + self.settings.volatile_interval_s
+            soon = sorted(
+                (icao for icao, s in stations.items() if now < s.next_due <= horizon),
+                key=lambda icao: stations[icao].next_due,
+            )
+            picked += soon[: capacity - len(picked)]
+        self._tokens -= requests
+        self.requests += requests
+        # Until record() says otherwise, e.g. when the request fails
+        retry_at = now + self.settings.volatile_interval_s
+        for icao in picked:
+            stations[icao].next_due = retry_at
+        return picked
+
+    def record(
+        self,
+        requested: Iterable[str],
+        results: Iterable[MetarData],
+        now: float,
+        wall_now: Optional[float] = None,
+    ):
+        """Reschedule the stations of a completed fetch from their data."""
+        if wall_now is None:
+            wall_now = time.time()
+        settings = self.settings
+        stations = self._stations
+        received: set[str] = set()
+        for data in results:
+            station = stations.get(data.icao or "")
+            if station is None:
+                continue
+            received.add(data.icao or "")
+            station.volatile = is_volatile(data)
+            station.observation_time = data.observation_time
+            next_due = now + self.max_interval_s
+            if data.observation_time:
+                expected = now + (
+                    data.observation_time
+                    + ROUTINE_INTERVAL_S
+                    + settings.publish_delay_s
+                    - wall_now
+                )
+                # An overdue report is looked for like a volatile station
+                next_due = min(
+                    next_due,
+                    max(expected, now + settings.volatile_interval_s),
+                )
+            if station.volatile:
+                next_due = min(next_due, now + settings.volatile_interval_s)
+            station.next_due = next_due
+        for icao in requested:
+            station = stations.get(icao)
+            # Stations the server had nothing for are rarely worth asking about
+            if station is not None and icao not in received:
+                station.next_due = now + self.max_interval_s
+
+    def next_due(self, now: float) -> float:
+        """When due() will next have something to return."""
+        earliest = min(
+            (s.next_due for s in self._stations.values()),
+            default=now + self.max_interval_s,
+        )
+        self._refill(now)
+        if self._tokens < 1:
+            earliest = max(earliest, now + (1 - self._tokens) / self._rate)
+        return earliest
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+from metar_map.client import MetarData
+from metar_map.pattern_builder import PatternKey
+
+
+def display_key(data: MetarData) -> PatternKey:
+    """Everything about a station that decides its LED patterns."""
+    return (data.flight_category, data.lightning, data.snowing, data.gusty)
+
+
+@dataclass(frozen=True, slots=True)
+class DiffCounts:
+    """Stations of one refresh by whether their display changed."""
+
+    changed: int = 0
+    unchanged: int = 0
+    # Requested but not in the payload; they keep their last display
+    missing: int = 0
+
+
+class StationDiff:
+    """
+    Remembers each station's display state between refreshes, so only the
+    stations whose LEDs would look different are passed on.
+    """
+
+    def __init__(self):
+        self._keys: dict[str, PatternKey] = {}
+
+    def update(
+        self, stations: Iterable[MetarData], requested: Iterable[str]
+    ) -> tuple[set[str], DiffCounts]:
+        """
+        Record a refresh of `requested` stations that returned `stations`.
+        Returns the stations whose display changed, and the counts.
+        """
+        keys = self._keys
+        changed: set[str] = set()
+        received: set[str] = set()
+        for data in stations:
+            icao = data.icao
+            if not icao:
+                continue
+            received.add(icao)
+            key = display_key(data)
+            if keys.get(icao) != key:
+                keys[icao] = key
+                changed.add(icao)
+        missing = sum(1 for icao in set(requested) if icao not in received)
+        return changed, DiffCounts(
+            changed=len(changed),
+            unchanged=len(received) - len(changed),
+            missing=missing,
+        )
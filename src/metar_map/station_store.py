@@ -0,0 +1,65 @@
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from metar_map.client import MetarData
+
+
+@dataclass(frozen=True, slots=True)
+class StationRecord:
+    data: MetarData
+    # Epoch seconds the data was fetched, or None if it came from a snapshot
+    fetched_at: Optional[float] = None
+
+    def age_s(self, now: float) -> Optional[float]:
+        """
+        Seconds since the observation, or since the fetch for data without an
+        observation time. Refetching an old report doesn't make it younger.
+        """
+        since = self.data.observation_time
+        if since is None:
+            since = self.fetched_at
+        return None if since is None else max(0.0, now - since)
+
+
+class StationStore:
+    """
+    The last good data for each station. A station keeps its data through
+    failed fetches and refreshes that leave it out, however old it gets;
+    stale() says which have outlived a maximum age.
+    """
+
+    def __init__(self):
+        self._records: dict[str, StationRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, icao: object) -> bool:
+        return icao in self._records
+
+    def get(self, icao: str) -> Optional[MetarData]:
+        record = self._records.get(icao)
+        return None if record is None else record.data
+
+    def update(self, stations: Iterable[MetarData], fetched_at: Optional[float]):
+        """Keep `stations`, fetched at `fetched_at` (None for snapshot data)."""
+        for data in stations:
+            if data.icao:
+                self._records[data.icao] = StationRecord(data, fetched_at)
+
+    def stale(
+        self, icaos: Iterable[str], max_age_s: float, now: Optional[float] = None
+    ) -> set[str]:
+        """Those of `icaos` whose data is older than `max_age_s`."""
+        if now is None:
+            now = time.time()
+        stale: set[str] = set()
+        for icao in icaos:
+            record = self._records.get(icao)
+            if record is None:
+                continue
+            age = record.age_s(now)
+            if age is not None and age > max_age_s:
+                stale.add(icao)
+        return stale
@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Optional
+
+from metar_map.config import TracingConfig
+
+# Set to anything but "" or "0" to trace regardless of the config
+TRACE_ENV = "METAR_MAP_TRACE"
+FLUSH_INTERVAL_S = 1.0
+
+_NULL_SPAN: ContextManager[None] = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start_ns")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+
+    def __exit__(self, *exc: Any):
+        self.tracer.record(self.name, self.start_ns, time.perf_counter_ns())
+
+
+class Tracer:
+    """
+    Records spans as Chrome trace events (load the file in chrome://tracing
+    or Perfetto). Callers only append to a queue; a background thread writes
+    the events out, starting a new file once one reaches `max_bytes`.
+    """
+
+    def __init__(self, settings: TracingConfig):
+        self.settings = settings
+        self.path = Path(settings.file)
+        self._events: deque[tuple[str, int, int, int]] = deque()
+        self._frames = 0
+        # Whether the render thread's current frame is being traced
+        self.frame_sampled = False
+        self._pid = os.getpid()
+        self._thread_names: dict[int, str] = {}
+        self._file: Optional[Any] = None
+        self._size = 0
+        self._first = True
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tracing", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._flush()
+        self._close()
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        self._events.append((name, start_ns, end_ns, threading.get_ident()))
+
+    def next_frame(self):
+        """Decide whether the render thread traces the frame it is starting."""
+        self._frames += 1
+        self.frame_sampled = self._frames % self.settings.frame_sample == 0
+
+    def _run(self):
+        while not self._stop_event.wait(FLUSH_INTERVAL_S):
+            self._flush()
+
+    def _flush(self):
+        events = self._events
+        if not events:
+            return
+        names = {t.ident: t.name for t in threading.enumerate()}
+        lines: list[str] = []
+        for _ in range(len(events)):
+            name, start_ns, end_ns, tid = events.popleft()
+            if tid not in self._thread_names:
+                self._thread_names[tid] = names.get(tid, str(tid))
+                lines.append(self._thread_name_event(tid))
+            lines.append(
+                json.dumps(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": start_ns / 1000,
+                        "dur": (end_ns - start_ns) / 1000,
+                        "pid": self._pid,
+                        "tid": tid,
+                    }
+                )
+            )
+        self._write(lines)
+
+    def _thread_name_event(self, tid: int) -> str:
+        return json.dumps(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": self._thread_names[tid]},
+            }
+        )
+
+    def _write(self, lines: list[str]):
+        if self._file is None:
+            self._open()
+        assert self._file is not None
+        text = ("[\n" if self._first else ",\n") + ",\n".join(lines)
+        self._first = False
+        self._file.write(text)
+        self._file.flush()
+        self._size += len(text)
+        if self._size >= self.settings.max_bytes:
+            self._close()
+            self._rotate()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+        self._first = True
+        # Every file names the threads it shows
+        known = [self._thread_name_event(tid) for tid in self._thread_names]
+        if known:
+            self._write(known)
+
+    def _close(self):
+        if self._file is not None:
+            if not self._first:
+                self._file.write("\n]\n")
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        backups = self.settings.backup_count
+        if backups <= 0:
+            return
+        for index in range(backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enabled(settings: TracingConfig) -> bool:
+    return settings.enabled or os.environ.get(TRACE_ENV, "") not in ("", "0")
+
+
+def start(settings: TracingConfig) -> Optional[Tracer]:
+    """Start tracing if the config or environment asks for it."""
+    global _tracer
+    if _tracer is not None or not enabled(settings):
+        return _tracer
+    _tracer = Tracer(settings)
+    _tracer.start()
+    return _tracer
+
+
+def stop():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.stop()
+
+
+def span(name: str) -> ContextManager[None]:
+    """A span around the `with` block, or a no-op while tracing is off."""
+    tracer = _tracer
+    return _NULL_SPAN if tracer is None else _Span(tracer, name)
+
+
+def next_frame():
+    """Called by the render thread at the start of every frame."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.next_frame()
+
+
+def frame_span(name: str) -> ContextManager[None]:
+    """A span on the render thread, recorded only in sampled frames."""
+    tracer = _tracer
+    if tracer is None or not tracer.frame_sampled:
+        return _NULL_SPAN
+    return _Span(tracer, name)
@@ -0,0 +1,137 @@
+"""
+Shared fixtures: a local stub of the aviationweather.gov METAR endpoint, and a
+scratch working directory for every test.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+def make_station(
+    icao: str, obs_time: Optional[int] = None, **fields: Any
+) -> dict[str, Any]:
+    """A station record as the API returns it, observed now by default."""
+    if obs_time is None:
+        obs_time = int(time.time())
+    station: dict[str, Any] = {
+        "icaoId": icao,
+        "name": f"{icao} Airport",
+        "metarType": "METAR",
+        "fltCat": "VFR",
+        "lat": 35.0,
+        "lon": -79.0,
+        "wgst": None,
+        "rawOb": f"{icao} 121651Z 18010KT 10SM CLR 20/10 A3000",
+        "snow": None,
+        "obsTime": obs_time,
+    }
+    station.update(fields)
+    return station
+
+
+class StubMetarServer:
+    """
+    Serves `stations` from /api/data/metar with ETag support and records
+    every request it receives.
+    """
+
+    def __init__(self):
+        self.stations: dict[str, dict[str, Any]] = {}
+        self.requests: list[dict[str, Any]] = []
+        self.bytes_sent = 0
+        self.etags = True
+        self.latency_s = 0.0
+        # Requests for any of these IDs answer 500
+        self.failing: set[str] = set()
+        # The next `flaky` requests answer 503, with `retry_after` if set
+        self.flaky = 0
+        self.retry_after: Optional[str] = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                ids = query.get("ids", [""])[0].split(",")
+                stub.requests.append({"ids": ids, "headers": dict(self.headers)})
+                time.sleep(stub.latency_s)
+                if stub.flaky > 0:
+                    stub.flaky -= 1
+                    self.send_response(503)
+                    if stub.retry_after is not None:
+                        self.send_header("Retry-After", stub.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if stub.failing.intersection(ids):
+                    self.send_response(500)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps(
+                    [stub.stations[i] for i in ids if i in stub.stations]
+                ).encode()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if stub.etags and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if stub.etags:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+                stub.bytes_sent += len(body)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def __enter__(self) -> "StubMetarServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def write_config(self, path: Path, extra: str = "") -> Path:
+        path.write_text(f"""
+base_url: "{self.base_url}"
+endpoints:
+  metar: "/api/data/metar"
+logger:
+  log_file: "{path.parent / 'metar_map.log'}"
+{extra}
+""")
+        return path
+
+
+@pytest.fixture
+def metar_server() -> Iterator[StubMetarServer]:
+    with StubMetarServer() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def scratch_cwd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # The packaged config's cache, log and trace files are relative to the
+    # working directory; keep them out of the checkout
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,296 @@
+"""
+Unit tests for the MetarMap refresh loop and hot config reload.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import yaml
+
+from metar_map.app import MetarMap
+from metar_map.client import _parse_metar
+from metar_map.config import get_config, load_config
+from metar_map.config_watcher import ConfigWatcher
+from metar_map.led_backends import FrameRecorder, FrameReplay
+from metar_map.pattern_builder import LEDColor
+from metar_map.station_diff import DiffCounts
+from tests.conftest import StubMetarServer, make_station
+from tests.test_led_controller import CountingStrip
+
+
+def write_config(path: Path, server: StubMetarServer, **overrides: Any) -> str:
+    document = dict(load_config())
+    document.update(
+        {
+            "base_url": server.base_url,
+            "logger": {"log_file": str(path.parent / "metar_map.log")},
+            "cache": {},
+        }
+    )
+    document.update(overrides)
+    path.write_text(yaml.safe_dump(document))
+    # Make each rewrite visible to the mtime-based config memo
+    version = getattr(write_config, "version", 10**9) + 10**9
+    write_config.version = version  # type: ignore
+    os.utime(path, ns=(version, version))
+    return str(path)
+
+
+def make_app(tmp_path: Path, server: StubMetarServer, **overrides: Any):
+    config_path = write_config(tmp_path / "config.yaml", server, **overrides)
+    strip = CountingStrip(len(overrides.get("icao_codes", [])))
+    app = MetarMap(get_config(config_path=config_path), strip=strip)
+    app.controller.stop()
+    return app, strip, config_path
+
+
+def rendered(app: MetarMap) -> list[tuple[Any, ...]]:
+    app.controller.step(now=0.0)
+    return [tuple(p.color for p in patterns) for patterns in app.controller._table]
+
+
+def test_refresh_publishes_table_and_keeps_skipped_stations(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {
+        "KRDU": make_station("KRDU", fltCat="IFR"),
+        "KCLT": make_station("KCLT"),
+    }
+    app, _, _ = make_app(tmp_path, metar_server, icao_codes=["KRDU", "-", "KCLT"])
+
+    app.refresh()
+    assert rendered(app) == [(LEDColor.RED,), (), (LEDColor.GREEN,)]
+
+    del metar_server.stations["KCLT"]
+    app.refresh()
+    assert rendered(app)[2] == (LEDColor.GREEN,)
+
+
+def test_unchanged_payload_never_touches_the_controller(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    payload = [
+        _parse_metar(make_station("KRDU", fltCat="IFR")),
+        _parse_metar(make_station("KCLT")),
+    ]
+    app, _, _ = make_app(tmp_path, metar_server, icao_codes=["KRDU", "-", "KCLT"])
+    calls: list[str] = []
+    for name in ("update_patterns", "update_leds", "set_brightness"):
+        method = getattr(app.controller, name)
+        setattr(
+            app.controller,
+            name,
+            lambda *args, name=name, method=method: (calls.append(name), method(*args)),
+        )
+
+    assert app.apply_stations(payload) == DiffCounts(changed=2)
+    assert calls == ["update_leds"]
+    calls.clear()
+    assert app.apply_stations(payload) == DiffCounts(unchanged=2)
+    assert calls == []
+
+    # A new observation with the same display is not a change either
+    newer = _parse_metar(make_station("KCLT", obs_time=int(time.time()) + 60))
+    snowing = _parse_metar(make_station("KRDU", fltCat="IFR", snow=1.0))
+    assert app.apply_stations([snowing, newer]) == DiffCounts(changed=1, unchanged=1)
+    published = app.controller._published_table
+    assert published[0] == app.builder.build_led_patterns("IFR", False, True, False)
+    assert published[2] == app.builder.build_led_patterns("VFR", False, False, False)
+
+    assert app.apply_stations([newer], ["KRDU", "KCLT"]) == DiffCounts(
+        unchanged=1, missing=1
+    )
+    assert app.health()["missing"] == 1
+
+
+def test_stations_go_stale_through_an_outage_and_recover(
+    metar_server: StubMetarServer, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    metar_server.stations = {
+        "KRDU": make_station("KRDU"),
+        "KCLT": make_station("KCLT", fltCat="IFR"),
+    }
+    app, _, _ = make_app(
+        tmp_path,
+        metar_server,
+        icao_codes=["KRDU", "KCLT"],
+        stale_after=3600,
+        fetch={"retries": 0},
+    )
+    app.refresh()
+    stale = app.builder.build_stale_patterns()
+    assert stale is not None
+    assert rendered(app) == [(LEDColor.GREEN,), (LEDColor.RED,)]
+
+    # An hour of failed fetches keeps the last data on display
+    metar_server.failing = {"KRDU"}
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3000)
+    app.refresh()
+    assert rendered(app) == [(LEDColor.GREEN,), (LEDColor.RED,)]
+
+    monkeypatch.setattr(time, "time", lambda: now + 3700)
+    app.refresh()
+    assert app.controller._published_table == (stale, stale)
+    assert app.health()["stale"] == 2
+
+    # Being served the same old reports again doesn't make them fresh
+    metar_server.failing = set()
+    app.refresh()
+    assert app.controller._published_table == (stale, stale)
+
+    for station in metar_server.stations.values():
+        station["obsTime"] = int(now) + 3600
+    app.refresh()
+    assert rendered(app) == [(LEDColor.GREEN,), (LEDColor.RED,)]
+    assert app.health()["stale"] == 0
+
+
+def test_warm_start_shows_cached_stations_before_fetching(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    cache = {"file": str(tmp_path / "cache.json")}
+    metar_server.stations = {
+        "KRDU": make_station("KRDU", obs_time=int(time.time()), fltCat="IFR"),
+        "KCLT": make_station("KCLT", obs_time=int(time.time()) - 3 * 3600),
+    }
+    app, _, _ = make_app(
+        tmp_path, metar_server, icao_codes=["KRDU", "KCLT", "KSHN"], cache=cache
+    )
+    app.refresh()
+
+    restarted, _, _ = make_app(
+        tmp_path, metar_server, icao_codes=["KRDU", "KCLT", "KSHN"], cache=cache
+    )
+    requests = len(metar_server.requests)
+    assert restarted.warm_start() == 2
+    assert len(metar_server.requests) == requests
+    # KCLT's last observation is older than stale_after
+    assert rendered(restarted) == [
+        (LEDColor.RED,),
+        tuple(p.color for p in restarted.builder.build_stale_patterns() or ()),
+        (),
+    ]
+
+
+def test_brightness_reload_only_touches_strip(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    app, strip, config_path = make_app(tmp_path, metar_server, icao_codes=["KRDU"])
+    app.refresh()
+    builder = app.builder
+    table = app.controller._published_table
+    requests = len(metar_server.requests)
+
+    write_config(Path(config_path), metar_server, icao_codes=["KRDU"], brightness=0.6)
+    app.reload_config()
+    app.controller.step(now=1.0)
+
+    assert strip.brightness == 0.6
+    assert app.builder is builder
+    assert app.controller._published_table is table
+    assert len(metar_server.requests) == requests
+
+
+def test_pattern_reload_recompiles_without_fetching(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    app, _, config_path = make_app(tmp_path, metar_server, icao_codes=["KRDU"])
+    app.refresh()
+    requests = len(metar_server.requests)
+
+    led_patterns = dict(app.config.led_patterns)
+    led_patterns["VFR"] = dict(led_patterns["VFR"], color="YELLOW")
+    write_config(
+        Path(config_path), metar_server, icao_codes=["KRDU"], led_patterns=led_patterns
+    )
+    app.reload_config()
+
+    assert rendered(app) == [(LEDColor.YELLOW,)]
+    assert len(metar_server.requests) == requests
+
+
+def test_icao_reload_remaps_changed_leds_and_fetches_new_stations_only(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {
+        icao: make_station(icao) for icao in ("KRDU", "KCLT", "KSHN")
+    }
+    metar_server.stations["KSHN"]["fltCat"] = "LIFR"
+    app, _, config_path = make_app(
+        tmp_path, metar_server, icao_codes=["KRDU", "KCLT", "-"]
+    )
+    app.refresh()
+    requests = len(metar_server.requests)
+
+    write_config(Path(config_path), metar_server, icao_codes=["KRDU", "-", "KSHN"])
+    app.reload_config()
+
+    assert rendered(app) == [(LEDColor.GREEN,), (), (LEDColor.PINK,)]
+    assert [r["ids"] for r in metar_server.requests[requests:]] == [["KSHN"]]
+
+
+def test_invalid_reload_keeps_running_config(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    app, _, config_path = make_app(tmp_path, metar_server, icao_codes=["KRDU"])
+    config = app.config
+    write_config(Path(config_path), metar_server, icao_codes=["KRDU"], brightness=9)
+    app.reload_config()
+    assert app.config is config
+
+    # Pattern settings are checked when the patterns are compiled
+    led_patterns = dict(config.led_patterns)
+    led_patterns["GUSTS"] = {"color": "YELLOW", "duration": "long"}
+    write_config(
+        Path(config_path), metar_server, icao_codes=["KRDU"], led_patterns=led_patterns
+    )
+    app.reload_config()
+    assert app.config is config
+
+    # Malformed YAML, and a file an editor has moved away mid-save
+    Path(config_path).write_text("brightness: [0.2\n")
+    app.reload_config()
+    assert app.config is config
+    Path(config_path).unlink()
+    app.reload_config()
+    assert app.config is config
+
+
+def test_config_watcher_reports_changes(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("brightness: 0.1\n")
+    changed = threading.Event()
+    watcher = ConfigWatcher(str(config_path), changed.set, poll_interval_s=0.01)
+    watcher.start()
+    try:
+        assert not changed.wait(0.05)
+        config_path.write_text("brightness: 0.2\n")
+        os.utime(config_path, ns=(0, 10**9))
+        assert changed.wait(1.0)
+    finally:
+        watcher.stop()
+
+
+def test_app_runs_on_simulator_with_recording(
+    tmp_path: Path, metar_server: StubMetarServer
+):
+    frames = tmp_path / "frames.bin"
+    config_path = write_config(
+        tmp_path / "config.yaml",
+        metar_server,
+        icao_codes=["KRDU", "KCLT"],
+        strip={"backend": "simulator", "record_file": str(frames)},
+    )
+    app = MetarMap(get_config(config_path=config_path))
+    assert isinstance(app.controller.strip, FrameRecorder)
+    app.controller.stop()
+    with FrameReplay(str(frames)) as replay:
+        assert replay.num_leds == 2
+        assert len(replay) >= 1
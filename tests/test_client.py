@@ -2,11 +2,24 @@
 Unit tests for MetarClient and MetarData.
 """
 
+import dataclasses
+import json
+import time
+from pathlib import Path
 from typing import Any
 
 from unittest.mock import patch, MagicMock
 
-from metar_map.client import MetarClient, MetarData
+import pytest
+
+from metar_map.client import (
+    MetarBatch,
+    MetarCache,
+    MetarClient,
+    MetarData,
+    _parse_metar,
+)
+from tests.conftest import StubMetarServer, make_station
 
 
 def test_metar_client_initialization():
@@ -81,9 +94,9 @@ def test_get_metar_makes_request_and_parses_response():
             "snow": 0.0,
         },
     ]
-    with patch("requests.get") as mock_get:
+    with patch.object(client._session, "get") as mock_get:
         mock_response = MagicMock()
-        mock_response.json.return_value = mock_json
+        mock_response.iter_content.return_value = [json.dumps(mock_json).encode()]
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         result = client.get_metar(["KJFK", "KLAX"])
@@ -98,9 +111,9 @@ def test_get_metar_makes_request_and_parses_response():
 
 def test_get_metar_handles_empty_response():
     client = MetarClient()
-    with patch("requests.get") as mock_get:
+    with patch.object(client._session, "get") as mock_get:
         mock_response = MagicMock()
-        mock_response.json.return_value = []
+        mock_response.iter_content.return_value = [b"[]"]
         mock_response.raise_for_status.return_value = None
         mock_get.return_value = mock_response
         result = client.get_metar(["KJFK"])
@@ -110,10 +123,258 @@ def test_get_metar_handles_empty_response():
 
 def test_get_metar_raises_for_status():
     client = MetarClient()
-    with patch("requests.get") as mock_get:
+    with patch.object(client._session, "get") as mock_get:
         mock_response = MagicMock()
         mock_response.raise_for_status.side_effect = Exception("HTTP error")
         mock_get.return_value = mock_response
         result = client.get_metar(["KJFK"])
         assert isinstance(result, list)
         assert result == []
+
+
+def test_get_metar_revalidates_with_etag(metar_server: StubMetarServer, tmp_path: Path):
+    metar_server.stations = {"KRDU": make_station("KRDU"), "KCLT": make_station("KCLT")}
+    config_path = metar_server.write_config(tmp_path / "config.yaml")
+    client = MetarClient(config_path=str(config_path))
+
+    first = client.get_metar(["KRDU", "KCLT"])
+    second = client.get_metar(["KRDU", "KCLT"])
+
+    assert [d.icao for d in second] == ["KRDU", "KCLT"]
+    assert second == first
+    assert metar_server.requests[1]["headers"].get("If-None-Match")
+    assert client.cache.misses == 2
+    assert client.cache.hits == 2
+    assert client.cache.bytes_saved == metar_server.bytes_sent
+
+
+def test_get_metar_reuses_unchanged_stations(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU"), "KCLT": make_station("KCLT")}
+    metar_server.etags = False
+    config_path = metar_server.write_config(tmp_path / "config.yaml")
+    client = MetarClient(config_path=str(config_path))
+
+    first = client.get_metar(["KRDU", "KCLT"])
+    metar_server.stations["KCLT"] = make_station("KCLT", obs_time=1_700_003_600)
+    second = client.get_metar(["KRDU", "KCLT"])
+
+    assert second[0] is first[0]
+    assert second[1] is not first[1]
+    assert second[1].observation_time == 1_700_003_600
+    assert client.cache.hits == 1
+    assert client.cache.misses == 3
+
+
+def test_get_metar_cache_survives_restart(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml",
+        extra=f'cache:\n  file: "{tmp_path / "cache.json"}"',
+    )
+    MetarClient(config_path=str(config_path)).get_metar(["KRDU"])
+
+    restarted = MetarClient(config_path=str(config_path))
+    result = restarted.get_metar(["KRDU"])
+
+    assert [d.icao for d in result] == ["KRDU"]
+    assert restarted.cache.hits == 1
+    assert restarted.cache.misses == 0
+    assert len(metar_server.requests) == 2
+
+
+def test_cache_drops_validators_of_queries_no_longer_asked_for(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache = MetarCache(path=str(tmp_path / "cache.json"), query_ttl_s=600)
+    headers = {"ETag": '"v1"'}
+    cache.store_query("KRDU,KCLT", headers, 100, ["KRDU", "KCLT"])
+    cache.store_query("KSHN", headers, 100, ["KSHN"])
+    # Adaptive scheduling asks for a different set of stations each time
+    for minute in range(30):
+        now += 60
+        cache.conditional_headers("KSHN")
+        cache.store_query(f"KRDU,K{minute:03d}", headers, 100, ["KRDU"])
+    cache.save()
+
+    queries = json.loads((tmp_path / "cache.json").read_text())["queries"]
+    assert "KRDU,KCLT" not in queries
+    # KSHN is still being revalidated, plus the last ten minutes' queries
+    assert len(queries) == 12
+    assert "KSHN" in queries
+    assert cache.conditional_headers("KRDU,K029") == {"If-None-Match": '"v1"'}
+
+
+def test_get_metar_splits_ids_into_concurrent_batches(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    ids = [f"K{i:03d}" for i in range(10)]
+    metar_server.stations = {icao: make_station(icao) for icao in ids}
+    metar_server.latency_s = 0.2
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml", extra="fetch:\n  batch_size: 3\n  max_workers: 4"
+    )
+    client = MetarClient(config_path=str(config_path))
+
+    start = time.perf_counter()
+    result = client.get_metar(ids)
+    elapsed = time.perf_counter() - start
+
+    assert [d.icao for d in result] == ids
+    assert sorted(len(r["ids"]) for r in metar_server.requests) == [1, 3, 3, 3]
+    assert elapsed < 0.6
+
+
+def test_get_metar_keeps_partial_results(metar_server: StubMetarServer, tmp_path: Path):
+    ids = ["KRDU", "KCLT", "KSHN", "KSEA"]
+    metar_server.stations = {icao: make_station(icao) for icao in ids}
+    metar_server.failing = {"KSHN"}
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml",
+        extra="fetch:\n  batch_size: 2\n  retries: 1\n  backoff_s: 0.01",
+    )
+    client = MetarClient(config_path=str(config_path))
+
+    result = client.get_metar(ids)
+
+    assert [d.icao for d in result] == ["KRDU", "KCLT"]
+
+
+def test_get_metar_retries_transient_errors(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    metar_server.flaky = 2
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml", extra="fetch:\n  retries: 3\n  backoff_s: 0.01"
+    )
+    client = MetarClient(config_path=str(config_path))
+
+    result = client.get_metar(["KRDU"])
+
+    assert [d.icao for d in result] == ["KRDU"]
+    assert client.request_count == 3
+    assert client.retry_count == 2
+
+
+def test_get_metar_honors_retry_after(metar_server: StubMetarServer, tmp_path: Path):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    metar_server.flaky = 1
+    metar_server.retry_after = "0.3"
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml", extra="fetch:\n  backoff_s: 0.01"
+    )
+    client = MetarClient(config_path=str(config_path))
+
+    start = time.perf_counter()
+    result = client.get_metar(["KRDU"])
+
+    assert [d.icao for d in result] == ["KRDU"]
+    assert time.perf_counter() - start >= 0.3
+
+
+def test_get_metar_gives_up_when_retry_budget_is_spent(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    metar_server.flaky = 10
+    metar_server.retry_after = "5"
+    config_path = metar_server.write_config(
+        tmp_path / "config.yaml", extra="fetch:\n  retries: 5\n  retry_budget_s: 1"
+    )
+    client = MetarClient(config_path=str(config_path))
+
+    start = time.perf_counter()
+    result = client.get_metar(["KRDU"])
+
+    assert result == []
+    assert client.retry_count == 0
+    assert time.perf_counter() - start < 1
+
+
+def test_get_metar_reuses_pooled_connection(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    config_path = metar_server.write_config(tmp_path / "config.yaml")
+    client = MetarClient(config_path=str(config_path))
+
+    for _ in range(3):
+        client.get_metar(["KRDU"])
+
+    stats = client.connection_stats()
+    assert stats["requests"] == 3
+    assert stats["connections"] == 1
+    assert stats["reused"] == 2
+
+
+def test_iter_metar_yields_stations_as_parsed(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    ids = [f"K{i:03d}" for i in range(5)]
+    metar_server.stations = {icao: make_station(icao) for icao in ids}
+    config_path = metar_server.write_config(tmp_path / "config.yaml")
+    client = MetarClient(config_path=str(config_path))
+
+    stream = client.iter_metar(ids)
+    first = next(stream)
+    assert isinstance(first, MetarData)
+    assert first.icao == "K000"
+    assert [d.icao for d in stream] == ids[1:]
+
+
+def test_metar_data_is_frozen_with_derived_flags():
+    data = MetarData(
+        icao="KDEN",
+        name="Denver",
+        metar_type="SPECI",
+        flight_category="IFR",
+        latitude=39.86,
+        longitude=-104.67,
+        wind_gust=32,
+        raw="KDEN 121651Z 36015G32KT 1/2SM SN FG VV004 M05/M06 A2990",
+        snow=1.5,
+    )
+    assert data.snowing is True
+    assert data.gusty is True
+    assert data.lightning is False
+    assert not hasattr(data, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        data.flight_category = "VFR"  # type: ignore
+
+
+def test_metar_batch_columns_and_lookup():
+    stations = [
+        _parse_metar(make_station("KRDU", wgst=25)),
+        _parse_metar(make_station("KCLT", lat=None, snow=0.5)),
+    ]
+    batch = MetarBatch.from_records(stations)
+
+    assert len(batch) == 2
+    assert "KCLT" in batch
+    row = batch.rows["KCLT"]
+    assert batch.flight_category[row] == "VFR"
+    assert batch.snowing[row] == 1
+    assert batch.gusty[batch.rows["KRDU"]] == 1
+    assert batch.get("KRDU") == stations[0]
+    assert batch.get("KCLT") == stations[1]
+    assert batch.get("KSEA") is None
+
+    batch.append(_parse_metar(make_station("KRDU", fltCat="IFR")))
+    assert len(batch) == 2
+    assert batch.flight_category[batch.rows["KRDU"]] == "IFR"
+
+    # JSON numbers can be floats, and zero is a reported value, not a gap
+    calm = _parse_metar(make_station("KSHN", wgst=0, obs_time=0))
+    gusting = _parse_metar(make_station("KSEA", wgst=27.5, obsTime=None))
+    batch.append(calm)
+    batch.append(gusting)
+    assert batch.get("KSHN") == calm
+    assert batch.get("KSHN").observation_time == 0  # type: ignore[union-attr]
+    assert batch.get("KSEA").wind_gust == 27.5  # type: ignore[union-attr]
+    assert batch.get("KSEA") == gusting
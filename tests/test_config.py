@@ -1,8 +1,9 @@
 import tempfile
 import os
+from pathlib import Path
 import yaml
 import pytest
-from metar_map.config import load_config, resources
+from metar_map.config import Config, get_config, load_config, resources
 
 
 def test_load_config_from_valid_file():
@@ -38,3 +39,74 @@ def test_load_config_default(monkeypatch):  # type: ignore
         assert config["default"] is True
     finally:
         os.remove(tmp_path)
+
+
+def test_load_config_is_memoized_until_file_changes(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("brightness: 0.5\n")
+    first = load_config(config_path=str(config_path))
+    assert load_config(config_path=str(config_path)) is first
+    assert get_config(config_path=str(config_path)) is get_config(
+        config_path=str(config_path)
+    )
+
+    config_path.write_text("brightness: 0.25\n")
+    os.utime(config_path, ns=(0, 10**9))
+    assert load_config(config_path=str(config_path))["brightness"] == 0.25
+    assert get_config(config_path=str(config_path)).brightness == 0.25
+
+
+def test_get_config_types_and_defaults():
+    config = get_config()
+    assert isinstance(config, Config)
+    assert config.icao_codes == ("KSHN", "KRDU", "KCLT")
+    assert config.refresh_time == 1800
+    assert config.metar_endpoint == "/api/data/metar"
+    assert config.fetch.batch_size == 100
+    assert config.logger.rotation.type == "timed"
+    assert set(config.led_patterns) >= {"VFR", "LIGHTNING", "SNOW", "GUSTS"}
+
+
+@pytest.mark.parametrize(
+    "document, message",
+    [
+        ("brightness: 2\n", "brightness"),
+        ("refresh_time: soon\n", "refresh_time"),
+        ("fetch: 5\n", "fetch"),
+        ("- just\n- a list\n", "mapping"),
+        ("icao_codes: [A, B]\nstrip:\n  index_map: [1]\n", "index_map"),
+        ("icao_codes: [A, B]\nstrip:\n  index_map: [1, 1]\n", "index_map"),
+        ("icao_codes: [A, B]\nstrip:\n  index_map: [0, 2]\n", "index_map"),
+        ("icao_codes: [A, B]\nstrip:\n  channels: [{count: 1}]\n", "channels"),
+        (
+            "icao_codes: [A, B]\nstrip:\n  channels: [{count: 1}, {count: 1}]\n",
+            "one channel",
+        ),
+        ("strip:\n  backend: dmx\n", "backend"),
+    ],
+)
+def test_get_config_rejects_invalid_settings(
+    tmp_path: Path, document: str, message: str
+):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(document)
+    with pytest.raises(ValueError, match=message):
+        get_config(config_path=str(config_path))
+
+
+def test_get_config_strip_channels(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("""
+icao_codes: [KA, KB, KC]
+strip:
+  channels:
+    - pin: "D18"
+      count: 2
+    - pin: "D21"
+      count: 2
+  index_map: [3, 0, 1]
+  backend: simulator
+""")
+    strip = get_config(config_path=str(config_path)).strip
+    assert [(c.pin, c.count) for c in strip.channels] == [("D18", 2), ("D21", 2)]
+    assert strip.index_map == (3, 0, 1)
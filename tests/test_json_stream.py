@@ -0,0 +1,41 @@
+"""
+Unit tests for incremental JSON array parsing.
+"""
+
+import json
+
+import pytest
+
+from metar_map.json_stream import iter_json_array
+
+
+def _chunks(body: bytes, size: int) -> list[bytes]:
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 100_000])
+def test_matches_json_loads_for_any_chunking(chunk_size: int):
+    data = [
+        {"icaoId": f"K{i:03d}", "rawOb": "Zürich " * i, "clouds": [{"base": 1200}]}
+        for i in range(20)
+    ] + [12345, "text", None, []]
+    body = json.dumps(data, indent=1, ensure_ascii=False).encode()
+    assert list(iter_json_array(_chunks(body, chunk_size))) == data
+
+
+def test_empty_array():
+    assert list(iter_json_array([b" [ ", b" ] "])) == []
+
+
+def test_yields_before_the_stream_ends():
+    def chunks():
+        yield b'[{"a": 1},'
+        raise AssertionError("read past the first element")
+
+    assert next(iter_json_array(chunks())) == {"a": 1}
+
+
+@pytest.mark.parametrize("body", [b"", b"{}", b"[1, 2", b"[1 2]", b"[1,]"])
+def test_rejects_malformed_arrays(body: bytes):
+    with pytest.raises(ValueError):
+        list(iter_json_array([body]))
@@ -0,0 +1,114 @@
+"""
+Unit tests for the simulator backend and the frame recorder.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from metar_map.led_backends import (
+    FrameRecorder,
+    FrameReplay,
+    SimulatorBackend,
+)
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_simulator_keeps_shown_frame():
+    clock = FakeClock()
+    strip = SimulatorBackend(3, clock=clock)
+    controller = LEDController(num_leds=3, strip=strip, autostart=False)
+    controller.update_patterns({1: [LEDPattern(color=LEDColor.RED)]})
+    controller.step(now=0.0)
+    assert strip.shown == ((0, 0, 0), (0, 255, 0), (0, 0, 0))
+    assert list(strip.show_times) == [1000.0]
+    strip[0] = (1, 1, 1)
+    # Not shown until the next show()
+    assert strip.shown[0] == (0, 0, 0)
+
+
+def test_recorder_round_trip(tmp_path: Path):
+    clock = FakeClock()
+    inner = SimulatorBackend(4)
+    path = tmp_path / "frames" / "day.bin"
+    recorder = FrameRecorder(str(path), 4, inner=inner, clock=clock)
+    blink = LEDPattern(
+        color=LEDColor.BLUE, total_duration_s=100, blink=True, blink_speed_s=1.0
+    )
+    controller = LEDController(num_leds=4, strip=recorder, autostart=False)
+    controller.update_patterns({2: [blink]})
+    for second in range(3):
+        clock.now = 1000.0 + second
+        controller.step(now=float(second))
+    controller.set_brightness(0.5)
+    controller.step(now=2.5)
+    controller.stop()
+    assert inner.shows == recorder.frames == 5
+
+    with FrameReplay(str(path)) as replay:
+        assert replay.num_leds == 4
+        # 4 frames rendered, then the blank frame pushed by stop()
+        assert len(replay) == 5
+        assert [replay[i][0] for i in range(3)] == [1000.0, 1001.0, 1002.0]
+        assert replay[3][1] == 0.5
+        assert replay.color(0, 2) == (0, 0, 255)
+        assert replay.color(1, 2) == (0, 0, 0)
+        assert replay.color(2, 2) == (0, 0, 255)
+        assert bytes(replay[-1][2]) == bytes(12)
+
+
+def test_replay_ignores_partial_frame(tmp_path: Path):
+    path = tmp_path / "frames.bin"
+    recorder = FrameRecorder(str(path), 2)
+    recorder[0] = (1, 2, 3)
+    recorder.show()
+    recorder.show()
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+    with FrameReplay(str(path)) as replay:
+        assert len(replay) == 2
+        with pytest.raises(IndexError):
+            replay[2]
+
+
+def test_replay_rejects_other_files(tmp_path: Path):
+    path = tmp_path / "not_frames.bin"
+    path.write_bytes(b"hello world, not frames")
+    with pytest.raises(ValueError, match="recording"):
+        FrameReplay(str(path))
+
+
+def test_recorder_rotates_by_size_and_on_restart(tmp_path: Path):
+    path = tmp_path / "frames.bin"
+    frame_size = 12 + 3 * 2
+    # The header and three frames fit in a file
+    max_bytes = 10 + 3 * frame_size
+    recorder = FrameRecorder(str(path), 2, max_bytes=max_bytes, backup_count=2)
+    for frame in range(7):
+        recorder[0] = (frame, 0, 0)
+        recorder.show()
+    recorder.close()
+    assert path.stat().st_size == 10 + frame_size
+
+    # A restart keeps the last run's recording
+    FrameRecorder(str(path), 2, max_bytes=max_bytes, backup_count=2).close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "frames.bin",
+        "frames.bin.1",
+        "frames.bin.2",
+    ]
+    with FrameReplay(str(path) + ".1") as replay:
+        assert len(replay) == 1
+        assert replay.color(0, 0) == (6, 0, 0)
+    with FrameReplay(str(path) + ".2") as replay:
+        assert [replay.color(i, 0)[0] for i in range(len(replay))] == [3, 4, 5]
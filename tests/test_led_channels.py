@@ -0,0 +1,121 @@
+"""
+Unit tests for multi-channel LED output.
+"""
+
+import threading
+import time
+
+import pytest
+
+from metar_map.config import ChannelConfig, StripConfig
+from metar_map.led_channels import MultiStrip, create_strip
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+from tests.test_led_controller import CountingStrip
+
+
+class ConcurrentStrip(CountingStrip):
+    """Records how many channels were inside show() at the same time."""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def show(self):
+        cls = ConcurrentStrip
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.active -= 1
+        super().show()
+
+
+def make_channels(*counts: int) -> list[CountingStrip]:
+    return [CountingStrip(count) for count in counts]
+
+
+def test_index_map_routes_logical_leds_to_channels():
+    strips = make_channels(2, 3)
+    strip = MultiStrip(strips, [2, 3], index_map=[4, 0, 2])
+    strip[0] = (1, 1, 1)
+    strip[1] = (2, 2, 2)
+    strip[2] = (3, 3, 3)
+    assert len(strip) == 3
+    assert strips[0].pixels == [(2, 2, 2), (0, 0, 0)]
+    assert strips[1].pixels == [(3, 3, 3), (0, 0, 0), (1, 1, 1)]
+
+
+def test_show_skips_untouched_channels():
+    strips = make_channels(2, 2, 2)
+    strip = MultiStrip(strips, [2, 2, 2])
+    strip[3] = (1, 2, 3)
+    strip.show()
+    assert [s.shows for s in strips] == [0, 1, 0]
+    strip.show()
+    assert [s.shows for s in strips] == [0, 1, 0]
+    strip.close()
+
+
+def test_channels_show_concurrently():
+    ConcurrentStrip.peak = 0
+    strips = [ConcurrentStrip(10) for _ in range(4)]
+    strip = MultiStrip(strips, [10] * 4)
+    for i in range(40):
+        strip[i] = (1, 1, 1)
+    start = time.perf_counter()
+    strip.show()
+    elapsed = time.perf_counter() - start
+    strip.close()
+    assert ConcurrentStrip.peak == 4
+    assert elapsed < 0.15
+    assert all(s.shows == 1 for s in strips)
+
+
+def test_channel_failure_reaches_caller():
+    class BrokenStrip(CountingStrip):
+        def show(self):
+            raise RuntimeError("channel down")
+
+    strip = MultiStrip([CountingStrip(1), BrokenStrip(1)], [1, 1])
+    strip[0] = strip[1] = (1, 1, 1)
+    with pytest.raises(RuntimeError, match="channel down"):
+        strip.show()
+    strip.close()
+
+
+def test_create_strip_from_config():
+    created: list[tuple[int, str]] = []
+
+    def factory(count: int, pin: str, brightness: float) -> CountingStrip:
+        created.append((count, pin))
+        return CountingStrip(count)
+
+    single = create_strip(StripConfig(), 5, 0.2, factory)
+    assert isinstance(single, CountingStrip)
+    assert created == [(5, "D18")]
+
+    created.clear()
+    config = StripConfig(
+        channels=(ChannelConfig("D18", 3), ChannelConfig("D21", 3)),
+        index_map=(5, 4, 0),
+    )
+    multi = create_strip(config, 3, 0.2, factory)
+    assert created == [(3, "D18"), (3, "D21")]
+    assert len(multi) == 3
+
+
+def test_controller_drives_multiple_channels():
+    strips = make_channels(3, 3)
+    controller = LEDController(
+        num_leds=6,
+        strip=MultiStrip(strips, [3, 3], index_map=[5, 4, 3, 2, 1, 0]),
+        autostart=False,
+    )
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.GREEN)]})
+    controller.step(now=0.0)
+    # Logical LED 0 is the last pixel of the second channel, in GRB order
+    assert strips[1].pixels[2] == (255, 0, 0)
+    assert strips[0].pixels == [(0, 0, 0)] * 3
+    controller.strip.close()
@@ -0,0 +1,224 @@
+"""
+Unit tests for LEDController frame rendering.
+"""
+
+import threading
+import time
+
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+
+class CountingStrip:
+    def __init__(self, num_leds: int):
+        self.pixels: list[tuple[int, int, int]] = [(0, 0, 0)] * num_leds
+        self.writes = 0
+        self.shows = 0
+
+    def __setitem__(self, index: int, color: tuple[int, int, int]):
+        self.pixels[index] = color
+        self.writes += 1
+
+    def show(self):
+        self.shows += 1
+
+
+def make_controller(num_leds: int) -> tuple[LEDController, CountingStrip]:
+    strip = CountingStrip(num_leds)
+    controller = LEDController(num_leds=num_leds, strip=strip, autostart=False)
+    return controller, strip
+
+
+def test_step_shows_once_per_frame():
+    controller, strip = make_controller(50)
+    controller.update_patterns(
+        {i: [LEDPattern(color=LEDColor.GREEN)] for i in range(50)}
+    )
+    assert controller.step(now=0.0) is True
+    assert strip.shows == 1
+    # Pixels are written in GRB order
+    assert strip.pixels[0] == (255, 0, 0)
+
+
+def test_step_skips_unchanged_frame():
+    controller, strip = make_controller(10)
+    controller.update_patterns({3: [LEDPattern(color=LEDColor.RED)]})
+    controller.step(now=0.0)
+    writes = strip.writes
+    assert controller.step(now=0.05) is False
+    assert controller.step(now=0.10) is False
+    assert strip.shows == 1
+    assert strip.writes == writes
+
+
+def test_step_writes_only_changed_pixels():
+    controller, strip = make_controller(10)
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=10, blink=True, blink_speed_s=0.5
+    )
+    controller.update_patterns({0: [blink], 1: [LEDPattern(color=LEDColor.GREEN)]})
+    controller.step(now=0.0)
+    writes = strip.writes
+    assert controller.step(now=0.6) is True
+    assert strip.shows == 2
+    assert strip.writes == writes + 1
+    assert strip.pixels[0] == LEDColor.OFF.rgb
+
+
+def test_clear_all_uses_single_show():
+    controller, strip = make_controller(20)
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.GREEN)]})
+    controller.step(now=0.0)
+    controller.clear_all()
+    assert strip.shows == 2
+    assert all(pixel == LEDColor.OFF.rgb for pixel in strip.pixels)
+
+
+def test_stop_clears_strip():
+    strip = CountingStrip(5)
+    controller = LEDController(num_leds=5, strip=strip)
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.GREEN)]})
+    controller.stop()
+    assert strip.pixels[0] == LEDColor.OFF.rgb
+
+
+def test_static_frame_has_no_deadline():
+    controller, _ = make_controller(5)
+    controller.update_patterns(
+        {i: [LEDPattern(color=LEDColor.GREEN)] for i in range(5)}
+    )
+    controller.step(now=0.0)
+    assert controller._next_deadline == float("inf")
+
+
+def test_deadline_tracks_next_blink_and_transition():
+    controller, _ = make_controller(2)
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=8, blink=True, blink_speed_s=0.8
+    )
+    controller.update_patterns(
+        {0: [LEDPattern(color=LEDColor.GREEN), blink], 1: [blink]}
+    )
+    controller.step(now=0.0)
+    assert controller._next_deadline == 0.8
+
+
+def test_pattern_transition_renders_on_deadline():
+    controller, strip = make_controller(1)
+    controller.update_patterns(
+        {
+            0: [
+                LEDPattern(color=LEDColor.GREEN, total_duration_s=5),
+                LEDPattern(color=LEDColor.RED, total_duration_s=5),
+            ]
+        }
+    )
+    controller.step(now=0.0)
+    assert controller._next_deadline == 5.0
+    controller.step(now=5.0)
+    assert strip.pixels[0] == (0, 255, 0)
+
+
+def test_idle_render_thread_sleeps_until_woken():
+    strip = CountingStrip(5)
+    controller = LEDController(num_leds=5, strip=strip)
+    try:
+        green = [LEDPattern(color=LEDColor.GREEN)]
+        controller.update_patterns({0: green})
+        time.sleep(0.3)
+        idle_wakeups = controller.wakeups
+        assert idle_wakeups <= 2
+        controller.update_patterns({0: green, 1: [LEDPattern(color=LEDColor.RED)]})
+        deadline = time.monotonic() + 1.0
+        while strip.pixels[1] != (0, 255, 0) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert strip.pixels[1] == (0, 255, 0)
+    finally:
+        controller.stop()
+
+
+def test_update_restarts_only_changed_leds():
+    controller, strip = make_controller(2)
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=10, blink=True, blink_speed_s=0.5
+    )
+    controller.update_patterns({0: [blink], 1: [blink]})
+    controller.step(now=0.0)
+    controller.step(now=0.5)
+    assert strip.pixels[0] == strip.pixels[1] == LEDColor.OFF.rgb
+    faster_blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=10, blink=True, blink_speed_s=0.4
+    )
+    controller.update_patterns({0: [blink], 1: [faster_blink]})
+    controller.step(now=0.6)
+    assert strip.pixels[0] == LEDColor.OFF.rgb
+    assert strip.pixels[1] == (255, 255, 255)
+    assert controller._next_deadline == 1.0
+    # An unchanged table does not restart anything
+    controller.update_patterns({0: [blink], 1: [faster_blink]})
+    controller.step(now=0.7)
+    assert controller._next_deadline == 1.0
+
+
+def test_update_leds_replaces_only_the_given_leds():
+    controller, strip = make_controller(3)
+    red = LEDPattern(color=LEDColor.RED)
+    green = LEDPattern(color=LEDColor.GREEN)
+    controller.update_patterns({0: [red], 1: [red], 2: [red]})
+    controller.update_leds({1: [green]})
+    controller.update_leds({})
+    controller.step(now=0.0)
+    assert controller._table == ((red,), (green,), (red,))
+    assert strip.shows == 1
+
+
+class SlowStrip(CountingStrip):
+    def show(self):
+        time.sleep(0.1)
+        super().show()
+
+
+def test_updates_from_many_threads_never_wait_for_show():
+    strip = SlowStrip(20)
+    controller = LEDController(num_leds=20, strip=strip)
+    latencies: list[float] = []
+
+    def hammer(color: LEDColor):
+        blink = [LEDPattern(color=color, blink=True, blink_speed_s=0.01)]
+        for _ in range(50):
+            start = time.perf_counter()
+            controller.update_patterns({i: blink for i in range(20)})
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.002)
+
+    colors = (LEDColor.GREEN, LEDColor.RED, LEDColor.BLUE, LEDColor.PINK)
+    threads = [threading.Thread(target=hammer, args=(c,)) for c in colors]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        controller.update_patterns(
+            {i: [LEDPattern(color=LEDColor.BLUE)] for i in range(20)}
+        )
+        deadline = time.monotonic() + 2.0
+        while strip.pixels != [(0, 0, 255)] * 20 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert strip.pixels == [(0, 0, 255)] * 20
+    finally:
+        controller.stop()
+
+    assert len(latencies) == 200
+    assert max(latencies) < 0.05
+    assert strip.shows > 1
+
+
+def test_set_brightness_repushes_frame():
+    controller, strip = make_controller(3)
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.GREEN)]})
+    controller.step(now=0.0)
+    controller.set_brightness(0.5)
+    assert controller.step(now=0.1) is True
+    assert strip.brightness == 0.5
+    assert strip.shows == 2
+    assert controller.step(now=0.2) is False
@@ -0,0 +1,101 @@
+"""
+Unit tests for the fading renderer.
+"""
+
+import pytest
+
+from metar_map.led_backends import SimulatorBackend
+from metar_map.led_controller import INFINITY
+from metar_map.led_fade import FadingLEDController, gamma_table
+from metar_map.pattern_builder import LEDColor, LEDPattern
+
+
+def make_controller(
+    num_leds: int, gamma: float = 1.0
+) -> tuple[FadingLEDController, SimulatorBackend]:
+    strip = SimulatorBackend(num_leds)
+    controller = FadingLEDController(
+        num_leds=num_leds, strip=strip, autostart=False, gamma=gamma, fps=50
+    )
+    return controller, strip
+
+
+def test_gamma_table():
+    table = gamma_table(2.2)
+    assert len(table) == 256
+    assert table[0] == 0 and table[255] == 255
+    assert list(table) == sorted(table)
+    assert table[128] < 64
+    assert gamma_table(1.0) == bytes(range(256))
+
+
+def test_fade_in_renders_at_frame_rate_until_done():
+    controller, strip = make_controller(2)
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.WHITE, fade_s=1.0)]})
+    controller.step(now=0.0)
+    assert controller._next_deadline == pytest.approx(0.02)
+    controller.step(now=0.5)
+    # Pixels are written in GRB order, half way to white
+    assert strip.pixels[0] == (128, 128, 128)
+    controller.step(now=1.0)
+    assert strip.pixels[0] == (255, 255, 255)
+    assert controller._next_deadline == INFINITY
+    shows = strip.shows
+    assert controller.step(now=2.0) is False
+    assert strip.shows == shows
+
+
+def test_crossfade_between_patterns():
+    controller, strip = make_controller(1)
+    red = LEDPattern(color=LEDColor.RED, total_duration_s=2)
+    blue = LEDPattern(color=LEDColor.BLUE, total_duration_s=2, fade_s=1.0)
+    controller.update_patterns({0: [red, blue]})
+    controller.step(now=0.0)
+    assert strip.pixels[0] == (0, 255, 0)
+    controller.step(now=2.0)
+    controller.step(now=2.5)
+    assert strip.pixels[0] == (0, 128, 128)
+    controller.step(now=3.0)
+    assert strip.pixels[0] == (0, 0, 255)
+
+
+def test_blink_fades_out_and_back():
+    controller, strip = make_controller(1)
+    blink = LEDPattern(
+        color=LEDColor.GREEN,
+        total_duration_s=100,
+        blink=True,
+        blink_speed_s=1.0,
+        fade_s=0.5,
+    )
+    controller.update_patterns({0: [blink]})
+    controller.step(now=0.0)
+    controller.step(now=0.5)
+    assert strip.pixels[0] == (255, 0, 0)
+    controller.step(now=1.0)
+    controller.step(now=1.25)
+    assert strip.pixels[0] == (128, 0, 0)
+    controller.step(now=1.5)
+    assert strip.pixels[0] == (0, 0, 0)
+
+
+def test_led_brightness_and_gamma():
+    controller, strip = make_controller(3, gamma=2.2)
+    solid = [LEDPattern(color=LEDColor.WHITE)]
+    controller.update_patterns({0: solid, 1: solid})
+    controller.step(now=0.0)
+    assert strip.pixels[0] == (255, 255, 255)
+    controller.set_led_brightness({1: 0.5})
+    controller.step(now=0.1)
+    level = gamma_table(2.2)[128]
+    assert strip.pixels[1] == (level, level, level)
+    assert strip.pixels[0] == (255, 255, 255)
+    assert strip.pixels[2] == (0, 0, 0)
+
+
+def test_stop_clears_strip():
+    controller, strip = make_controller(2)
+    controller.update_patterns({0: [LEDPattern(color=LEDColor.RED)]})
+    controller.step(now=0.0)
+    controller.stop()
+    assert strip.shown == ((0, 0, 0), (0, 0, 0))
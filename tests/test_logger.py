@@ -1,10 +1,18 @@
 from pathlib import Path
+import logging
+import os
 import threading
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import (
+    QueueHandler,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
 
 import pytest
 
-from metar_map.logger import Logger
+from metar_map.client import MetarClient
+from metar_map.config import get_config
+from metar_map.logger import ROOT_LOGGER_NAME, Logger
 
 
 @pytest.fixture
@@ -36,7 +44,7 @@ rotation:
 def test_logger_creates_file(sample_config_file: Path) -> None:
     logger = Logger(config_path=str(sample_config_file))
     logger.info("This is a test log")
-    file_handler = next(h for h in logger.logger.handlers if hasattr(h, "baseFilename"))
+    file_handler = next(h for h in logger.handlers if hasattr(h, "baseFilename"))
     log_file = Path(file_handler.baseFilename)  # type: ignore
     assert log_file.exists()
     contents = log_file.read_text()
@@ -45,7 +53,7 @@ def test_logger_creates_file(sample_config_file: Path) -> None:
 
 def test_logger_has_console_and_file_handlers(sample_config_file: Path) -> None:
     logger = Logger(config_path=str(sample_config_file))
-    handler_types = {type(h) for h in logger.logger.handlers}
+    handler_types = {type(h) for h in logger.handlers}
     assert any("StreamHandler" in h.__name__ for h in handler_types)
     assert any("FileHandler" in h.__name__ for h in handler_types)
 
@@ -65,7 +73,7 @@ logger:
     logger = Logger(config_path=str(config_path))
     file_handlers = [
         h
-        for h in logger.logger.handlers
+        for h in logger.handlers
         if isinstance(h, RotatingFileHandler)
         and not isinstance(h, TimedRotatingFileHandler)
     ]
@@ -79,7 +87,7 @@ def test_logging_levels_write_to_file(sample_config_file: Path) -> None:
     logger.warning("warning message")
     logger.error("error message")
     logger.critical("critical message")
-    file_handler = next(h for h in logger.logger.handlers if hasattr(h, "baseFilename"))
+    file_handler = next(h for h in logger.handlers if hasattr(h, "baseFilename"))
     log_file = Path(file_handler.baseFilename)  # type: ignore
     contents = log_file.read_text(encoding="utf-8")
     assert "debug message" in contents
@@ -103,7 +111,7 @@ def test_logger_thread_safety(sample_config_file: Path) -> None:
         t.start()
     for t in threads:
         t.join()
-    file_handler = next(h for h in logger.logger.handlers if hasattr(h, "baseFilename"))
+    file_handler = next(h for h in logger.handlers if hasattr(h, "baseFilename"))
     log_file = Path(file_handler.baseFilename)  # type: ignore
     contents = log_file.read_text(encoding="utf-8")
     for i in range(5):
@@ -128,8 +136,103 @@ logger:
     logger = Logger(config_path=str(config_path))
     logger.info("info message should not appear")
     logger.error("error message should appear")
-    file_handler = next(h for h in logger.logger.handlers if hasattr(h, "baseFilename"))
+    file_handler = next(h for h in logger.handlers if hasattr(h, "baseFilename"))
     log_file = Path(file_handler.baseFilename)  # type: ignore
     contents = log_file.read_text(encoding="utf-8")
     assert "error message should appear" in contents
     assert "info message should not appear" not in contents
+
+
+def test_queued_logger_flushes_on_close(tmp_path: Path) -> None:
+    log_file = tmp_path / "queued.log"
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"""
+logger:
+  log_file: "{log_file}"
+  queue: true
+"""
+    )
+    logger = Logger(config_path=str(config_path))
+    assert [type(h) for h in logging.getLogger("metar_map").handlers] == [QueueHandler]
+    for i in range(100):
+        logger.debug("queued %d", i)
+    logger.close()
+    contents = log_file.read_text(encoding="utf-8")
+    assert "queued 0" in contents
+    assert "queued 99" in contents
+
+
+def test_disabled_levels_skip_formatting(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        f"""
+logger:
+  log_file: "{tmp_path / 'lazy.log'}"
+  console_level: "WARNING"
+  file_level: "INFO"
+"""
+    )
+    logger = Logger(config_path=str(config_path))
+    formatted: list[str] = []
+
+    class Expensive:
+        def __str__(self) -> str:
+            formatted.append("str")
+            return "expensive"
+
+    assert not logger.isEnabledFor(logging.DEBUG)
+    assert logger.isEnabledFor(logging.INFO)
+    logger.debug("value: %s", Expensive())
+    assert formatted == []
+    logger.info("value: %s", Expensive())
+    assert formatted
+    logger.close()
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_many_clients_share_one_handler_set(sample_config_file: Path) -> None:
+    config = get_config(config_path=str(sample_config_file))
+    MetarClient(config=config)
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    handlers = list(root.handlers)
+    fds = _open_fds()
+    loggers = len(logging.Logger.manager.loggerDict)
+
+    clients = [MetarClient(config=config) for _ in range(200)]
+    for client in clients:
+        client._session.close()
+
+    assert root.handlers == handlers
+    assert _open_fds() == fds
+    assert len(logging.Logger.manager.loggerDict) == loggers
+
+
+def test_component_loggers_are_children(sample_config_file: Path) -> None:
+    client_logger = Logger(config_path=str(sample_config_file), name="client")
+    app_logger = Logger(name="app")
+    assert client_logger.logger.name == "metar_map.client"
+    assert app_logger.logger.parent is client_logger.logger.parent
+    assert app_logger.handlers == client_logger.handlers
+    app_logger.info("from the app")
+    contents = Path(sample_config_file.parent / "logs" / "test.log").read_text(
+        encoding="utf-8"
+    )
+    assert "metar_map.app - from the app" in contents
+
+
+def test_new_logger_config_replaces_handlers(
+    sample_config_file: Path, tmp_path: Path
+) -> None:
+    first = Logger(config_path=str(sample_config_file))
+    old_file = next(h for h in first.handlers if hasattr(h, "baseFilename"))
+    other = tmp_path / "other.yaml"
+    other.write_text(f'logger:\n  log_file: "{tmp_path / "other.log"}"\n')
+    second = Logger(config_path=str(other))
+    assert old_file not in second.handlers
+    assert old_file.stream is None  # type: ignore
+    assert len(logging.getLogger(ROOT_LOGGER_NAME).handlers) == 2
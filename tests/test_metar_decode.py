@@ -0,0 +1,111 @@
+"""
+Unit tests for the local METAR decoder.
+"""
+
+from typing import Optional
+
+import pytest
+
+from metar_map.client import _parse_metar
+from metar_map.metar_decode import decode_metar, flight_category
+from tests.conftest import make_station
+
+
+def test_decodes_a_us_metar():
+    decoded = decode_metar(
+        "METAR KRDU 121651Z AUTO VRB03G18KT 1 1/2SM -TSRA BR BKN008 OVC020CB "
+        "20/19 A2990 RMK AO2 LTG DSNT"
+    )
+    assert decoded.wind_direction is None
+    assert decoded.wind_speed_kt == 3
+    assert decoded.wind_gust_kt == 18
+    assert decoded.visibility_sm == 1.5
+    assert decoded.ceiling_ft == 800
+    assert decoded.weather == ("-TSRA", "BR")
+    assert decoded.lightning
+    assert not decoded.snow
+    assert decoded.flight_category == "IFR"
+
+
+def test_decodes_an_icao_metar():
+    decoded = decode_metar(
+        "EGLL 121650Z 24012MPS 200V280 9999 FEW030 SCT045 12/08 Q1012 NOSIG"
+    )
+    assert decoded.wind_direction == 240
+    assert decoded.wind_speed_kt == 23
+    assert decoded.visibility_sm == 10.0
+    assert decoded.ceiling_ft is None
+    assert decoded.weather == ()
+    assert decoded.flight_category == "VFR"
+
+
+@pytest.mark.parametrize(
+    "raw, weather, snow, lightning",
+    [
+        (
+            "KDEN 121651Z 36015KT 1/2SM SN FG VV004 M05/M06 A2990",
+            ("SN", "FG"),
+            True,
+            False,
+        ),
+        (
+            "KSEA 121651Z 18010KT 3SM -SHSN BLSN OVC015 A3000",
+            ("-SHSN", "BLSN"),
+            True,
+            False,
+        ),
+        ("KMIA 121651Z 18010KT 5SM +TS SCT020CB A3000", ("+TS",), False, True),
+        ("KJFK 121651Z 18010KT 10SM CLR 20/10 A3000 RMK LTG DSNT", (), False, True),
+        # Remarks are not present weather
+        ("KJFK 121651Z 18010KT 10SM CLR 20/10 A3000 RMK SNB30", (), False, False),
+    ],
+)
+def test_present_weather(raw: str, weather: tuple, snow: bool, lightning: bool):
+    decoded = decode_metar(raw)
+    assert decoded.weather == weather
+    assert decoded.snow is snow
+    assert decoded.lightning is lightning
+
+
+@pytest.mark.parametrize(
+    "visibility_sm, ceiling_ft, category",
+    [
+        (10.0, None, "VFR"),
+        (10.0, 3500, "VFR"),
+        (10.0, 3000, "MVFR"),
+        (5.0, None, "MVFR"),
+        (10.0, 900, "IFR"),
+        (2.5, 5000, "IFR"),
+        (10.0, 400, "LIFR"),
+        (0.25, None, "LIFR"),
+        (None, 800, "IFR"),
+        (None, None, None),
+    ],
+)
+def test_flight_category(
+    visibility_sm: Optional[float], ceiling_ft: Optional[int], category: Optional[str]
+):
+    assert flight_category(visibility_sm, ceiling_ft) == category
+
+
+def test_unrecognised_groups_are_skipped():
+    decoded = decode_metar("KXYZ 121651Z 18010KT 7SM R28/2400FT SCT/// BKN01X A3000")
+    assert decoded.visibility_sm == 7.0
+    assert decoded.ceiling_ft is None
+    assert decoded.weather == ()
+    assert decode_metar("").flight_category is None
+
+
+def test_missing_flight_category_is_derived():
+    data = _parse_metar(
+        make_station(
+            "KRDU",
+            fltCat=None,
+            wgst=None,
+            rawOb="KRDU 121651Z 18010G25KT 2SM -SN OVC006 M01/M02 A3000",
+        )
+    )
+    assert data.flight_category == "IFR"
+    assert data.snowing and data.gusty and not data.lightning
+    # The server's category is kept when it sends one
+    assert _parse_metar(make_station("KRDU", fltCat="MVFR")).flight_category == "MVFR"
@@ -0,0 +1,127 @@
+"""
+Unit tests for the metrics histogram, exposition format and endpoint.
+"""
+
+import time
+import tracemalloc
+from pathlib import Path
+
+import requests
+
+from metar_map.led_backends import SimulatorBackend
+from metar_map.led_controller import LEDController
+from metar_map.metrics import (
+    FRAME_BUCKETS_S,
+    Histogram,
+    MetricsServer,
+    MetricsWriter,
+)
+from metar_map.pattern_builder import LEDColor, LEDPattern
+from tests.conftest import StubMetarServer, make_station
+from tests.test_app import make_app
+
+
+def test_histogram_exposition():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    metrics = MetricsWriter()
+    metrics.histogram("fetch_seconds", "Fetch time", histogram)
+    metrics.gauge("refresh_stations", "Stations", 3, {"state": "changed"})
+    metrics.gauge("refresh_stations", "Stations", None, {"state": "missing"})
+    assert metrics.text().splitlines() == [
+        "# HELP metar_map_fetch_seconds Fetch time",
+        "# TYPE metar_map_fetch_seconds histogram",
+        'metar_map_fetch_seconds_bucket{le="0.1"} 2',
+        'metar_map_fetch_seconds_bucket{le="1.0"} 3',
+        'metar_map_fetch_seconds_bucket{le="+Inf"} 4',
+        "metar_map_fetch_seconds_sum 2.65",
+        "metar_map_fetch_seconds_count 4",
+        "# HELP metar_map_refresh_stations Stations",
+        "# TYPE metar_map_refresh_stations gauge",
+        'metar_map_refresh_stations{state="changed"} 3',
+        'metar_map_refresh_stations{state="missing"} NaN',
+    ]
+
+
+def test_endpoint_serves_fetch_and_render_counters(
+    metar_server: StubMetarServer, tmp_path: Path
+):
+    metar_server.stations = {"KRDU": make_station("KRDU")}
+    app, _, _ = make_app(tmp_path, metar_server, icao_codes=["KRDU", "KCLT"])
+    app.refresh()
+    app.refresh()
+    # The render thread may or may not have shown a frame before it stopped
+    assert app.controller.step(now=0.0)
+
+    server = MetricsServer(app.metrics_text, port=0)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{server.port}"
+        response = requests.get(f"{url}/metrics", timeout=5)
+        assert requests.get(f"{url}/other", timeout=5).status_code == 404
+    finally:
+        server.stop()
+
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    )
+    assert samples["metar_map_fetch_requests_total"] == "2"
+    assert samples["metar_map_fetch_seconds_count"] == "2"
+    assert samples["metar_map_fetch_stations_total"] == "2"
+    assert int(samples["metar_map_fetch_bytes_total"]) > 0
+    assert samples["metar_map_fetch_errors_total"] == "0"
+    # The second response was a 304 served from the cache
+    assert samples["metar_map_cache_hits_total"] == "1"
+    assert samples["metar_map_cache_misses_total"] == "1"
+    assert samples["metar_map_strip_shows_total"] == str(app.controller.shows)
+    assert samples['metar_map_refresh_stations{state="missing"}'] == "1"
+    assert samples["metar_map_stations"] == "1"
+
+
+def test_frame_instrumentation_is_cheap():
+    num_leds = 300
+    controller = LEDController(
+        num_leds=num_leds, strip=SimulatorBackend(num_leds), autostart=False
+    )
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=1e9, blink=True, blink_speed_s=0.01
+    )
+    controller.update_patterns({i: [blink] for i in range(num_leds)})
+    frames = 200
+    frame_times = controller.frame_times
+    perf_counter = time.perf_counter
+    clock = iter(range(10**6))
+
+    def render() -> float:
+        # Every LED toggles on every frame
+        start = perf_counter()
+        for _ in range(frames):
+            controller.step(now=next(clock) * 0.01)
+        return perf_counter() - start
+
+    def instrument() -> float:
+        # What _run_loop adds to each frame
+        start = perf_counter()
+        for _ in range(frames):
+            frame_start = perf_counter()
+            frame_times.observe(perf_counter() - frame_start)
+        return perf_counter() - start
+
+    render_s = min(render() for _ in range(3))
+    instrument_s = min(instrument() for _ in range(3))
+    assert instrument_s < 0.03 * render_s
+
+    # Observations reuse the histogram's preallocated storage
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(10_000):
+        frame_times.observe(0.002)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert after - before < 1024
+    assert frame_times.count == 3 * frames + 10_000
+    assert len(frame_times.counts) == len(FRAME_BUCKETS_S) + 1
@@ -0,0 +1,130 @@
+"""
+Unit tests for LEDPatternBuilder.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from metar_map.pattern_builder import LEDColor, LEDPattern, LEDPatternBuilder
+
+
+def test_builds_category_then_conditions():
+    builder = LEDPatternBuilder()
+    patterns = builder.build_led_patterns(
+        flight_category="IFR", lightning=True, snow=False, gusts=True
+    )
+    assert [p.color for p in patterns] == [
+        LEDColor.RED,
+        LEDColor.WHITE,
+        LEDColor.YELLOW,
+    ]
+    assert all(isinstance(p, LEDPattern) for p in patterns)
+
+
+def test_repeated_builds_return_shared_tuple():
+    builder = LEDPatternBuilder()
+    first = builder.build_led_patterns("VFR", False, False, False)
+    second = builder.build_led_patterns("VFR", False, False, False)
+    assert first is second
+    assert first == (LEDPattern(color=LEDColor.GREEN, total_duration_s=5, fade_s=1.0),)
+
+
+def test_unknown_category_shows_conditions_only():
+    builder = LEDPatternBuilder()
+    assert builder.build_led_patterns("UNKNOWN", False, False, False) == ()
+    patterns = builder.build_led_patterns("UNKNOWN", False, True, False)
+    assert [p.color for p in patterns] == [LEDColor.BRIGHT_BLUE]
+
+
+def test_missing_condition_pattern_fails_at_startup(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("""
+led_patterns:
+  VFR:
+    color: GREEN
+    duration: 5
+    blink: false
+    blink_speed: 0.5
+  LIGHTNING:
+    color: WHITE
+    duration: 8
+    blink: true
+    blink_speed: 0.8
+  SNOW:
+    color: BRIGHT_BLUE
+    duration: 8
+    blink: true
+    blink_speed: 0.8
+""")
+    with pytest.raises(ValueError, match="GUSTS"):
+        LEDPatternBuilder(config_path=str(config_path))
+
+
+def test_unknown_color_fails_at_startup(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("""
+led_patterns:
+  VFR:
+    color: PURPLE
+  LIGHTNING:
+    color: WHITE
+  SNOW:
+    color: WHITE
+  GUSTS:
+    color: WHITE
+""")
+    with pytest.raises(ValueError, match="PURPLE"):
+        LEDPatternBuilder(config_path=str(config_path))
+
+
+def test_left_out_settings_take_pattern_defaults(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("""
+led_patterns:
+  VFR:
+    color: GREEN
+    duration: 5
+  LIGHTNING:
+    color: WHITE
+  SNOW:
+    color: WHITE
+  GUSTS:
+    color: YELLOW
+""")
+    builder = LEDPatternBuilder(config_path=str(config_path))
+    assert builder.build_led_patterns("UNKNOWN", False, False, True) == (
+        LEDPattern(color=LEDColor.YELLOW),
+    )
+    assert builder.build_led_patterns("VFR", False, False, False) == (
+        LEDPattern(color=LEDColor.GREEN, total_duration_s=5.0),
+    )
+
+
+@pytest.mark.parametrize(
+    "setting, message",
+    [
+        ("duration: soon", "duration"),
+        ("duration: 0", "duration"),
+        ("blink: maybe", "blink"),
+        ("blink_speed: -1", "blink_speed"),
+        ("blink_speed: .nan", "blink_speed"),
+        ("fade: [1]", "fade"),
+    ],
+)
+def test_invalid_pattern_settings_fail_at_startup(
+    tmp_path: Path, setting: str, message: str
+):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(f"""
+led_patterns:
+  LIGHTNING:
+    color: WHITE
+  SNOW:
+    color: WHITE
+  GUSTS:
+    color: YELLOW
+    {setting}
+""")
+    with pytest.raises(ValueError, match=f"GUSTS` `{message}"):
+        LEDPatternBuilder(config_path=str(config_path))
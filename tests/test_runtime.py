@@ -0,0 +1,370 @@
+"""
+Unit tests for the asyncio runtime, driven by a fake clock.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+
+from metar_map.client import _parse_metar
+from metar_map.config import FetchConfig, ScheduleConfig
+from metar_map.runtime import Clock, Runtime, next_tick
+from tests.conftest import make_station
+
+
+class FakeClock(Clock):
+    """Time only moves when the test calls advance()."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + seconds, next(self._order), future))
+        await future
+
+    async def advance(self, seconds: float):
+        target = self.now + seconds
+        while self._sleepers and self._sleepers[0][0] <= target:
+            wake, _, future = heapq.heappop(self._sleepers)
+            self.now = wake
+            if not future.done():
+                future.set_result(None)
+            await settle()
+        self.now = target
+
+
+async def settle():
+    """Let woken tasks run up to their next await."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def wait_until(condition: Callable[[], bool], timeout_s: float = 2.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met"
+        await asyncio.sleep(0.001)
+
+
+class FakeController:
+    def __init__(self):
+        self.stopped = False
+        self.wakeups = 0
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeConfig:
+    def __init__(self, path: str, refresh_time: int = 1800, adaptive: bool = False):
+        self.path = path
+        self.refresh_time = refresh_time
+        self.schedule = ScheduleConfig(adaptive=adaptive, volatile_interval_s=300)
+        self.fetch = FetchConfig(batch_size=2)
+
+
+class FakeApp:
+    def __init__(self, tmp_path: Path, clock: FakeClock):
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text("refresh_time: 1800\n")
+        self.config = FakeConfig(str(config_path))
+        self.controller = FakeController()
+        self.clock = clock
+        self.fetch_times: list[float] = []
+        self.applied: list[list[Any]] = []
+        self.fetched: list[Optional[list[str]]] = []
+        self.reloads = 0
+        # When set, fetch() blocks until it is released
+        self.hold: Optional[threading.Event] = None
+
+    def station_codes(self) -> list[str]:
+        return ["KRDU", "KCLT", "KSHN"]
+
+    def fetch(self, codes: Optional[list[str]] = None) -> list[Any]:
+        self.fetch_times.append(self.clock.now)
+        self.fetched.append(codes)
+        if self.hold is not None:
+            self.hold.wait()
+        return [len(self.fetch_times)]
+
+    def apply_stations(
+        self, stations: list[Any], requested: Optional[list[str]] = None
+    ):
+        self.applied.append(stations)
+
+    def reload_config(self):
+        self.reloads += 1
+
+    def health(self) -> dict[str, Any]:
+        return {"stations": len(self.applied)}
+
+
+def test_next_tick_stays_on_grid():
+    assert next_tick(0.0, 10.0, 0.0) == 10.0
+    assert next_tick(0.0, 10.0, 9.99) == 10.0
+    assert next_tick(0.0, 10.0, 10.0) == 20.0
+    # A refresh that overruns skips to the next grid point
+    assert next_tick(100.0, 10.0, 125.0) == 130.0
+
+
+def test_refreshes_run_on_a_drift_free_timer(tmp_path: Path):
+    async def scenario():
+        clock = FakeClock()
+        app = FakeApp(tmp_path, clock)
+        runtime = Runtime(app, clock=clock, watch_interval_s=600)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+
+        # A slow fetch doesn't push later refreshes back
+        app.hold = threading.Event()
+        await clock.advance(1800)
+        await wait_until(lambda: len(app.fetch_times) == 2)
+        await clock.advance(45)
+        app.hold.set()
+        await wait_until(lambda: len(app.applied) == 2)
+        await clock.advance(1800 - 45)
+        await wait_until(lambda: len(app.applied) == 3)
+
+        runtime.stop()
+        await task
+        return app
+
+    app = asyncio.run(scenario())
+    assert app.fetch_times == [0.0, 1800.0, 3600.0]
+    assert app.applied == [[1], [2], [3]]
+    assert app.controller.stopped
+
+
+def test_config_changes_are_reloaded(tmp_path: Path):
+    async def scenario():
+        clock = FakeClock()
+        app = FakeApp(tmp_path, clock)
+        runtime = Runtime(app, clock=clock, watch_interval_s=2.0)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        await clock.advance(2)
+        assert app.reloads == 0
+
+        Path(app.config.path).write_text("refresh_time: 60\n")
+        os.utime(app.config.path, ns=(0, 10**9))
+        await clock.advance(2)
+        await wait_until(lambda: app.reloads == 1)
+        runtime.reload()
+        await wait_until(lambda: app.reloads == 2)
+
+        runtime.stop()
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_failed_reload_keeps_the_runtime_going(tmp_path: Path):
+    class BrokenReloadApp(FakeApp):
+        def reload_config(self):
+            super().reload_config()
+            raise RuntimeError("half-written config")
+
+    async def scenario():
+        clock = FakeClock()
+        app = BrokenReloadApp(tmp_path, clock)
+        runtime = Runtime(app, clock=clock, watch_interval_s=600)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        runtime.reload()
+        await wait_until(lambda: app.reloads == 1)
+        runtime.reload()
+        await wait_until(lambda: app.reloads == 2)
+        assert not task.done()
+        runtime.stop()
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_health_is_reported(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    async def scenario():
+        clock = FakeClock()
+        app = FakeApp(tmp_path, clock)
+        runtime = Runtime(app, clock=clock, watch_interval_s=600, health_interval_s=300)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        await clock.advance(300)
+        runtime.stop()
+        await task
+
+    with caplog.at_level("INFO", logger="metar_map"):
+        asyncio.run(scenario())
+    assert "Health: stations=1" in caplog.text
+
+
+def test_shutdown_is_fast_even_with_a_fetch_in_flight(tmp_path: Path):
+    clock = FakeClock()
+    app = FakeApp(tmp_path, clock)
+    app.hold = threading.Event()
+
+    async def scenario() -> float:
+        runtime = Runtime(app, clock=clock)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.fetch_times) == 1)
+        start = time.perf_counter()
+        runtime.stop()
+        await task
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(scenario())
+    finally:
+        app.hold.set()
+    assert elapsed < 0.1
+    assert app.controller.stopped
+
+
+def test_reload_waits_for_a_fetch_in_flight(tmp_path: Path):
+    async def scenario():
+        clock = FakeClock()
+        app = FakeApp(tmp_path, clock)
+        app.hold = threading.Event()
+        runtime = Runtime(app, clock=clock, watch_interval_s=600)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.fetch_times) == 1)
+        runtime.reload()
+        await asyncio.sleep(0.05)
+        # The fetch and the reload would share the client's cache
+        assert app.reloads == 0
+        app.hold.set()
+        await wait_until(lambda: app.reloads == 1)
+        runtime.stop()
+        await task
+
+    asyncio.run(scenario())
+
+
+CHILD = """
+import asyncio
+import threading
+from pathlib import Path
+from tempfile import mkdtemp
+
+from metar_map.runtime import Runtime
+from tests.test_runtime import FakeApp, FakeClock, wait_until
+
+
+async def scenario():
+    clock = FakeClock()
+    app = FakeApp(Path(mkdtemp()), clock)
+    # The fetch never finishes
+    app.hold = threading.Event()
+    runtime = Runtime(app, clock=clock)
+    task = asyncio.create_task(runtime.run())
+    await wait_until(lambda: len(app.fetch_times) == 1)
+    runtime.stop()
+    await task
+
+
+asyncio.run(scenario())
+"""
+
+
+def test_process_exits_with_a_fetch_in_flight(tmp_path: Path):
+    # Importable from the scratch directory, where the runtime's log goes
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).parent.parent))
+    subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=tmp_path, env=env, check=True, timeout=30
+    )
+
+
+def test_sigterm_stops_the_runtime(tmp_path: Path):
+    async def scenario() -> float:
+        clock = FakeClock()
+        app = FakeApp(tmp_path, clock)
+        runtime = Runtime(app, clock=clock)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        start = time.perf_counter()
+        os.kill(os.getpid(), signal.SIGTERM)
+        await task
+        assert app.controller.stopped
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) < 0.1
+    # The default handler is restored afterwards
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+
+
+def test_adaptive_schedule_refetches_only_volatile_stations(tmp_path: Path):
+    class WeatherApp(FakeApp):
+        def fetch(self, codes: Optional[list[str]] = None) -> list[Any]:
+            super().fetch(codes)
+            now = int(time.time())
+            return [
+                _parse_metar(
+                    make_station(
+                        icao, obs_time=now, fltCat="IFR" if icao == "KCLT" else "VFR"
+                    )
+                )
+                for icao in codes or ()
+            ]
+
+    async def scenario():
+        clock = FakeClock()
+        app = WeatherApp(tmp_path, clock)
+        app.config = FakeConfig(app.config.path, adaptive=True)
+        runtime = Runtime(app, clock=clock, watch_interval_s=600)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        await clock.advance(300)
+        await wait_until(lambda: len(app.applied) == 2)
+        await clock.advance(300)
+        await wait_until(lambda: len(app.applied) == 3)
+        runtime.stop()
+        await task
+        return app
+
+    app = asyncio.run(scenario())
+    assert app.fetched == [["KRDU", "KCLT", "KSHN"], ["KCLT"], ["KCLT"]]
+    assert app.fetch_times == [0.0, 300.0, 600.0]
+
+
+def test_adaptive_schedule_follows_a_reloaded_refresh_time(tmp_path: Path):
+    class WeatherApp(FakeApp):
+        def fetch(self, codes: Optional[list[str]] = None) -> list[Any]:
+            super().fetch(codes)
+            now = int(time.time())
+            return [
+                _parse_metar(make_station(icao, obs_time=now)) for icao in codes or ()
+            ]
+
+    async def scenario():
+        clock = FakeClock()
+        app = WeatherApp(tmp_path, clock)
+        app.config = FakeConfig(app.config.path, adaptive=True)
+        runtime = Runtime(app, clock=clock, watch_interval_s=600)
+        task = asyncio.create_task(runtime.run())
+        await wait_until(lambda: len(app.applied) == 1)
+        # As reload_config() does; the stations are already due at 1800
+        app.config = FakeConfig(app.config.path, refresh_time=900, adaptive=True)
+        await clock.advance(1800)
+        await wait_until(lambda: len(app.applied) == 2)
+        await clock.advance(900)
+        await wait_until(lambda: len(app.applied) == 3)
+        runtime.stop()
+        await task
+        return app
+
+    assert asyncio.run(scenario()).fetch_times == [0.0, 1800.0, 2700.0]
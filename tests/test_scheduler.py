@@ -0,0 +1,119 @@
+"""
+Unit tests for the adaptive refresh scheduler.
+"""
+
+from typing import Any
+
+import pytest
+
+from metar_map.client import MetarData, _parse_metar
+from metar_map.config import ScheduleConfig
+from metar_map.scheduler import RefreshScheduler
+from tests.conftest import make_station
+
+WALL = 1_700_000_000
+SETTINGS = ScheduleConfig(
+    adaptive=True,
+    requests_per_hour=60,
+    volatile_interval_s=300,
+    publish_delay_s=120,
+)
+
+
+def metar(icao: str, age_s: float = 600, **fields: Any) -> MetarData:
+    return _parse_metar(make_station(icao, obs_time=int(WALL - age_s), **fields))
+
+
+def make_scheduler(*stations: str, **kwargs: Any) -> RefreshScheduler:
+    settings = kwargs.pop("settings", SETTINGS)
+    return RefreshScheduler(
+        settings,
+        max_interval_s=kwargs.pop("max_interval_s", 3600),
+        batch_size=kwargs.pop("batch_size", 2),
+        stations=stations,
+    )
+
+
+def test_new_stations_are_due_in_as_few_requests_as_possible():
+    scheduler = make_scheduler("KA", "KB", "KC")
+    assert scheduler.due(0.0) == ["KA", "KB", "KC"]
+    assert scheduler.requests == 2
+    # Nothing more until the fetch is recorded or its retry comes round
+    assert scheduler.due(1.0) == []
+    assert scheduler.next_due(1.0) == 300.0
+
+
+def test_stable_station_waits_for_the_next_routine_report():
+    scheduler = make_scheduler("KA")
+    scheduler.record(scheduler.due(0.0), [metar("KA", age_s=600)], 0.0, WALL)
+    # Observed 10 minutes ago: the next one is due in 50, plus 2 to publish
+    assert scheduler.next_due(0.0) == pytest.approx(3000 + 120)
+
+
+def test_stable_station_is_capped_at_max_interval():
+    scheduler = make_scheduler("KA", max_interval_s=1800)
+    scheduler.record(scheduler.due(0.0), [metar("KA", age_s=60)], 0.0, WALL)
+    assert scheduler.next_due(0.0) == 1800
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"metarType": "SPECI"},
+        {"fltCat": "IFR"},
+        {"rawOb": "KA 121651Z 18010KT 10SM TS LTG DSNT 20/10 A3000"},
+        {"wgst": 25},
+    ],
+)
+def test_volatile_stations_are_checked_often(fields: dict[str, Any]):
+    scheduler = make_scheduler("KA")
+    scheduler.record(scheduler.due(0.0), [metar("KA", **fields)], 0.0, WALL)
+    assert scheduler.next_due(0.0) == 300
+
+
+def test_overdue_report_is_retried_at_the_volatile_interval():
+    scheduler = make_scheduler("KA")
+    scheduler.record(scheduler.due(0.0), [metar("KA", age_s=3900)], 0.0, WALL)
+    assert scheduler.next_due(0.0) == 300
+
+
+def test_missing_station_waits_max_interval():
+    scheduler = make_scheduler("KA", "KB")
+    scheduler.record(scheduler.due(0.0), [metar("KA", fltCat="IFR")], 0.0, WALL)
+    assert scheduler.due(300.0) == ["KA"]
+    assert scheduler.next_due(300.0) == 300.0 + 300  # KA's pending retry
+
+
+def test_last_batch_is_topped_up_with_stations_due_soon():
+    scheduler = make_scheduler("KA", "KB", "KC", batch_size=3)
+    scheduler.record(
+        scheduler.due(0.0),
+        [
+            metar("KA", fltCat="IFR"),  # due at 300
+            metar("KB", age_s=3300),  # due at 420, within 300 s of the request
+            metar("KC", age_s=600),  # due at 3120
+        ],
+        0.0,
+        WALL,
+    )
+    assert scheduler.due(300.0) == ["KA", "KB"]
+    assert scheduler.requests == 2
+
+
+def test_requests_stay_within_budget():
+    settings = ScheduleConfig(
+        adaptive=True,
+        requests_per_hour=12,
+        volatile_interval_s=10,
+        publish_delay_s=0,
+    )
+    scheduler = make_scheduler("KA", settings=settings, batch_size=1)
+    now = 0.0
+    while now < 3600 * 3:
+        codes = scheduler.due(now)
+        if codes:
+            scheduler.record(codes, [metar("KA", metarType="SPECI")], now, WALL + now)
+        now = max(now + 1, scheduler.next_due(now))
+    # One request of burst allowance, then 12 an hour
+    assert scheduler.requests <= 1 + 12 * 3
+    assert scheduler.requests >= 12 * 3 - 1
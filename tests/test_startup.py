@@ -0,0 +1,105 @@
+"""
+Startup cost: imports plus the first frame stay within a budget, and building
+every component reads and parses config.yaml once.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+
+from metar_map import config as config_module
+from metar_map.app import MetarMap
+from metar_map.client import MetarClient
+from metar_map.config import get_config, load_config
+from metar_map.led_backends import SimulatorBackend
+from metar_map.logger import Logger
+from metar_map.pattern_builder import LEDPatternBuilder
+
+# Generous for CI; a Pi 4 sits well under this
+STARTUP_BUDGET_S = 3.0
+
+# Imports and builds the components up to the first frame, printing the time
+# taken; benchmarks/bench_startup.py times the same steps in more detail
+CHILD = """
+import time
+started = time.perf_counter()
+
+from metar_map.client import MetarClient
+from metar_map.config import get_config
+from metar_map.led_backends import SimulatorBackend
+from metar_map.led_controller import LEDController
+from metar_map.logger import Logger
+from metar_map.pattern_builder import LEDPatternBuilder
+
+config = get_config()
+Logger(config=config)
+MetarClient(config=config)
+builder = LEDPatternBuilder(config=config)
+num_leds = len(config.icao_codes)
+controller = LEDController(
+    num_leds=num_leds, strip=SimulatorBackend(num_leds), autostart=False
+)
+patterns = builder.build_led_patterns("VFR", False, False, False)
+controller.update_patterns({i: patterns for i in range(num_leds)})
+controller.step()
+print(time.perf_counter() - started)
+"""
+
+
+def first_frame_s() -> float:
+    """Seconds from the first import to the first frame, in a fresh interpreter."""
+    # A scratch directory keeps the packaged config's log and cache files out
+    with tempfile.TemporaryDirectory() as cwd:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            cwd=cwd,
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        ).stdout
+    return float(output.split()[-1])
+
+
+def test_startup_to_first_frame_within_budget():
+    assert min(first_frame_s() for _ in range(3)) < STARTUP_BUDGET_S
+
+
+def test_startup_reads_and_parses_config_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    document = dict(load_config())
+    document["logger"] = {"log_file": str(tmp_path / "metar_map.log")}
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(document))
+
+    counts = {"load": 0, "parse": 0}
+    yaml_load, parse_config = config_module.yaml.load, config_module._parse_config
+
+    def counting_load(*args, **kwargs):
+        counts["load"] += 1
+        return yaml_load(*args, **kwargs)
+
+    def counting_parse(*args, **kwargs):
+        counts["parse"] += 1
+        return parse_config(*args, **kwargs)
+
+    monkeypatch.setattr(config_module, "_cache", {})
+    monkeypatch.setattr(config_module.yaml, "load", counting_load)
+    monkeypatch.setattr(config_module, "_parse_config", counting_parse)
+
+    path = str(config_path)
+    config = get_config(config_path=path)
+    app = MetarMap(config, strip=SimulatorBackend(len(config.icao_codes)))
+    app.controller.stop()
+    # Components that load the config themselves share the same memo
+    Logger(config_path=path)
+    MetarClient(config_path=path)
+    LEDPatternBuilder(config_path=path)
+    assert load_config(config_path=path) is load_config(config_path=path)
+
+    assert counts == {"load": 1, "parse": 1}
@@ -0,0 +1,131 @@
+"""
+Unit tests for the trace spans and the sampling profiler.
+"""
+
+import json
+import pstats
+import threading
+from pathlib import Path
+
+import pytest
+
+from metar_map import tracing
+from metar_map.config import TracingConfig
+from metar_map.led_backends import SimulatorBackend
+from metar_map.led_controller import LEDController
+from metar_map.pattern_builder import LEDColor, LEDPattern
+from metar_map.profiler import SamplingProfiler
+
+
+@pytest.fixture
+def tracer(tmp_path: Path):
+    settings = TracingConfig(enabled=True, file=str(tmp_path / "trace.json"))
+    tracer = tracing.start(settings)
+    yield tracer
+    tracing.stop()
+
+
+def test_spans_are_free_when_off(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv(tracing.TRACE_ENV, raising=False)
+    assert tracing.start(TracingConfig()) is None
+    assert tracing.span("fetch") is tracing.span("parse")
+    assert tracing.frame_span("render") is tracing.span("fetch")
+
+
+def test_env_turns_tracing_on(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(tracing.TRACE_ENV, "1")
+    assert tracing.enabled(TracingConfig())
+    monkeypatch.setenv(tracing.TRACE_ENV, "0")
+    assert not tracing.enabled(TracingConfig())
+
+
+def test_trace_file_loads_as_chrome_trace(tracer: tracing.Tracer):
+    with tracing.span("fetch"):
+        with tracing.span("parse"):
+            pass
+    with tracing.span("build_led_patterns"):
+        pass
+    tracing.stop()
+
+    events = json.loads(Path(tracer.settings.file).read_text())
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in spans] == [
+        "parse",
+        "fetch",
+        "build_led_patterns",
+    ]
+    fetch, parse = spans[1], spans[0]
+    assert fetch["ts"] <= parse["ts"]
+    assert parse["ts"] + parse["dur"] <= fetch["ts"] + fetch["dur"]
+    names = {
+        event["tid"]: event["args"]["name"] for event in events if event["ph"] == "M"
+    }
+    assert names[fetch["tid"]] == threading.main_thread().name
+
+
+def test_trace_file_rotates(tmp_path: Path):
+    settings = TracingConfig(
+        enabled=True, file=str(tmp_path / "trace.json"), max_bytes=500, backup_count=2
+    )
+    tracer = tracing.Tracer(settings)
+    for _ in range(5):
+        for _ in range(10):
+            tracer.record("frame", 0, 1000)
+        tracer._flush()
+    tracer.record("frame", 0, 1000)
+    tracer.stop()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ["trace.json", "trace.json.1", "trace.json.2"]
+    for path in tmp_path.iterdir():
+        events = json.loads(path.read_text())
+        # Each file names the threads its spans ran on
+        assert events[0]["ph"] == "M"
+
+
+def test_only_sampled_frames_are_traced(tmp_path: Path):
+    settings = TracingConfig(
+        enabled=True, file=str(tmp_path / "trace.json"), frame_sample=10
+    )
+    tracer = tracing.start(settings)
+    assert tracer is not None
+    controller = LEDController(num_leds=3, strip=SimulatorBackend(3), autostart=False)
+    blink = LEDPattern(
+        color=LEDColor.WHITE, total_duration_s=1e9, blink=True, blink_speed_s=0.5
+    )
+    controller.update_patterns({i: [blink] for i in range(3)})
+    for frame in range(20):
+        tracing.next_frame()
+        controller.step(now=frame * 0.5)
+    tracing.stop()
+
+    events = json.loads(Path(tracer.settings.file).read_text())
+    names = [event["name"] for event in events if event["ph"] == "X"]
+    assert names.count("update_patterns") == 1
+    assert names.count("render") == 2
+    assert names.count("show") == 2
+
+
+def test_profile_loads_in_pstats(tmp_path: Path):
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy, name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval_s=0.001)
+    try:
+        profiler.run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+    path = tmp_path / "profile.prof"
+    profiler.dump(str(path))
+
+    stats = pstats.Stats(str(path))
+    functions = {func for _, _, func in stats.stats}
+    # Sees threads other than the one profiling
+    assert "busy" in functions
+    assert stats.total_calls > 0